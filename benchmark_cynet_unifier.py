@@ -0,0 +1,560 @@
+import os
+import sys
+import time
+import glob
+import argparse
+import tempfile
+import subprocess
+import re
+import copy
+import random
+import json
+import platform
+import datetime
+import statistics
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cynet_pdf_unifier_fixed as unifier
+import generar_informes_sinteticos as sinteticos
+
+
+def _cronometrar(funcion, *args, **kwargs):
+    """Ejecuta una función y devuelve (resultado, segundos)."""
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def benchmark_extraccion(rutas_pdf, workers=None, backends=("pdftotext", unifier.BACKEND_TEXTO_RESPALDO),
+                         repeticiones=5):
+    """Compara, para cada backend, la extracción con un worker y con varios.
+
+    Cada variante se ejecuta una vez sin medir (caché de páginas del sistema,
+    imports y procesos en frío) y después repeticiones veces, alternando el
+    orden de las variantes en cada vuelta; se informa la mediana. Con pdftotext
+    varios workers son el driver asyncio, que lanza las conversiones a la vez y
+    analiza su texto en un pool de procesos (con uno, conversiones de una en
+    una y análisis en un hilo); con los backends de PyMuPDF, el pool de procesos.
+    """
+    import shutil
+
+    workers_efectivos = workers or os.cpu_count() or 1
+    variantes = []
+    for backend in backends:
+        # Sin pdftotext se mediría en silencio el respaldo con PyMuPDF
+        if backend == "pdftotext" and not shutil.which("pdftotext"):
+            print(f"{backend:18s} no disponible (pdftotext no está en el PATH)")
+            continue
+        variantes.extend(dict.fromkeys([(backend, 1), (backend, workers_efectivos)]))
+    for backend, n in variantes:
+        unifier.extraer_datos_lote(rutas_pdf, workers=n, backend=backend)
+
+    tiempos = {variante: [] for variante in variantes}
+    for vuelta in range(repeticiones):
+        for backend, n in variantes if vuelta % 2 == 0 else reversed(variantes):
+            _, segundos = _cronometrar(unifier.extraer_datos_lote, rutas_pdf, workers=n, backend=backend)
+            tiempos[(backend, n)].append(segundos)
+
+    print(f"Archivos: {len(rutas_pdf)}  (mediana de {repeticiones} repeticiones tras una de calentamiento)")
+    for backend in dict.fromkeys(backend for backend, _ in variantes):
+        t_uno = statistics.median(tiempos[(backend, 1)])
+        t_varios = statistics.median(tiempos[(backend, workers_efectivos)])
+        mecanismo = "asyncio + pool de análisis" if backend == "pdftotext" else "pool de procesos"
+        print(f"{backend:18s} 1 worker: {t_uno:8.3f} s  {workers_efectivos} workers ({mecanismo}): "
+              f"{t_varios:8.3f} s  aceleración {t_uno / t_varios:5.2f}x")
+
+
+def _pdftotext_archivo_temporal(ruta_pdf):
+    """Conversión con archivo temporal, como se hacía antes de usar stdout."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as tmp_txt_file:
+        subprocess.run(["pdftotext", "-layout", ruta_pdf, tmp_txt_file.name], check=True)
+        with open(tmp_txt_file.name, "r", encoding="utf-8") as f:
+            texto = f.read()
+    os.unlink(tmp_txt_file.name)
+    return texto
+
+
+def benchmark_pdftotext(rutas_pdf, paginas=None):
+    """Compara pdftotext con archivo temporal frente a la lectura por stdout."""
+    _, t_temporal = _cronometrar(lambda: [_pdftotext_archivo_temporal(r) for r in rutas_pdf])
+    _, t_pipe = _cronometrar(lambda: [unifier.extraer_texto_pdftotext(r) for r in rutas_pdf])
+
+    print(f"Archivos: {len(rutas_pdf)}")
+    print(f"Archivo temporal:       {t_temporal:8.3f} s")
+    print(f"stdout:                 {t_pipe:8.3f} s")
+    if paginas:
+        _, t_rango = _cronometrar(lambda: [unifier.extraer_texto_pdftotext(r, paginas) for r in rutas_pdf])
+        print(f"stdout (págs {paginas[0]}-{paginas[1]}):    {t_rango:8.3f} s")
+
+
+def _analizar_texto_regex_encadenado(texto_completo_pagina, datos):
+    """Análisis previo al escáner de secciones: una re.search sin compilar por sección."""
+    match_resumen = re.search(r"Group Name\s*(.*?)\s*Date Range\s*(.*?)\s*Generated\s*(.*?)(?:\s*\*|$)", texto_completo_pagina, re.DOTALL | re.IGNORECASE)
+    match_sitio = re.search(r"Site Name\s*(.*?)\s*Date Range", texto_completo_pagina, re.IGNORECASE)
+    if match_resumen:
+        datos["resumen"]["nombre"] = match_resumen.group(1).strip()
+        datos["resumen"]["rango_fechas"] = match_resumen.group(2).strip()
+        datos["resumen"]["generado"] = match_resumen.group(3).strip()
+    elif match_sitio:
+        datos["resumen"]["nombre"] = match_sitio.group(1).strip()
+        match_rango_fechas = re.search(r"Date Range\s*(.*?)\s*Generated", texto_completo_pagina, re.IGNORECASE)
+        match_generado = re.search(r"Generated\s*(.*?)(?:\s*\*|$)", texto_completo_pagina, re.IGNORECASE)
+        if match_rango_fechas:
+            datos["resumen"]["rango_fechas"] = match_rango_fechas.group(1).strip()
+        if match_generado and match_generado.group(1):
+            datos["resumen"]["generado"] = match_generado.group(1).strip()
+
+    patron_malicioso = r"Malicious Detections and Preventions\s*(\d+)\s*Critical and\s*high alerts\s*were triggered\s*(\d+)\s*Critical and\s*high alerts\s*were handled\s*(\d+)\s*Affected files\s*(\d+)\s*Remediated files\s*(\d+)\s*Affected\s*endpoints"
+    match_malicioso = re.search(patron_malicioso, texto_completo_pagina, re.DOTALL | re.IGNORECASE)
+    if match_malicioso:
+        claves = ["alertas_activadas", "alertas_manejadas", "archivos_afectados", "archivos_remediados", "endpoints_afectados"]
+        for i, clave in enumerate(claves, 1):
+            datos["malicioso"][clave] = match_malicioso.group(i).strip()
+
+    match_automatizacion = re.search(r"Automation\s*(\d+)\s*Automatic investigations\s*(\d+)\s*Response actions", texto_completo_pagina, re.DOTALL | re.IGNORECASE)
+    if match_automatizacion:
+        datos["automatizacion"]["investigaciones_auto"] = match_automatizacion.group(1).strip()
+        datos["automatizacion"]["acciones_respuesta"] = match_automatizacion.group(2).strip()
+
+    match_inventario = re.search(r"Inventory\*\s*(\d+)\s*Active Endpoints", texto_completo_pagina, re.DOTALL | re.IGNORECASE)
+    if match_inventario:
+        datos["inventario"]["active_endpoints"] = match_inventario.group(1).strip()
+
+    alert_severity_block_match = re.search(r"Alert Count by Severity\s*Severity\s*#?\s*Alerts?\s*([\s\S]*?)(?:Top Affected Assets|Common Remediation Actions|IT Hygiene|Email Security|SaaS & Cloud|\Z)", texto_completo_pagina, re.IGNORECASE)
+    if alert_severity_block_match:
+        for line in alert_severity_block_match.group(1).split("\n"):
+            severity_match = re.match(r"^(Critical|High|Medium|Low)\s+(\d+)$", line.strip(), re.IGNORECASE)
+            if severity_match:
+                datos["alert_severity_counts"][severity_match.group(1).lower()] = severity_match.group(2).strip()
+    else:
+        for severity_keyword in ["Critical", "High", "Medium", "Low"]:
+            matches_fallback = re.findall(re.escape(severity_keyword) + r"\s+.*?(\d+)", texto_completo_pagina, re.IGNORECASE)
+            if matches_fallback:
+                datos["alert_severity_counts"][severity_keyword.lower()] = matches_fallback[0].strip()
+    return datos
+
+
+def _datos_vacios():
+    """Estructura datos inicial, igual a la de extraer_datos_pdf."""
+    return {
+        "resumen": {"nombre": "N/A", "rango_fechas": "N/A", "generado": "N/A"},
+        "malicioso": {"alertas_activadas": "0", "alertas_manejadas": "0", "archivos_afectados": "0",
+                      "archivos_remediados": "0", "endpoints_afectados": "0"},
+        "automatizacion": {"investigaciones_auto": "0", "acciones_respuesta": "0"},
+        "inventario": {"active_endpoints": "0"},
+        "alert_severity_counts": {"critical": "0", "high": "0", "medium": "0", "low": "0"},
+    }
+
+
+def generar_texto_informe(paginas_relleno, semilla=0, con_bloque_severidad=True):
+    """Genera texto con el formato de pdftotext -layout de un informe de varias páginas."""
+    r = random.Random(semilla)
+    v = [r.randint(0, 99999) for _ in range(11)]
+    relleno = []
+    for i in range(paginas_relleno):
+        relleno.append(f"Top Affected Assets   Page {i}\n" + "".join(
+            f"    host-{r.randint(0, 9999):04d}      Medium risk     {r.randint(0, 500)}   critical files\n"
+            for _ in range(40)))
+    severidad = ""
+    if con_bloque_severidad:
+        severidad = ("Alert Count by Severity\n   Severity      # Alerts\n"
+                     f"   Critical      {v[7]}\n   High          {v[8]}\n   Medium        {v[9]}\n   Low           {v[10]}\n")
+    return (
+        "                    Executive Report\n"
+        "Group Name            Date Range                     Generated\n"
+        "Tenant-Demo           1-Mar-2025 - 1-Apr-2025        2-Apr-2025\n"
+        "* Data shown for the selected range\n"
+        f"Malicious Detections and Preventions\n   {v[0]}\n   Critical and\n   high alerts\n   were triggered\n"
+        f"   {v[1]}\n   Critical and\n   high alerts\n   were handled\n"
+        f"   {v[2]}   Affected files   {v[3]}   Remediated files   {v[4]}   Affected\n   endpoints\n"
+        f"Automation\n   {v[5]}   Automatic investigations   {v[6]}   Response actions\n"
+        f"Inventory*\n   {v[0] % 5000}   Active Endpoints\n"
+        + "".join(relleno) + severidad + "IT Hygiene\n"
+    )
+
+
+def benchmark_analisis_texto(paginas_relleno=(0, 10, 100), repeticiones=200):
+    """Micro-benchmark del escáner de secciones frente a las re.search encadenadas."""
+    for paginas in paginas_relleno:
+        for con_bloque in (True, False):
+            texto = generar_texto_informe(paginas, semilla=paginas, con_bloque_severidad=con_bloque)
+            legado = _analizar_texto_regex_encadenado(texto, _datos_vacios())
+            nuevo = unifier.analizar_texto_informe(texto, _datos_vacios(), "benchmark")
+            if legado != nuevo:
+                print(f"DIFERENCIA con {paginas} páginas de relleno: {legado} != {nuevo}")
+
+            reps = max(1, repeticiones // max(1, paginas // 10))
+            # Las advertencias de los analizadores se repetirían en cada vuelta: solo se mide el análisis
+            with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+                _, t_legado = _cronometrar(lambda: [_analizar_texto_regex_encadenado(texto, _datos_vacios()) for _ in range(reps)])
+                _, t_nuevo = _cronometrar(lambda: [unifier.analizar_texto_informe(texto, _datos_vacios()) for _ in range(reps)])
+            etiqueta = "con bloque" if con_bloque else "sin bloque"
+            print(f"{paginas:4d} págs ({len(texto):8d} chars, {etiqueta}): "
+                  f"encadenado {1000 * t_legado / reps:8.3f} ms  escáner {1000 * t_nuevo / reps:8.3f} ms  "
+                  f"({t_legado / t_nuevo:5.2f}x)")
+
+
+def _tiempo_probe_pip_legado():
+    """Tiempo de la comprobación de pip que se hacía en cada arranque (pip --version vía shell)."""
+    inicio = time.perf_counter()
+    subprocess.run(f"\"{sys.executable}\" -m pip --version", shell=True,
+                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return time.perf_counter() - inicio
+
+
+def benchmark_arranque(top=15):
+    """Informe de arranque: tiempo total y módulos más costosos según -X importtime."""
+    script = ("import cynet_pdf_unifier_fixed as u; u.verificar_instalar_dependencias(); "
+              "u.parsear_argumentos([])")
+    directorio = os.path.dirname(os.path.abspath(__file__))
+
+    inicio = time.perf_counter()
+    proceso = subprocess.run([sys.executable, "-X", "importtime", "-c", script], cwd=directorio,
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    total = time.perf_counter() - inicio
+
+    modulos = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        cabecera, acumulado, nombre = linea.split("|")
+        propio = cabecera.split(":")[1]
+        modulos.append((int(acumulado), int(propio), nombre.rstrip()))
+    modulos.sort(reverse=True)
+
+    print(f"Arranque del intérprete + verificación de dependencias: {total * 1000:8.1f} ms")
+    print(f"Comprobación de pip anterior (pip --version vía shell):  {_tiempo_probe_pip_legado() * 1000:8.1f} ms")
+    pesados = [nombre for _, _, nombre in modulos if nombre.strip() in ("fitz", "pymupdf", "reportlab", "PIL")]
+    print(f"Módulos pesados importados al arrancar: {', '.join(pesados) if pesados else 'ninguno'}")
+    print(f"\n{'acumulado (us)':>14} {'propio (us)':>12}  módulo")
+    for acumulado, propio, nombre in modulos[:top]:
+        print(f"{acumulado:14d} {propio:12d}  {nombre}")
+
+
+def generar_datos_informe(indice, semilla=0):
+    """Datos sintéticos con la misma estructura que devuelve extraer_datos_pdf."""
+    r = random.Random(semilla * 100003 + indice)
+    datos = _datos_vacios()
+    datos["nombre_informe"] = f"Tenant-{indice:04d}"
+    datos["resumen"] = {"nombre": f"Tenant-{indice:04d}", "rango_fechas": "1-Mar-2025 - 1-Apr-2025",
+                        "generado": "2-Apr-2025"}
+    for seccion in ("malicioso", "automatizacion", "inventario", "alert_severity_counts"):
+        for clave in datos[seccion]:
+            datos[seccion][clave] = str(r.randint(0, 5000))
+    return datos
+
+
+def _pico_memoria_mb():
+    """Pico de memoria residente del proceso actual en MB (None si no está disponible)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def medir_render(num_informes, ruta_salida, fragmentos=None):
+    """Renderiza num_informes informes sintéticos y devuelve tiempo, memoria y tamaño."""
+    datos_todos = [generar_datos_informe(i) for i in range(num_informes)]
+    iconos = unifier.obtener_iconos(unifier.DIR_CACHE_PREDETERMINADO)
+    unifier.registrar_fuentes_cynet()
+    memoria_inicial = _pico_memoria_mb()
+    if fragmentos:
+        _, segundos = _cronometrar(unifier.crear_informe_unificado_fragmentado, datos_todos, ruta_salida,
+                                   unifier.localizar_logo(), iconos, fragmentos)
+    else:
+        _, segundos = _cronometrar(unifier.crear_informe_unificado, datos_todos, ruta_salida,
+                                   unifier.localizar_logo(), iconos)
+    return {"informes": num_informes, "segundos": segundos, "memoria_inicial_mb": memoria_inicial,
+            "memoria_pico_mb": _pico_memoria_mb(), "bytes_pdf": os.path.getsize(ruta_salida)}
+
+
+def benchmark_render(tamanos=(10, 100, 1000), fragmentos=None):
+    """Tiempo de render y pico de memoria, cada tamaño en un proceso nuevo.
+
+    Con fragmentos, el pico de memoria es el del proceso principal; los procesos
+    que renderizan los fragmentos no se incluyen.
+    """
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    print(f"{'informes':>8} {'tiempo (s)':>11} {'ms/informe':>11} {'RSS inicial':>12} {'RSS pico':>10} {'PDF (KB)':>9}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_informes in tamanos:
+            ruta_salida = os.path.join(tmp_dir, f"render_{num_informes}.pdf")
+            script = ("import json, benchmark_cynet_unifier as b; "
+                      f"print(json.dumps(b.medir_render({num_informes}, {ruta_salida!r}, {fragmentos!r})))")
+            proceso = subprocess.run([sys.executable, "-c", script], cwd=directorio,
+                                     stdout=subprocess.PIPE, text=True, check=True)
+            r = json.loads(proceso.stdout.strip().splitlines()[-1])
+            memoria = lambda mb: f"{mb:9.1f} MB" if mb is not None else f"{'n/d':>12}"
+            print(f"{r['informes']:8d} {r['segundos']:11.3f} {1000 * r['segundos'] / r['informes']:11.2f} "
+                  f"{memoria(r['memoria_inicial_mb']):>12} {memoria(r['memoria_pico_mb']):>10} "
+                  f"{r['bytes_pdf'] / 1024:9.0f}")
+
+
+SECCIONES_VERIFICADAS = ("resumen", "malicioso", "automatizacion", "inventario", "alert_severity_counts")
+
+
+def medir_extremo_a_extremo(num_informes, directorio, workers=None, periodos=1, paginas_relleno=0):
+    """Genera num_informes PDFs sintéticos y mide descubrimiento, extracción y render.
+
+    El descubrimiento y la extracción se miden en frío (catálogo y caché vacíos)
+    y en caliente (segunda pasada); discrepancias cuenta los informes cuyos
+    datos extraídos no coinciden con los generados.
+    """
+    dir_informes = os.path.join(directorio, "informes")
+    dir_cache = os.path.join(directorio, "cache")
+    dir_salida = os.path.join(directorio, "salida")
+    os.makedirs(dir_salida, exist_ok=True)
+
+    generados, t_generacion = _cronometrar(sinteticos.generar_informes, dir_informes, num_informes,
+                                           periodos=periodos, paginas_relleno=paginas_relleno)
+    esperados = {os.path.realpath(ruta): datos for ruta, datos in generados}
+
+    ruta_catalogo = os.path.join(dir_cache, unifier.NOMBRE_CATALOGO)
+    informes_por_periodo, t_descubrimiento = _cronometrar(unifier.informes_por_periodo_catalogo,
+                                                          dir_informes, ruta_catalogo)
+    _, t_descubrimiento_catalogo = _cronometrar(unifier.informes_por_periodo_catalogo, dir_informes, ruta_catalogo)
+    rutas_pdf = [informe["archivo"] for informes in informes_por_periodo.values() for informe in informes]
+
+    backend = unifier.seleccionar_backend_texto(None, unifier.RUTA_CONFIG_PREDETERMINADA)
+    resultados, t_extraccion = _cronometrar(unifier.extraer_datos_lote, rutas_pdf, workers=workers,
+                                            dir_cache=dir_cache, backend=backend)
+    _, t_extraccion_cache = _cronometrar(unifier.extraer_datos_lote, rutas_pdf, workers=workers,
+                                         dir_cache=dir_cache, backend=backend)
+
+    datos_por_ruta = {}
+    errores = discrepancias = 0
+    for ruta, (datos, error) in zip(rutas_pdf, resultados):
+        if error:
+            errores += 1
+            continue
+        datos_por_ruta[ruta] = datos
+        esperado = esperados.get(os.path.realpath(ruta))
+        if esperado is None or any(datos[s] != esperado[s] for s in SECCIONES_VERIFICADAS):
+            discrepancias += 1
+
+    iconos = unifier.obtener_iconos(dir_cache)
+    logo = unifier.localizar_logo()
+
+    def renderizar():
+        for periodo, informes in informes_por_periodo.items():
+            datos_periodo = [datos_por_ruta[i["archivo"]] for i in informes if i["archivo"] in datos_por_ruta]
+            ruta_salida = os.path.join(dir_salida, unifier.nombre_archivo_salida(periodo))
+            unifier.crear_informe_unificado(datos_periodo, ruta_salida, logo, iconos)
+    _, t_render = _cronometrar(renderizar)
+
+    return {
+        "informes": num_informes,
+        "periodos": len(informes_por_periodo),
+        "backend": backend,
+        "generacion_s": t_generacion,
+        "descubrimiento_s": t_descubrimiento,
+        "descubrimiento_catalogo_s": t_descubrimiento_catalogo,
+        "extraccion_s": t_extraccion,
+        "extraccion_cache_s": t_extraccion_cache,
+        "render_s": t_render,
+        "errores": errores,
+        "discrepancias": discrepancias,
+    }
+
+
+ETAPAS_EXTREMO_A_EXTREMO = ("descubrimiento_s", "descubrimiento_catalogo_s", "extraccion_s", "extraccion_cache_s",
+                            "render_s")
+
+
+def benchmark_extremo_a_extremo(tamanos=(10, 100, 1000, 5000), workers=None, periodos=1, paginas_relleno=0,
+                                ruta_resultados=None, ruta_comparar=None):
+    """Ejecuta medir_extremo_a_extremo para cada tamaño y guarda los resultados en JSON."""
+    anteriores = {}
+    if ruta_comparar:
+        with open(ruta_comparar, "r", encoding="utf-8") as f:
+            anteriores = {r["informes"]: r for r in json.load(f)["resultados"]}
+
+    print(f"{'informes':>8} {'descubrir':>10} {'catálogo':>9} {'extraer':>9} {'con caché':>10} {'render':>9} {'errores':>8} {'difieren':>9}")
+    resultados = []
+    for num_informes in tamanos:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            r = medir_extremo_a_extremo(num_informes, tmp_dir, workers, periodos, paginas_relleno)
+        resultados.append(r)
+        print(f"{r['informes']:8d} {r['descubrimiento_s']:10.3f} {r['descubrimiento_catalogo_s']:9.3f} "
+              f"{r['extraccion_s']:9.3f} {r['extraccion_cache_s']:10.3f} {r['render_s']:9.3f} {r['errores']:8d} {r['discrepancias']:9d}")
+        anterior = anteriores.get(num_informes)
+        if anterior:
+            cambios = "  ".join(f"{etapa[:-2]} {anterior[etapa] / r[etapa]:.2f}x"
+                                for etapa in ETAPAS_EXTREMO_A_EXTREMO if r[etapa] > 0 and anterior.get(etapa))
+            print(f"{'':8} frente a {os.path.basename(ruta_comparar)}: {cambios}")
+
+    informe = {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "version_extractor": unifier.VERSION_EXTRACTOR,
+        "version_render": unifier.VERSION_RENDER,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "workers": workers,
+        "paginas_relleno": paginas_relleno,
+        "resultados": resultados,
+    }
+    if ruta_resultados:
+        with open(ruta_resultados, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        print(f"Resultados guardados en {os.path.abspath(ruta_resultados)}")
+    return informe
+
+
+def benchmark_tendencias(tenants=300, meses=12):
+    """Llena un histórico con tenants x meses informes sintéticos y mide la consulta y el reporte."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        ruta_catalogo = os.path.join(tmp_dir, unifier.NOMBRE_CATALOGO)
+        pares = []
+        for periodo in range(meses):
+            for indice in range(tenants):
+                datos = sinteticos.datos_sinteticos(indice, periodo)
+                pares.append((os.path.join(tmp_dir, sinteticos.nombre_archivo_informe(datos)), datos))
+        _, t_guardar = _cronometrar(unifier.guardar_historico, ruta_catalogo, pares)
+
+        def consultar():
+            conexion = unifier.abrir_catalogo(ruta_catalogo)
+            try:
+                desde, hasta = unifier.rango_tendencias(conexion, meses=meses)
+                return unifier.consultar_historico(conexion, desde, hasta), unifier.meses_rango(desde, hasta)
+            finally:
+                conexion.close()
+        (series, meses_tendencia), t_consulta = _cronometrar(consultar)
+        ruta_pdf = os.path.join(tmp_dir, "tendencias.pdf")
+        _, t_render = _cronometrar(unifier.crear_informe_tendencias, series, meses_tendencia, ruta_pdf,
+                                   unifier.localizar_logo())
+        print(f"Histórico: {len(pares)} informes ({tenants} tenants x {meses} meses)")
+        print(f"  Guardar:   {t_guardar:.3f}s")
+        print(f"  Consultar: {t_consulta:.3f}s")
+        print(f"  Reporte:   {t_render:.3f}s ({os.path.getsize(ruta_pdf) / 1024:.0f} KB)")
+
+
+def _campos_correctos(datos, esperados):
+    """Número de campos de esperados que coinciden en datos."""
+    return sum(datos[seccion][campo] == valor
+               for seccion, valores in esperados.items() for campo, valor in valores.items())
+
+
+def benchmark_posiciones(cantidad, paginas_relleno):
+    """Compara el extractor por posiciones con el análisis por expresiones regulares de cada backend de texto.
+
+    Genera informes sintéticos con el diseño en líneas y con el diseño en
+    tarjetas, y por backend mide el tiempo de extracción y cuántos campos
+    coinciden con los datos con los que se generó cada informe.
+    """
+    import shutil
+
+    backends = [b for b in unifier.BACKENDS_EXTRACCION if b != "pdftotext" or shutil.which("pdftotext")]
+    with tempfile.TemporaryDirectory(prefix="cynet_bench_posiciones_") as directorio:
+        for diseno in ("lineas", "tarjetas"):
+            generados = sinteticos.generar_informes(os.path.join(directorio, diseno), cantidad,
+                                                    paginas_relleno=paginas_relleno, separador_miles=True,
+                                                    tarjetas=diseno == "tarjetas")
+            total_campos = sum(_campos_correctos(esperados, esperados) for _, esperados in generados)
+            print(f"Diseño {diseno}: {cantidad} informes, {paginas_relleno} páginas de relleno")
+            for backend in backends:
+                resultados, segundos = _cronometrar(
+                    lambda: [unifier.extraer_datos_pdf(ruta, backend=backend, respaldo=False) for ruta, _ in generados])
+                correctos = sum(_campos_correctos(datos, esperados)
+                                for datos, (_, esperados) in zip(resultados, generados))
+                exactos = sum(_campos_correctos(datos, esperados) == _campos_correctos(esperados, esperados)
+                              for datos, (_, esperados) in zip(resultados, generados))
+                print(f"  {backend:18s} {segundos:8.3f} s  campos {correctos}/{total_campos}  "
+                      f"informes exactos {exactos}/{cantidad}")
+
+
+def _buscar_pdfs(reports_dir):
+    """Lista ordenada de PDFs en un directorio."""
+    return sorted(glob.glob(os.path.join(reports_dir, "*.pdf")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del unificador de reportes Cynet.")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    p_extraccion = subparsers.add_parser("extraccion", help="Un worker vs. varios, por backend")
+    p_extraccion.add_argument("reports_dir", help="Directorio con PDFs ExecutiveReport_*.pdf")
+    p_extraccion.add_argument("--workers", type=int, default=None, help="Procesos (por defecto, núcleos)")
+    p_extraccion.add_argument("--backends", nargs="+", choices=unifier.BACKENDS_EXTRACCION,
+                              default=["pdftotext", unifier.BACKEND_TEXTO_RESPALDO],
+                              help="Backends a medir (por defecto: pdftotext y PyMuPDF)")
+    p_extraccion.add_argument("--repeticiones", type=int, default=5, help="Vueltas medidas por variante")
+
+    p_pdftotext = subparsers.add_parser("pdftotext", help="Archivo temporal vs. stdout de pdftotext")
+    p_pdftotext.add_argument("reports_dir", help="Directorio con PDFs ExecutiveReport_*.pdf")
+    p_pdftotext.add_argument("--paginas", type=unifier._rango_paginas, default=None,
+                             metavar="PRIMERA-ULTIMA", help="Medir también un rango de páginas")
+
+    p_analisis = subparsers.add_parser("analisis", help="Escáner de secciones vs. re.search encadenadas")
+    p_analisis.add_argument("--repeticiones", type=int, default=200)
+
+    p_arranque = subparsers.add_parser("arranque", help="Tiempo de arranque e informe -X importtime")
+    p_arranque.add_argument("--top", type=int, default=15, help="Módulos a mostrar")
+
+    p_render = subparsers.add_parser("render", help="Tiempo de render y pico de memoria por número de informes")
+    p_render.add_argument("--tamanos", type=int, nargs="+", default=[10, 100, 1000], metavar="N",
+                          help="Números de informes a renderizar (por defecto: 10 100 1000)")
+    p_render.add_argument("--fragmentos", type=int, default=None, metavar="N",
+                          help="Usar el render por fragmentos en paralelo con N fragmentos")
+
+    p_e2e = subparsers.add_parser("e2e", help="Descubrimiento, extracción y render con informes sintéticos")
+    p_e2e.add_argument("--tamanos", type=int, nargs="+", default=[10, 100, 1000, 5000], metavar="N",
+                       help="Números de informes a generar (por defecto: 10 100 1000 5000)")
+    p_e2e.add_argument("--workers", type=int, default=None, help="Procesos (por defecto, núcleos)")
+    p_e2e.add_argument("--periodos", type=int, default=1, help="Meses entre los que se reparten los informes")
+    p_e2e.add_argument("--paginas-relleno", type=int, default=0, help="Páginas extra por informe")
+    p_e2e.add_argument("--salida", default=None, metavar="ARCHIVO.json", help="Guardar los resultados en JSON")
+    p_e2e.add_argument("--comparar", default=None, metavar="ARCHIVO.json",
+                       help="Mostrar la aceleración frente a unos resultados guardados antes")
+
+    p_posiciones = subparsers.add_parser("posiciones",
+                                         help="Extractor por posiciones vs. expresiones regulares sobre el texto")
+    p_posiciones.add_argument("--cantidad", type=int, default=50, help="Informes por diseño")
+    p_posiciones.add_argument("--paginas-relleno", type=int, default=5, help="Páginas extra por informe")
+
+    p_tendencias = subparsers.add_parser("tendencias", help="Consulta del histórico y reporte de tendencias")
+    p_tendencias.add_argument("--tenants", type=int, default=300)
+    p_tendencias.add_argument("--meses", type=int, default=12)
+
+    args = parser.parse_args()
+
+    if args.comando == "analisis":
+        benchmark_analisis_texto(repeticiones=args.repeticiones)
+        return 0
+    if args.comando == "arranque":
+        benchmark_arranque(top=args.top)
+        return 0
+    if args.comando == "e2e":
+        benchmark_extremo_a_extremo(args.tamanos, args.workers, max(1, args.periodos), args.paginas_relleno,
+                                    args.salida, args.comparar)
+        return 0
+    if args.comando == "render":
+        benchmark_render(tamanos=args.tamanos, fragmentos=args.fragmentos)
+        return 0
+    if args.comando == "posiciones":
+        benchmark_posiciones(args.cantidad, args.paginas_relleno)
+        return 0
+    if args.comando == "tendencias":
+        benchmark_tendencias(args.tenants, args.meses)
+        return 0
+
+    rutas_pdf = _buscar_pdfs(args.reports_dir)
+    if not rutas_pdf:
+        print(f"No se encontraron archivos PDF en {args.reports_dir}")
+        return 1
+
+    if args.comando == "extraccion":
+        benchmark_extraccion(rutas_pdf, workers=args.workers, backends=args.backends,
+                             repeticiones=max(1, args.repeticiones))
+    elif args.comando == "pdftotext":
+        benchmark_pdftotext(rutas_pdf, paginas=args.paginas)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,62 +4,808 @@ import re
 import json
 import datetime
 import subprocess
-import tempfile
-from pathlib import Path
-import base64
 from io import BytesIO
-import glob
+import hashlib
+import fnmatch
+import posixpath
+import time
+import contextlib
+import itertools
+import sqlite3
+
+# Versión de la lógica de extracción; cambiarla invalida la caché de datos extraídos
+VERSION_EXTRACTOR = "3"
+
+# Versión del renderizado del PDF unificado; cambiarla fuerza a regenerar los reportes
+VERSION_RENDER = "1"
+
+# Manifiesto que se guarda junto a los reportes generados para omitir los que no cambiaron
+NOMBRE_MANIFIESTO = ".cynet_manifest.json"
+
+# Paquetes de exportación cuyos PDFs se leen en memoria, sin descomprimirlos a disco
+EXTENSIONES_PAQUETE = (".zip", ".tar.gz", ".tgz")
+# Tamaño descomprimido máximo de un .tar.gz: su contenido se guarda en memoria
+MAX_BYTES_PAQUETE_TAR = 512 * 1024 * 1024
+
+# Catálogo SQLite de informes (fechas, tenant, tamaño y mtime), dentro del directorio de la caché
+NOMBRE_CATALOGO = "catalogo.sqlite"
+VERSION_CATALOGO = 1
+
+# Caché persistente de datos extraídos (clave: hash del contenido del PDF + VERSION_EXTRACTOR)
+DIR_CACHE_PREDETERMINADO = os.path.join(os.path.expanduser("~"), ".cynet_unifier_cache")
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+CACHE_MAX_DIAS = 180
+
+# Dependencias externas: paquete de pip -> módulo que se importa
+DEPENDENCIAS = {"pymupdf": "fitz", "reportlab": "reportlab", "pillow": "PIL"}
+_dependencias_verificadas = False
+
+def _comando_pip():
+    """Devuelve el comando de pip a usar (lista para subprocess) o None si no hay pip."""
+    import importlib.util
+    import shutil
+
+    if importlib.util.find_spec("pip") is not None:
+        return [sys.executable, "-m", "pip"]
+    candidatos = ["pip", "pip3"] if os.name == "nt" else ["pip3", "pip"]
+    for candidato in candidatos:
+        ruta = shutil.which(candidato)
+        if ruta:
+            return [ruta]
+    return None
 
 # Función para verificar e instalar dependencias
 def verificar_instalar_dependencias():
-    """Verifica e instala las dependencias necesarias si no están presentes."""
-    dependencias = ["pymupdf", "reportlab", "pillow"]
-    
-    print("Verificando e instalando dependencias necesarias...")
-    
-    if os.name == "nt":
-        pip_commands = [f"\"{sys.executable}\" -m pip", "pip", "pip3"]
-    else:
-        pip_commands = [f"\"{sys.executable}\" -m pip", "pip3", "pip"]
-    
-    pip_exe = None
-    for cmd in pip_commands:
-        try:
-            subprocess.run(f"{cmd} --version", shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            pip_exe = cmd
-            break
-        except:
-            continue
-    
-    if not pip_exe:
+    """Verifica las dependencias sin importarlas e instala solo las que faltan.
+
+    La comprobación usa importlib.util.find_spec, de modo que no se carga
+    ningún módulo pesado ni se ejecuta pip salvo que falte alguna dependencia.
+    """
+    global _dependencias_verificadas
+    import importlib
+    import importlib.util
+
+    if _dependencias_verificadas:
+        return None
+
+    faltantes = [dep for dep, modulo in DEPENDENCIAS.items() if importlib.util.find_spec(modulo) is None]
+    if not faltantes:
+        _dependencias_verificadas = True
+        return None
+
+    print("Instalando dependencias necesarias...")
+    pip_cmd = _comando_pip()
+    if not pip_cmd:
         print("No se pudo encontrar pip. Por favor instale pip manualmente y vuelva a intentar.")
         return None
-    
-    for dep in dependencias:
+
+    for dep in faltantes:
+        print(f"Instalando {dep}...")
         try:
+            subprocess.run(pip_cmd + ["install", dep], check=True)
+            print(f"✓ {dep} instalado correctamente")
+        except (subprocess.CalledProcessError, OSError):
+            print(f"Error instalando {dep}. Intente instalarlo manualmente con: pip install {dep}")
             if dep == "pymupdf":
-                __import__("fitz")
-            elif dep == "pillow":
-                __import__("PIL")
-            else:
-                __import__(dep)
-            print(f"✓ {dep} ya está instalado")
-        except ImportError:
-            print(f"Instalando {dep}...")
-            try:
-                subprocess.run(f"{pip_exe} install {dep}", shell=True, check=True)
-                print(f"✓ {dep} instalado correctamente")
-            except subprocess.CalledProcessError:
-                print(f"Error instalando {dep}. Intente instalarlo manualmente con: pip install {dep}")
-                if dep == "pymupdf":
-                    print("Nota: pymupdf también puede ser instalado como 'pip install PyMuPDF'")
+                print("Nota: pymupdf también puede ser instalado como 'pip install PyMuPDF'")
+
+    importlib.invalidate_caches()
+    _dependencias_verificadas = all(importlib.util.find_spec(DEPENDENCIAS[dep]) is not None for dep in faltantes)
     return None
 
-def extraer_datos_pdf(ruta_pdf):
-    """Extrae datos específicos de un PDF de informe de Cynet."""
-    import fitz  # PyMuPDF
-    
-    doc = fitz.open(ruta_pdf)
+# Instrumentación (--profile): tiempos por etapa, contadores y datos por archivo.
+# Desactivada (_metricas es None), cada punto de medida se reduce a comprobar
+# esta global y devolver un contexto vacío compartido.
+_metricas = None
+_SIN_MEDICION = contextlib.nullcontext()
+
+def _nuevas_metricas():
+    return {"etapas": {}, "contadores": {}, "archivos": {}}
+
+def activar_metricas():
+    """Empieza a registrar métricas en este proceso y devuelve el registro."""
+    global _metricas
+    _metricas = _nuevas_metricas()
+    return _metricas
+
+def _sumar_etapa(metricas, nombre, segundos, llamadas=1, segundos_max=None):
+    etapa = metricas["etapas"].setdefault(nombre, {"llamadas": 0, "segundos": 0.0, "segundos_max": 0.0})
+    etapa["llamadas"] += llamadas
+    etapa["segundos"] += segundos
+    etapa["segundos_max"] = max(etapa["segundos_max"], segundos if segundos_max is None else segundos_max)
+
+@contextlib.contextmanager
+def _medicion(nombre):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _metricas is not None:
+            _sumar_etapa(_metricas, nombre, time.perf_counter() - inicio)
+
+def medir_etapa(nombre):
+    """Contexto que acumula el tiempo de la etapa nombre si las métricas están activas."""
+    if _metricas is None:
+        return _SIN_MEDICION
+    return _medicion(nombre)
+
+def contar(nombre, valor=1):
+    """Suma valor al contador nombre si las métricas están activas."""
+    if _metricas is not None:
+        _metricas["contadores"][nombre] = _metricas["contadores"].get(nombre, 0) + valor
+
+def registrar_archivo(ruta, **valores):
+    """Guarda datos de un archivo concreto (backend, páginas, bytes...) si las métricas están activas."""
+    if _metricas is not None:
+        _metricas["archivos"].setdefault(ruta, {}).update(valores)
+
+def fusionar_metricas(otras):
+    """Añade al registro activo las métricas recogidas en otro proceso."""
+    if _metricas is None or not otras:
+        return
+    for nombre, etapa in otras["etapas"].items():
+        _sumar_etapa(_metricas, nombre, etapa["segundos"], etapa["llamadas"], etapa["segundos_max"])
+    for nombre, valor in otras["contadores"].items():
+        contar(nombre, valor)
+    for ruta, valores in otras["archivos"].items():
+        registrar_archivo(ruta, **valores)
+
+def _con_metricas_propias(perfilar, funcion, *args):
+    """Ejecuta funcion con un registro de métricas propio y lo devuelve junto al resultado.
+
+    Sirve para los procesos del pool: el registro se devuelve al proceso
+    principal, que lo suma con fusionar_metricas. Si la función se ejecuta en el
+    propio proceso principal, su registro se conserva y se restaura al terminar.
+    """
+    global _metricas
+    if not perfilar:
+        return funcion(*args), None
+    anterior = _metricas
+    propias = _metricas = _nuevas_metricas()
+    try:
+        return funcion(*args), propias
+    finally:
+        _metricas = anterior
+
+def guardar_metricas(ruta, metricas=None):
+    """Escribe las métricas en JSON o, si la extensión es .csv, en formato largo."""
+    import csv
+
+    metricas = metricas if metricas is not None else _metricas
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(directorio, exist_ok=True)
+    if not ruta.lower().endswith(".csv"):
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(metricas, f, ensure_ascii=False, indent=2)
+        return ruta
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["tipo", "nombre", "clave", "valor"])
+        for nombre, etapa in sorted(metricas["etapas"].items()):
+            for clave, valor in etapa.items():
+                escritor.writerow(["etapa", nombre, clave, valor])
+        for nombre, valor in sorted(metricas["contadores"].items()):
+            escritor.writerow(["contador", nombre, "valor", valor])
+        for ruta_archivo, valores in sorted(metricas["archivos"].items()):
+            for clave, valor in valores.items():
+                escritor.writerow(["archivo", ruta_archivo, clave, valor])
+    return ruta
+
+def resumen_metricas(metricas=None, top=12):
+    """Texto con las etapas que más tiempo acumularon."""
+    metricas = metricas if metricas is not None else _metricas
+    etapas = sorted(metricas["etapas"].items(), key=lambda e: e[1]["segundos"], reverse=True)
+    lineas = [f"{'etapa':<28} {'llamadas':>9} {'total (s)':>10} {'máx (s)':>9}"]
+    for nombre, etapa in etapas[:top]:
+        lineas.append(f"{nombre:<28} {etapa['llamadas']:>9} {etapa['segundos']:>10.3f} {etapa['segundos_max']:>9.3f}")
+    return "\n".join(lineas)
+
+# Miembros ya listados de cada paquete en este proceso:
+# {ruta: (mtime_ns, tamaño, miembros, contenido por miembro o None)}
+_miembros_en_memoria = {}
+
+def es_paquete(nombre):
+    """Indica si el nombre de archivo corresponde a un paquete .zip o .tar.gz."""
+    return nombre.lower().endswith(EXTENSIONES_PAQUETE)
+
+def dividir_ruta_paquete(ruta):
+    """Separa la ruta de un informe dentro de un paquete en (ruta del paquete, miembro).
+
+    Los informes de un paquete se identifican con la ruta del paquete seguida
+    del nombre del miembro, como si el paquete fuera un directorio
+    (Exportacion.zip/ExecutiveReport_....pdf). Devuelve None si la ruta no
+    está dentro de un paquete.
+    """
+    minusculas = ruta.lower()
+    for extension in EXTENSIONES_PAQUETE:
+        posicion = minusculas.find(extension + os.sep)
+        if posicion != -1:
+            fin = posicion + len(extension)
+            if os.path.isfile(ruta[:fin]):
+                return ruta[:fin], ruta[fin + 1:].replace(os.sep, "/")
+    return None
+
+def _leer_paquete_tar(ruta_paquete):
+    """Lee un .tar.gz en una sola pasada secuencial y devuelve {miembro: contenido}.
+
+    Un .tar.gz no permite leer un miembro sin descomprimir todo lo anterior,
+    así que se lee entero una vez y se trabaja desde memoria. Los paquetes que
+    descomprimidos superan MAX_BYTES_PAQUETE_TAR se rechazan (ValueError): con
+    exportaciones tan grandes conviene un .zip, que sí permite acceso directo.
+    """
+    import tarfile
+
+    contenidos = {}
+    total = 0
+    with tarfile.open(ruta_paquete, "r:*") as paquete:
+        for info in paquete:
+            if not info.isfile():
+                continue
+            total += info.size
+            if total > MAX_BYTES_PAQUETE_TAR:
+                raise ValueError(f"supera {MAX_BYTES_PAQUETE_TAR // (1024 * 1024)} MB descomprimido; "
+                                 "descomprímalo o use un .zip")
+            contenidos[info.name] = paquete.extractfile(info).read()
+    return contenidos
+
+def _miembros_paquete(ruta_paquete, st):
+    """Lista [(miembro, tamaño)] de los archivos de un paquete; st es su os.stat.
+
+    La lista se guarda en memoria mientras el paquete no cambie. De un .tar.gz
+    se guarda también el contenido de cada miembro, leído en la misma pasada
+    (ver _leer_paquete_tar).
+    """
+    import tarfile
+    import zipfile
+
+    en_memoria = _miembros_en_memoria.get(ruta_paquete)
+    if en_memoria and en_memoria[:2] == (st.st_mtime_ns, st.st_size):
+        return en_memoria[2]
+    contenidos = None
+    try:
+        if ruta_paquete.lower().endswith(".zip"):
+            with zipfile.ZipFile(ruta_paquete) as paquete:
+                miembros = [(info.filename, info.file_size) for info in paquete.infolist() if not info.is_dir()]
+        else:
+            contenidos = _leer_paquete_tar(ruta_paquete)
+            miembros = [(nombre, len(contenido)) for nombre, contenido in contenidos.items()]
+    except (OSError, EOFError, ValueError, zipfile.BadZipFile, tarfile.TarError) as e:
+        print(f"Advertencia: no se pudo leer el paquete {ruta_paquete}: {e}")
+        miembros, contenidos = [], {}
+    # Los nombres absolutos o con ".." no forman una ruta dentro del paquete
+    miembros = [(nombre[2:] if nombre.startswith("./") else nombre, tamano) for nombre, tamano in miembros]
+    miembros = [(nombre, tamano) for nombre, tamano in miembros
+                if not nombre.startswith("/") and posixpath.normpath(nombre) == nombre]
+    if contenidos:
+        contenidos = {(nombre[2:] if nombre.startswith("./") else nombre): contenido
+                      for nombre, contenido in contenidos.items()}
+    _miembros_en_memoria[ruta_paquete] = (st.st_mtime_ns, st.st_size, miembros, contenidos)
+    return miembros
+
+def leer_miembro_paquete(ruta_paquete, miembro):
+    """Contenido de un miembro de un paquete .zip o .tar.gz, leído en memoria.
+
+    De un .tar.gz se devuelve el contenido ya leído por _miembros_paquete, que
+    solo vuelve a leer el paquete si cambió. Los errores se lanzan como
+    OSError, igual que al leer un archivo en disco.
+    """
+    import zipfile
+
+    try:
+        if ruta_paquete.lower().endswith(".zip"):
+            with zipfile.ZipFile(ruta_paquete) as paquete:
+                return paquete.read(miembro)
+        _miembros_paquete(ruta_paquete, os.stat(ruta_paquete))
+        return _miembros_en_memoria[ruta_paquete][3][miembro]
+    except KeyError:
+        raise FileNotFoundError(f"{miembro} no está en {ruta_paquete}")
+    except (EOFError, zipfile.BadZipFile) as e:
+        raise OSError(f"no se pudo leer {miembro} de {ruta_paquete}: {e}")
+
+def firma_archivo(ruta):
+    """(mtime_ns, tamaño) de un informe; dentro de un paquete, la fecha del paquete y el tamaño del miembro."""
+    paquete = dividir_ruta_paquete(ruta)
+    if paquete is None:
+        st = os.stat(ruta)
+        return st.st_mtime_ns, st.st_size
+    ruta_paquete, miembro = paquete
+    st = os.stat(ruta_paquete)
+    for nombre, tamano in _miembros_paquete(ruta_paquete, st):
+        if nombre == miembro:
+            return st.st_mtime_ns, tamano
+    raise FileNotFoundError(f"{miembro} no está en {ruta_paquete}")
+
+def abrir_pdf_informe(ruta_pdf):
+    """Abre un informe con PyMuPDF; si está dentro de un paquete, desde memoria."""
+    import fitz
+
+    paquete = dividir_ruta_paquete(ruta_pdf)
+    if paquete is None:
+        return fitz.open(ruta_pdf)
+    return fitz.open(stream=leer_miembro_paquete(*paquete), filetype="pdf")
+
+# Segundos que puede tardar pdftotext con un archivo antes de recurrir a PyMuPDF
+TIMEOUT_PDFTOTEXT = 60
+
+def _comando_pdftotext(ruta_pdf, paginas=None):
+    """Comando de pdftotext -layout que escribe el texto del PDF por stdout."""
+    comando = ["pdftotext", "-layout"]
+    if paginas:
+        comando += ["-f", str(paginas[0]), "-l", str(paginas[1])]
+    return comando + [ruta_pdf, "-"]
+
+def extraer_texto_pdftotext(ruta_pdf, paginas=None, timeout=TIMEOUT_PDFTOTEXT):
+    """Convierte un PDF a texto con pdftotext -layout leyendo la salida por stdout.
+
+    paginas es una tupla opcional (primera, última), base 1, para convertir
+    solo ese rango de páginas. Si la conversión supera timeout segundos, el
+    proceso se termina y se lanza subprocess.TimeoutExpired.
+    """
+    resultado = subprocess.run(_comando_pdftotext(ruta_pdf, paginas), check=True, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, timeout=timeout)
+    return resultado.stdout.decode("utf-8", errors="replace")
+
+def _indices_paginas(doc, paginas):
+    """Índices base 0 de las páginas a convertir según el rango (primera, última)."""
+    primera, ultima = paginas if paginas else (1, len(doc))
+    return range(max(primera, 1) - 1, min(ultima, len(doc)))
+
+# Backends de extracción de texto. Cada uno recibe la ruta del PDF, el rango de
+# páginas y una función que abre (una sola vez) el documento con PyMuPDF.
+def _texto_pdftotext(ruta_pdf, paginas, abrir_documento):
+    """Texto con pdftotext -layout (Poppler)."""
+    return extraer_texto_pdftotext(ruta_pdf, paginas)
+
+def _texto_pymupdf(ruta_pdf, paginas, abrir_documento):
+    """Texto plano de PyMuPDF, página a página."""
+    doc = abrir_documento()
+    return "".join(doc.load_page(i).get_text("text") for i in _indices_paginas(doc, paginas))
+
+def _texto_pymupdf_bloques(ruta_pdf, paginas, abrir_documento):
+    """Texto de PyMuPDF por bloques, ordenados por posición en la página."""
+    doc = abrir_documento()
+    partes = []
+    for i in _indices_paginas(doc, paginas):
+        for bloque in doc.load_page(i).get_text("blocks", sort=True):
+            if bloque[6] == 0:  # bloque de texto (1 = imagen)
+                partes.append(bloque[4])
+    return "\n".join(partes)
+
+BACKENDS_TEXTO = {
+    "pdftotext": _texto_pdftotext,
+    "pymupdf": _texto_pymupdf,
+    "pymupdf_bloques": _texto_pymupdf_bloques,
+}
+BACKEND_TEXTO_RESPALDO = "pymupdf"
+
+def extraer_palabras_pymupdf(doc, paginas=None):
+    """Palabras de cada página con su caja, tal como las devuelve get_text("words") de PyMuPDF."""
+    return [doc.load_page(i).get_text("words") for i in _indices_paginas(doc, paginas)]
+
+# Backend que no pasa por texto lineal: analizar_posiciones_informe lee las
+# secciones a partir de las palabras y su posición en la página.
+BACKEND_POSICIONES = "pymupdf_posiciones"
+BACKENDS_EXTRACCION = (*BACKENDS_TEXTO, BACKEND_POSICIONES)
+
+RUTA_CONFIG_PREDETERMINADA = os.path.join(os.path.expanduser("~"), ".cynet_unifier_config.json")
+
+def cargar_config(ruta_config=RUTA_CONFIG_PREDETERMINADA):
+    """Lee el archivo de configuración; devuelve un dict vacío si no existe."""
+    try:
+        with open(ruta_config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        return config if isinstance(config, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def guardar_config(config, ruta_config=RUTA_CONFIG_PREDETERMINADA):
+    """Escribe el archivo de configuración."""
+    with open(ruta_config, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+def seleccionar_backend_texto(backend=None, ruta_config=RUTA_CONFIG_PREDETERMINADA):
+    """Elige el backend de texto: el indicado, el calibrado o el más adecuado al sistema."""
+    import shutil
+
+    if backend:
+        return backend
+    backend = cargar_config(ruta_config).get("backend_texto")
+    if backend in BACKENDS_EXTRACCION:
+        return backend
+    # Sin calibración: pdftotext si Poppler está instalado; si no, PyMuPDF directamente
+    return "pdftotext" if shutil.which("pdftotext") else BACKEND_TEXTO_RESPALDO
+
+# Informes con los que --calibrar mide cada backend
+MUESTRA_CALIBRACION = 10
+
+def calibrar_backends(rutas_pdf, ruta_config=RUTA_CONFIG_PREDETERMINADA, muestra=MUESTRA_CALIBRACION):
+    """Mide cada backend de extracción sobre una muestra de informes y guarda el más rápido.
+
+    Solo se considera correcto un backend cuyos datos coinciden, para todos los
+    archivos de la muestra, con los del backend de referencia (pdftotext si está
+    disponible; si no, PyMuPDF). Devuelve el nombre del backend elegido o None.
+    """
+    import time
+
+    muestra_rutas = list(rutas_pdf)[:muestra]
+    resultados = {}
+    for nombre in BACKENDS_EXTRACCION:
+        inicio = time.perf_counter()
+        try:
+            datos = [extraer_datos_pdf(ruta, backend=nombre, respaldo=False) for ruta in muestra_rutas]
+        except Exception as e:
+            print(f"  {nombre:18s} no disponible ({type(e).__name__}: {e})")
+            continue
+        resultados[nombre] = (time.perf_counter() - inicio, datos)
+
+    referencia = "pdftotext" if "pdftotext" in resultados else BACKEND_TEXTO_RESPALDO
+    if referencia not in resultados:
+        print("No se pudo calibrar: ningún backend de referencia está disponible.")
+        return None
+
+    correctos = {}
+    for nombre, (segundos, datos) in resultados.items():
+        coincide = datos == resultados[referencia][1]
+        estado = "correcto" if coincide else "datos distintos a la referencia"
+        print(f"  {nombre:18s} {segundos:8.3f} s  {estado}")
+        if coincide:
+            correctos[nombre] = segundos
+
+    elegido = min(correctos, key=correctos.get)
+    config = cargar_config(ruta_config)
+    config["backend_texto"] = elegido
+    config["calibrado"] = datetime.datetime.now().isoformat(timespec="seconds")
+    guardar_config(config, ruta_config)
+    print(f"Backend seleccionado: {elegido} (guardado en {ruta_config})")
+    return elegido
+
+# Encabezados que anclan cada sección del informe. Se localizan todos en una
+# única pasada sobre una copia del texto en minúsculas ASCII (misma longitud,
+# mismas posiciones); ningún encabezado puede solaparse con otro en un texto real.
+_ANCLAS_SECCIONES = {
+    "group name": "resumen",
+    "site name": "sitio",
+    "date range": "rango_fechas",
+    "generated": "generado",
+    "malicious detections and preventions": "malicioso",
+    "automation": "automatizacion",
+    "inventory*": "inventario",
+    "alert count by severity": "severidad",
+}
+_PATRON_ANCLAS = re.compile("|".join(re.escape(ancla) for ancla in _ANCLAS_SECCIONES))
+_TABLA_MINUSCULAS_ASCII = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+# Número tal como aparece en los informes: 1234 o con separador de miles, 1,234
+_NUMERO = r"(\d{1,3}(?:,\d{3})+|\d+)"
+
+_PATRON_RESUMEN = re.compile(r"Group Name\s*(.*?)\s*Date Range\s*(.*?)\s*Generated\s*(.*?)(?:\s*\*|$)", re.DOTALL | re.IGNORECASE)
+_PATRON_SITIO = re.compile(r"Site Name\s*(.*?)\s*Date Range", re.IGNORECASE)
+_PATRON_RANGO_FECHAS = re.compile(r"Date Range\s*(.*?)\s*Generated", re.IGNORECASE)
+_PATRON_GENERADO = re.compile(r"Generated\s*(.*?)(?:\s*\*|$)", re.IGNORECASE)
+_PATRON_MALICIOSO = re.compile(r"Malicious Detections and Preventions\s*" + _NUMERO + r"\s*Critical and\s*high alerts\s*were triggered\s*" + _NUMERO + r"\s*Critical and\s*high alerts\s*were handled\s*" + _NUMERO + r"\s*Affected files\s*" + _NUMERO + r"\s*Remediated files\s*" + _NUMERO + r"\s*Affected\s*endpoints", re.DOTALL | re.IGNORECASE)
+_PATRON_AUTOMATIZACION = re.compile(r"Automation\s*" + _NUMERO + r"\s*Automatic investigations\s*" + _NUMERO + r"\s*Response actions", re.DOTALL | re.IGNORECASE)
+_PATRON_INVENTARIO = re.compile(r"Inventory\*\s*" + _NUMERO + r"\s*Active Endpoints", re.DOTALL | re.IGNORECASE)
+_PATRON_BLOQUE_SEVERIDAD = re.compile(r"Alert Count by Severity\s*Severity\s*#?\s*Alerts?\s*([\s\S]*?)(?:Top Affected Assets|Common Remediation Actions|IT Hygiene|Email Security|SaaS & Cloud|\Z)", re.IGNORECASE)
+_PATRON_LINEA_SEVERIDAD = re.compile(r"^(Critical|High|Medium|Low)\s+" + _NUMERO + r"$", re.IGNORECASE)
+_PATRONES_SEVERIDAD_AMPLIA = {
+    severidad: re.compile(re.escape(severidad) + r"\s+.*?" + _NUMERO, re.IGNORECASE)
+    for severidad in ("critical", "high", "medium", "low")
+}
+
+def _escanear_anclas(texto):
+    """Recorre el texto una vez y devuelve las posiciones de cada ancla por sección."""
+    anclas = {}
+    for m in _PATRON_ANCLAS.finditer(texto.translate(_TABLA_MINUSCULAS_ASCII)):
+        anclas.setdefault(_ANCLAS_SECCIONES[m.group()], []).append(m.start())
+    return anclas
+
+def _buscar_en_anclas(patron, texto, anclas, seccion):
+    """Equivale a patron.search(texto) probando solo en las posiciones de la sección."""
+    for pos in anclas.get(seccion, ()):
+        m = patron.match(texto, pos)
+        if m:
+            return m
+    return None
+
+def analizar_texto_informe(texto_completo_pagina, datos, nombre_informe=""):
+    """Rellena datos con las secciones encontradas en el texto de un informe."""
+    anclas = _escanear_anclas(texto_completo_pagina)
+
+    match_resumen = _buscar_en_anclas(_PATRON_RESUMEN, texto_completo_pagina, anclas, "resumen")
+    if match_resumen:
+        datos["resumen"]["nombre"] = match_resumen.group(1).strip()
+        datos["resumen"]["rango_fechas"] = match_resumen.group(2).strip()
+        datos["resumen"]["generado"] = match_resumen.group(3).strip()
+    else:
+        match_sitio = _buscar_en_anclas(_PATRON_SITIO, texto_completo_pagina, anclas, "sitio")
+        if match_sitio:
+            datos["resumen"]["nombre"] = match_sitio.group(1).strip()
+            match_rango_fechas = _buscar_en_anclas(_PATRON_RANGO_FECHAS, texto_completo_pagina, anclas, "rango_fechas")
+            match_generado = _buscar_en_anclas(_PATRON_GENERADO, texto_completo_pagina, anclas, "generado")
+            if match_rango_fechas:
+                datos["resumen"]["rango_fechas"] = match_rango_fechas.group(1).strip()
+            if match_generado and match_generado.group(1):
+                datos["resumen"]["generado"] = match_generado.group(1).strip()
+
+    match_malicioso = _buscar_en_anclas(_PATRON_MALICIOSO, texto_completo_pagina, anclas, "malicioso")
+    if match_malicioso:
+        datos["malicioso"]["alertas_activadas"] = match_malicioso.group(1).strip()
+        datos["malicioso"]["alertas_manejadas"] = match_malicioso.group(2).strip()
+        datos["malicioso"]["archivos_afectados"] = match_malicioso.group(3).strip()
+        datos["malicioso"]["archivos_remediados"] = match_malicioso.group(4).strip()
+        datos["malicioso"]["endpoints_afectados"] = match_malicioso.group(5).strip()
+
+    match_automatizacion = _buscar_en_anclas(_PATRON_AUTOMATIZACION, texto_completo_pagina, anclas, "automatizacion")
+    if match_automatizacion:
+        datos["automatizacion"]["investigaciones_auto"] = match_automatizacion.group(1).strip()
+        datos["automatizacion"]["acciones_respuesta"] = match_automatizacion.group(2).strip()
+
+    match_inventario = _buscar_en_anclas(_PATRON_INVENTARIO, texto_completo_pagina, anclas, "inventario")
+    if match_inventario:
+        datos["inventario"]["active_endpoints"] = match_inventario.group(1).strip()
+
+    # Extracción de Alert Count by Severity - Lógica V7.1 más robusta
+    alert_severity_block_match = _buscar_en_anclas(_PATRON_BLOQUE_SEVERIDAD, texto_completo_pagina, anclas, "severidad")
+    if alert_severity_block_match:
+        for line in alert_severity_block_match.group(1).split("\n"):
+            line_stripped = line.strip()
+            if not line_stripped:
+                continue
+            severity_match = _PATRON_LINEA_SEVERIDAD.match(line_stripped)
+            if severity_match:
+                severity_name = severity_match.group(1).lower()
+                if severity_name in datos["alert_severity_counts"]:
+                    datos["alert_severity_counts"][severity_name] = severity_match.group(2).strip()
+    else:
+        print(f"Advertencia: bloque 'Alert Count by Severity' no encontrado en {nombre_informe}. Intentando búsqueda más amplia.")
+        # Fallback: Buscar palabras clave de severidad seguidas de números en cualquier parte del texto
+        for severidad, patron in _PATRONES_SEVERIDAD_AMPLIA.items():
+            match_amplio = patron.search(texto_completo_pagina)
+            if match_amplio:
+                datos["alert_severity_counts"][severidad] = match_amplio.group(1).strip()
+    return datos
+
+# Extractor por posiciones. Los encabezados se buscan como secuencias de
+# palabras en minúsculas; los de sección None solo cierran la sección anterior.
+_ENCABEZADOS_POSICIONES = {
+    ("malicious", "detections", "and", "preventions"): "malicioso",
+    ("automation",): "automatizacion",
+    ("inventory*",): "inventario",
+    ("alert", "count", "by", "severity"): "severidad",
+    ("top", "affected", "assets"): None,
+    ("common", "remediation", "actions"): None,
+    ("it", "hygiene"): None,
+    ("email", "security"): None,
+    ("saas", "&", "cloud"): None,
+}
+_ETIQUETAS_RESUMEN = {
+    ("group", "name"): "nombre",
+    ("site", "name"): "sitio",
+    ("date", "range"): "rango_fechas",
+    ("generated",): "generado",
+}
+# Campo de cada cifra según el principio de su etiqueta, por sección
+_ETIQUETAS_CELDAS = {
+    "malicioso": {
+        "critical and high alerts were triggered": "alertas_activadas",
+        "critical and high alerts were handled": "alertas_manejadas",
+        "affected files": "archivos_afectados",
+        "remediated files": "archivos_remediados",
+        "affected endpoints": "endpoints_afectados",
+    },
+    "automatizacion": {
+        "automatic investigations": "investigaciones_auto",
+        "response actions": "acciones_respuesta",
+    },
+    "inventario": {
+        "active endpoints": "active_endpoints",
+    },
+}
+# Solo se analizan las páginas que contienen alguna de estas palabras
+_PRIMERAS_PALABRAS_POSICIONES = {tokens[0] for tokens, seccion in _ENCABEZADOS_POSICIONES.items() if seccion} | {
+    tokens[0] for tokens in _ETIQUETAS_RESUMEN}
+# Puntos que el contenido de una columna puede empezar a la izquierda de su encabezado
+_MARGEN_COLUMNA = 20
+# Líneas por debajo de una cifra en las que se busca su etiqueta (tarjetas)
+_LINEAS_ETIQUETA = 3
+
+def _lineas_palabras(palabras):
+    """Agrupa las palabras de una página en líneas, de arriba abajo y de izquierda a derecha.
+
+    Cada palabra es una tupla (x0, y0, x1, y1, texto, texto en minúsculas). Una
+    palabra pertenece a la línea en curso si su centro vertical cae por encima
+    del borde inferior de la primera palabra de esa línea.
+    """
+    lineas = []
+    fondo = None
+    for x0, y0, x1, y1, texto, *_ in sorted(palabras, key=lambda p: p[1] + p[3]):
+        if fondo is None or (y0 + y1) / 2 > fondo:
+            lineas.append([])
+            fondo = y1
+        lineas[-1].append((x0, y0, x1, y1, texto, texto.lower()))
+    for linea in lineas:
+        linea.sort()
+    return lineas
+
+def _buscar_secuencias(linea, secuencias):
+    """Apariciones en la línea de las secuencias de palabras: lista de (valor, índice inicial, índice final)."""
+    encontradas = []
+    i = 0
+    while i < len(linea):
+        for tokens, valor in secuencias.items():
+            if tuple(p[5] for p in linea[i:i + len(tokens)]) == tokens:
+                encontradas.append((valor, i, i + len(tokens)))
+                i += len(tokens)
+                break
+        else:
+            i += 1
+    return encontradas
+
+def _contenido_celda(lineas, n, inicio, fin, x0, x1, max_lineas=_LINEAS_ETIQUETA):
+    """Palabras de una celda: las de la línea n entre inicio y fin o, si no hay, las de debajo.
+
+    Debajo solo cuentan las palabras que empiezan entre x0 y x1 (la franja de
+    la celda) en las max_lineas líneas siguientes, hasta una línea que tenga
+    una cifra en esa franja.
+    """
+    palabras = lineas[n][inicio:fin]
+    if palabras:
+        return palabras
+    for linea in lineas[n + 1:n + 1 + max_lineas]:
+        franja = [p for p in linea if x0 <= p[0] < x1]
+        if any(_PATRON_ENTERO.fullmatch(p[4]) for p in franja):
+            break
+        palabras += franja
+    return palabras
+
+def _leer_resumen_posiciones(lineas, resumen):
+    """Añade a resumen el valor de cada etiqueta del encabezado del informe que aún no tenga.
+
+    El valor está a la derecha de la etiqueta o, si las etiquetas forman una
+    fila de cabecera, en la misma columna de la línea siguiente.
+    """
+    for n, linea in enumerate(lineas):
+        etiquetas = _buscar_secuencias(linea, _ETIQUETAS_RESUMEN)
+        for k, (campo, inicio, fin) in enumerate(etiquetas):
+            siguiente = etiquetas[k + 1][1] if k + 1 < len(etiquetas) else len(linea)
+            x1 = linea[siguiente][0] - _MARGEN_COLUMNA if siguiente < len(linea) else float("inf")
+            palabras = _contenido_celda(lineas, n, fin, siguiente, linea[inicio][0] - _MARGEN_COLUMNA, x1, max_lineas=1)
+            valor = " ".join(p[4] for p in palabras).split("*")[0].strip()
+            if valor:
+                resumen.setdefault(campo, valor)
+
+def _regiones_secciones(lineas):
+    """Produce (sección, región) por cada encabezado de sección de la página.
+
+    La región son las líneas de palabras de la columna del encabezado: desde lo
+    que le sigue en su línea hasta el siguiente encabezado que empieza en esa
+    columna. La columna va desde el encabezado hasta el siguiente encabezado de
+    la misma línea, si lo hay.
+    """
+    encabezados = [_buscar_secuencias(linea, _ENCABEZADOS_POSICIONES) for linea in lineas]
+    for n, linea in enumerate(lineas):
+        for k, (seccion, inicio, fin) in enumerate(encabezados[n]):
+            if seccion is None:
+                continue
+            x0 = linea[inicio][0] - _MARGEN_COLUMNA
+            x1 = linea[encabezados[n][k + 1][1]][0] - _MARGEN_COLUMNA if k + 1 < len(encabezados[n]) else float("inf")
+            region = [[p for p in linea[fin:] if p[0] < x1]]
+            for m in range(n + 1, len(lineas)):
+                if any(x0 <= lineas[m][i][0] < x1 for _, i, _ in encabezados[m]):
+                    break
+                region.append([p for p in lineas[m] if x0 <= p[0] < x1])
+            yield seccion, [fila for fila in region if fila]
+
+def _leer_celdas(region, etiquetas):
+    """Valores de una sección de cifras: {campo: cifra} según la etiqueta de cada cifra.
+
+    La etiqueta de una cifra son las palabras que la siguen en su línea hasta la
+    siguiente cifra; si no hay ninguna (tarjetas con la cifra encima del texto),
+    las de las líneas de debajo en su franja, a medio camino de las cifras vecinas.
+    """
+    valores = {}
+    for n, linea in enumerate(region):
+        cifras = [i for i, p in enumerate(linea) if _PATRON_ENTERO.fullmatch(p[4])]
+        for k, i in enumerate(cifras):
+            fin = cifras[k + 1] if k + 1 < len(cifras) else len(linea)
+            x0 = (linea[cifras[k - 1]][2] + linea[i][0]) / 2 if k else float("-inf")
+            x1 = (linea[i][2] + linea[fin][0]) / 2 if fin < len(linea) else float("inf")
+            etiqueta = " ".join(p[5] for p in _contenido_celda(region, n, i + 1, fin, x0, x1))
+            campo = next((c for inicio_etiqueta, c in etiquetas.items() if etiqueta.startswith(inicio_etiqueta)), None)
+            if campo:
+                valores.setdefault(campo, linea[i][4])
+    return valores
+
+def _leer_tabla_severidad(region):
+    """Valores de la tabla Alert Count by Severity: {severidad: cifra}.
+
+    Cada fila empieza por el nombre de la severidad y su cifra es la primera de
+    la línea; la tabla termina en la primera línea que no es una fila.
+    """
+    valores = {}
+    for linea in region:
+        cifra = next((p[4] for p in linea[1:] if _PATRON_ENTERO.fullmatch(p[4])), None)
+        if linea[0][5] in ("critical", "high", "medium", "low") and cifra:
+            valores.setdefault(linea[0][5], cifra)
+        elif valores:
+            break
+    return valores
+
+def analizar_posiciones_informe(palabras_paginas, datos, nombre_informe=""):
+    """Rellena datos a partir de las palabras con posición de cada página (extraer_palabras_pymupdf).
+
+    Alternativa a analizar_texto_informe que no depende del orden del texto
+    lineal: cada sección se lee en la columna de su encabezado y cada cifra se
+    asocia a la etiqueta que tiene al lado o debajo. Solo se agrupan en líneas
+    las páginas con algún encabezado, y las severidades solo se leen de su
+    tabla, sin la búsqueda amplia por todo el texto.
+    """
+    resumen = {}
+    secciones = {}
+    for palabras in palabras_paginas:
+        if not any(p[4].lower() in _PRIMERAS_PALABRAS_POSICIONES for p in palabras):
+            continue
+        lineas = _lineas_palabras(palabras)
+        _leer_resumen_posiciones(lineas, resumen)
+        for seccion, region in _regiones_secciones(lineas):
+            if seccion == "severidad":
+                valores = _leer_tabla_severidad(region)
+            else:
+                valores = _leer_celdas(region, _ETIQUETAS_CELDAS[seccion])
+            for campo, valor in valores.items():
+                secciones.setdefault(seccion, {}).setdefault(campo, valor)
+
+    # Como en analizar_texto_informe, Site Name solo se usa si no hay Group Name
+    if "nombre" in resumen or "sitio" in resumen:
+        datos["resumen"]["nombre"] = resumen.get("nombre", resumen.get("sitio"))
+    for campo in ("rango_fechas", "generado"):
+        if campo in resumen:
+            datos["resumen"][campo] = resumen[campo]
+    for seccion, valores in secciones.items():
+        destino = datos["alert_severity_counts"] if seccion == "severidad" else datos[seccion]
+        destino.update(valores)
+    if "severidad" not in secciones:
+        print(f"Advertencia: tabla 'Alert Count by Severity' no encontrada en {nombre_informe}.")
+    return datos
+
+def listar_fuentes_documento(doc):
+    """Devuelve los nombres de fuente del documento recorriendo su tabla xref una vez."""
+    fonts = set()
+    for xref in range(1, doc.xref_length()):
+        tipo = doc.xref_get_key(xref, "Type")
+        if tipo != ("name", "/Font"):
+            continue
+        tipo_valor, base_font = doc.xref_get_key(xref, "BaseFont")
+        if tipo_valor == "name" and base_font:
+            fonts.add(base_font.lstrip("/"))
+    return list(fonts)
+
+def extraer_datos_pdf(ruta_pdf, paginas=None, incluir_fuentes=False, backend="pdftotext", respaldo=True,
+                      texto=None, estado=None):
+    """Extrae datos específicos de un PDF de informe de Cynet.
+
+    backend es una clave de BACKENDS_EXTRACCION; si falla y respaldo es True se
+    usa el texto plano de PyMuPDF y, si se indica el dict estado, se anota en
+    él respaldo=True. Con BACKEND_POSICIONES no se analiza texto, sino las
+    palabras con su posición (analizar_posiciones_informe). Si se indica
+    paginas (primera, última), solo se convierte ese rango. El documento solo
+    se abre con PyMuPDF cuando el backend lo necesita o si se piden las fuentes
+    (incluir_fuentes). texto es el texto ya convertido por backend (lo usa
+    extraer_lote_pdftotext); si se indica, el backend no se ejecuta.
+    """
+    inicio = time.perf_counter()
+    documento = []
+    def abrir_documento():
+        if not documento:
+            # PyMuPDF, solo cuando el backend o las fuentes lo necesitan
+            with medir_etapa("abrir_pymupdf"):
+                documento.append(abrir_pdf_informe(ruta_pdf))
+        return documento[0]
+
+    # pdftotext solo lee archivos en disco: los informes de un paquete se leen con PyMuPDF
+    if backend == "pdftotext" and texto is None and dividir_ruta_paquete(ruta_pdf):
+        backend = BACKEND_TEXTO_RESPALDO
+
     nombre_archivo = os.path.basename(ruta_pdf)
     nombre_informe = nombre_archivo.replace("ExecutiveReport_", "").replace(".pdf", "").replace("---", " - ")
     
@@ -93,434 +839,2860 @@ def extraer_datos_pdf(ruta_pdf):
         "fonts": []
     }
     
-    texto_completo_pagina = ""
-    if len(doc) > 0:
+    try:
+        backend_usado = backend
+        palabras_paginas = None
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as tmp_txt_file:
-                subprocess.run(["pdftotext", "-layout", ruta_pdf, tmp_txt_file.name], check=True)
-                with open(tmp_txt_file.name, "r", encoding="utf-8") as f:
-                    texto_completo_pagina = f.read()
-            os.unlink(tmp_txt_file.name)
-        except Exception as e_pdftotext:
-            print(f"Advertencia: pdftotext falló ({e_pdftotext}), usando extracción de texto PyMuPDF para {nombre_informe}.")
-            # Fallback a la extracción de texto integrada de PyMuPDF si pdftotext falla
-            texto_completo_pagina = ""
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                texto_completo_pagina += page.get_text("text") # Extracción básica de texto
-
-    match_resumen = re.search(r"Group Name\s*(.*?)\s*Date Range\s*(.*?)\s*Generated\s*(.*?)(?:\s*\*|$)", texto_completo_pagina, re.DOTALL | re.IGNORECASE)
-    match_sitio = re.search(r"Site Name\s*(.*?)\s*Date Range", texto_completo_pagina, re.IGNORECASE)
-    
-    if match_resumen:
-        datos["resumen"]["nombre"] = match_resumen.group(1).strip()
-        datos["resumen"]["rango_fechas"] = match_resumen.group(2).strip()
-        datos["resumen"]["generado"] = match_resumen.group(3).strip()
-    elif match_sitio:
-        datos["resumen"]["nombre"] = match_sitio.group(1).strip()
-        match_rango_fechas = re.search(r"Date Range\s*(.*?)\s*Generated", texto_completo_pagina, re.IGNORECASE)
-        match_generado = re.search(r"Generated\s*(.*?)(?:\s*\*|$)", texto_completo_pagina, re.IGNORECASE)
-        if match_rango_fechas:
-            datos["resumen"]["rango_fechas"] = match_rango_fechas.group(1).strip()
-        if match_generado:
-            generado_text_capture = match_generado.group(1) # Access the first and only capturing group
-            if generado_text_capture:
-                datos["resumen"]["generado"] = generado_text_capture.strip() # Corrected group index
-
-    patron_malicioso = r"Malicious Detections and Preventions\s*(\d+)\s*Critical and\s*high alerts\s*were triggered\s*(\d+)\s*Critical and\s*high alerts\s*were handled\s*(\d+)\s*Affected files\s*(\d+)\s*Remediated files\s*(\d+)\s*Affected\s*endpoints"
-    match_malicioso = re.search(patron_malicioso, texto_completo_pagina, re.DOTALL | re.IGNORECASE)
-    if match_malicioso:
-        datos["malicioso"]["alertas_activadas"] = match_malicioso.group(1).strip()
-        datos["malicioso"]["alertas_manejadas"] = match_malicioso.group(2).strip()
-        datos["malicioso"]["archivos_afectados"] = match_malicioso.group(3).strip()
-        datos["malicioso"]["archivos_remediados"] = match_malicioso.group(4).strip()
-        datos["malicioso"]["endpoints_afectados"] = match_malicioso.group(5).strip()
+            if texto is not None:
+                texto_completo_pagina = texto
+            elif backend == BACKEND_POSICIONES:
+                with medir_etapa(f"texto_{backend}"):
+                    palabras_paginas = extraer_palabras_pymupdf(abrir_documento(), paginas)
+            else:
+                with medir_etapa(f"texto_{backend}"):
+                    texto_completo_pagina = BACKENDS_TEXTO[backend](ruta_pdf, paginas, abrir_documento)
+        except Exception as e_backend:
+            if not respaldo or backend == BACKEND_TEXTO_RESPALDO:
+                raise
+            print(f"Advertencia: {backend} falló ({e_backend}), usando extracción de texto PyMuPDF para {nombre_informe}.")
+            # Fallback a la extracción de texto integrada de PyMuPDF
+            backend_usado = BACKEND_TEXTO_RESPALDO
+            if estado is not None:
+                estado["respaldo"] = True
+            contar("respaldo_pymupdf")
+            with medir_etapa(f"texto_{BACKEND_TEXTO_RESPALDO}"):
+                texto_completo_pagina = BACKENDS_TEXTO[BACKEND_TEXTO_RESPALDO](ruta_pdf, paginas, abrir_documento)
+
+        if palabras_paginas is not None:
+            with medir_etapa("analisis_posiciones"):
+                analizar_posiciones_informe(palabras_paginas, datos, nombre_informe)
+            caracteres = sum(len(p[4]) for palabras in palabras_paginas for p in palabras)
+        else:
+            with medir_etapa("analisis_texto"):
+                analizar_texto_informe(texto_completo_pagina, datos, nombre_informe)
+            caracteres = len(texto_completo_pagina)
+
+        if incluir_fuentes:
+            with medir_etapa("listar_fuentes"):
+                datos["fonts"] = listar_fuentes_documento(abrir_documento())
+
+        if _metricas is not None:
+            # pdftotext termina cada página con un salto de página
+            num_paginas = len(documento[0]) if documento else texto_completo_pagina.count("\f")
+            tamano = firma_archivo(ruta_pdf)[1]
+            registrar_archivo(ruta_pdf, backend=backend_usado, paginas=num_paginas,
+                              bytes=tamano, caracteres=caracteres,
+                              segundos=time.perf_counter() - inicio, desde_cache=False)
+            contar("bytes_leidos", tamano)
+            contar("paginas", num_paginas)
+    finally:
+        if documento:
+            documento[0].close()
+    return datos
+
+def _extraer_datos_pdf_seguro(ruta_pdf, paginas=None, incluir_fuentes=False, backend="pdftotext", texto=None,
+                              respaldo_por_fallo=False):
+    """Ejecuta extraer_datos_pdf capturando el error para no abortar el lote.
+
+    Devuelve (datos, error, cacheable). Los datos obtenidos con el respaldo de
+    PyMuPDF porque el backend falló (o, con respaldo_por_fallo, porque ya falló
+    pdftotext) no son cacheables: el fallo puede ser pasajero y el respaldo es
+    menos preciso que el backend pedido, con cuya clave se guardaría.
+    """
+    estado = {}
+    try:
+        datos = extraer_datos_pdf(ruta_pdf, paginas, incluir_fuentes, backend, texto=texto, estado=estado)
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", False
+    return datos, None, not (respaldo_por_fallo or estado.get("respaldo"))
+
+def calcular_hash_archivo(ruta_archivo):
+    """Calcula el SHA-256 del contenido de un archivo (o de un informe dentro de un paquete)."""
+    paquete = dividir_ruta_paquete(ruta_archivo)
+    if paquete:
+        return hashlib.sha256(leer_miembro_paquete(*paquete)).hexdigest()
+    h = hashlib.sha256()
+    with open(ruta_archivo, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def _ruta_entrada_cache(dir_cache, hash_archivo):
+    """Devuelve la ruta del archivo de caché para un hash de contenido."""
+    return os.path.join(dir_cache, f"{hash_archivo}-v{VERSION_EXTRACTOR}.json")
+
+def leer_cache_datos(dir_cache, hash_archivo, ruta_pdf):
+    """Devuelve los datos en caché para un PDF, o None si no hay entrada válida."""
+    ruta_entrada = _ruta_entrada_cache(dir_cache, hash_archivo)
+    try:
+        with open(ruta_entrada, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    # Marcar la entrada como usada recientemente para la poda por antigüedad
+    try:
+        os.utime(ruta_entrada, None)
+    except OSError:
+        pass
+
+    # El nombre del informe depende del nombre del archivo, no de su contenido
+    nombre_archivo = os.path.basename(ruta_pdf)
+    datos["nombre_informe"] = nombre_archivo.replace("ExecutiveReport_", "").replace(".pdf", "").replace("---", " - ")
+    return datos
+
+def guardar_cache_datos(dir_cache, hash_archivo, datos):
+    """Guarda en caché los datos extraídos de un PDF (escritura atómica)."""
+    try:
+        os.makedirs(dir_cache, exist_ok=True)
+        ruta_entrada = _ruta_entrada_cache(dir_cache, hash_archivo)
+        ruta_tmp = f"{ruta_entrada}.{os.getpid()}.tmp"
+        with open(ruta_tmp, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False)
+        os.replace(ruta_tmp, ruta_entrada)
+    except OSError as e:
+        print(f"Advertencia: no se pudo escribir la caché en {dir_cache}: {e}")
+
+def podar_cache(dir_cache, max_bytes=CACHE_MAX_BYTES, max_dias=CACHE_MAX_DIAS):
+    """Elimina entradas antiguas o las menos usadas hasta respetar los límites."""
+    if not os.path.isdir(dir_cache):
+        return 0
+
+    entradas = []
+    for entrada in os.scandir(dir_cache):
+        if entrada.is_file() and entrada.name.endswith(".json"):
+            st = entrada.stat()
+            entradas.append((st.st_mtime, st.st_size, entrada.path))
+    entradas.sort()
+
+    limite_antiguedad = datetime.datetime.now().timestamp() - max_dias * 86400
+    total_bytes = sum(tam for _, tam, _ in entradas)
+    eliminadas = 0
+    for mtime, tam, ruta in entradas:
+        if mtime >= limite_antiguedad and total_bytes <= max_bytes:
+            break
+        try:
+            os.unlink(ruta)
+            total_bytes -= tam
+            eliminadas += 1
+        except OSError:
+            pass
+    return eliminadas
+
+def limpiar_cache(dir_cache):
+    """Elimina todas las entradas de la caché de datos extraídos."""
+    if not os.path.isdir(dir_cache):
+        return 0
+    eliminadas = 0
+    for entrada in os.scandir(dir_cache):
+        if entrada.is_file() and (entrada.name.endswith(".json") or entrada.name.endswith(".tmp")):
+            try:
+                os.unlink(entrada.path)
+                eliminadas += 1
+            except OSError:
+                pass
+    return eliminadas
+
+def _clave_cache(ruta_pdf, paginas, incluir_fuentes, backend):
+    """Clave de caché de un PDF: hash del contenido más las opciones que cambian los datos."""
+    with medir_etapa("hash_archivo"):
+        clave = calcular_hash_archivo(ruta_pdf)
+    if paginas:
+        clave += f"-p{paginas[0]}-{paginas[1]}"
+    if incluir_fuentes:
+        clave += "-fuentes"
+    if backend != "pdftotext":
+        clave += f"-{backend}"
+    return clave
+
+def _leer_cache_lote(dir_cache, clave, ruta_pdf):
+    """Lee los datos de un PDF de la caché y cuenta el acierto o el fallo."""
+    with medir_etapa("cache_lectura"):
+        datos = leer_cache_datos(dir_cache, clave, ruta_pdf)
+    if datos is None:
+        contar("cache_fallos")
+    else:
+        contar("cache_aciertos")
+        registrar_archivo(ruta_pdf, desde_cache=True)
+    return datos
+
+def _registrar_extraccion(dir_cache, clave, resultado, metricas):
+    """Incorpora las métricas del worker y guarda en la caché los datos extraídos si son cacheables.
+
+    resultado es el trío de _extraer_datos_pdf_seguro; devuelve el par (datos, error).
+    """
+    datos, error, cacheable = resultado
+    fusionar_metricas(metricas)
+    if error:
+        contar("errores_extraccion")
+    if dir_cache and datos is not None and cacheable:
+        with medir_etapa("cache_escritura"):
+            guardar_cache_datos(dir_cache, clave, datos)
+    return datos, error
+
+def _extractor_lote(paginas, incluir_fuentes, backend):
+    """Función que extrae un PDF en un worker y devuelve ((datos, error, cacheable), métricas del worker)."""
+    from functools import partial
+
+    return partial(_con_metricas_propias, _metricas is not None,
+                   partial(_extraer_datos_pdf_seguro, paginas=paginas, incluir_fuentes=incluir_fuentes,
+                           backend=backend))
+
+async def _convertir_pdftotext_async(ruta_pdf, paginas, timeout):
+    """Convierte un PDF con pdftotext en un subproceso asíncrono; lo termina si supera timeout."""
+    import asyncio
+
+    comando = _comando_pdftotext(ruta_pdf, paginas)
+    proceso = await asyncio.create_subprocess_exec(*comando, stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.PIPE)
+    try:
+        salida, errores = await asyncio.wait_for(proceso.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proceso.kill()
+        await proceso.wait()
+        raise subprocess.TimeoutExpired(comando, timeout)
+    if proceso.returncode:
+        raise subprocess.CalledProcessError(proceso.returncode, comando, salida, errores)
+    return salida.decode("utf-8", errors="replace")
+
+async def _extraer_lote_pdftotext_async(rutas_pdf, concurrencia, timeout, paginas, incluir_fuentes, al_terminar,
+                                        executor, en_procesos):
+    import asyncio
+    from functools import partial
+
+    semaforo = asyncio.Semaphore(concurrencia)
+    bucle = asyncio.get_running_loop()
+
+    async def extraer(i, ruta):
+        texto = None
+        fallo = False
+        # Los informes dentro de paquetes no están en disco y se leen con PyMuPDF
+        if not dividir_ruta_paquete(ruta):
+            async with semaforo:
+                try:
+                    with medir_etapa("texto_pdftotext"):
+                        texto = await _convertir_pdftotext_async(ruta, paginas, timeout)
+                except (OSError, subprocess.SubprocessError) as e:
+                    print(f"Advertencia: pdftotext falló ({e}), usando extracción de texto PyMuPDF "
+                          f"para {os.path.basename(ruta)}.")
+                    contar("respaldo_pymupdf")
+                    fallo = True
+        # El análisis (o el respaldo con PyMuPDF) se hace en el executor: mientras tanto
+        # el bucle sigue leyendo las salidas de pdftotext y vigilando sus timeouts
+        analizar = partial(_extraer_datos_pdf_seguro, ruta, paginas, incluir_fuentes,
+                           BACKEND_TEXTO_RESPALDO if fallo else "pdftotext", texto=texto,
+                           respaldo_por_fallo=fallo)
+        resultado, metricas = await bucle.run_in_executor(
+            executor, partial(_con_metricas_propias, en_procesos and _metricas is not None, analizar))
+        fusionar_metricas(metricas)
+        al_terminar(i, resultado)
+
+    await asyncio.gather(*(extraer(i, ruta) for i, ruta in enumerate(rutas_pdf)))
+
+def extraer_lote_pdftotext(rutas_pdf, concurrencia=None, timeout=TIMEOUT_PDFTOTEXT, paginas=None,
+                           incluir_fuentes=False, al_terminar=None):
+    """Extrae varios PDFs con procesos de pdftotext lanzados desde asyncio.
+
+    Como mucho concurrencia conversiones (por defecto, una por núcleo) se
+    ejecutan a la vez; el texto de cada una se analiza en cuanto termina, en un
+    pool de concurrencia procesos (o en un hilo, si concurrencia es 1), de modo
+    que el análisis se solapa con las conversiones en curso. Si pdftotext falla
+    o tarda más de timeout segundos con un archivo, ese archivo se extrae con
+    PyMuPDF, también en el pool. Devuelve un trío (datos, error, cacheable) como el
+    de _extraer_datos_pdf_seguro por ruta, en el orden de rutas_pdf, y llama a
+    al_terminar(índice, trío) según terminan.
+    """
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    rutas_pdf = list(rutas_pdf)
+    resultados = [None] * len(rutas_pdf)
+
+    def terminar(i, resultado):
+        resultados[i] = resultado
+        if al_terminar:
+            al_terminar(i, resultado)
+
+    concurrencia = max(1, concurrencia or os.cpu_count() or 1)
+    # Con un solo worker un hilo basta para no bloquear el bucle de eventos
+    en_procesos = concurrencia > 1
+    with (ProcessPoolExecutor(max_workers=concurrencia) if en_procesos
+          else ThreadPoolExecutor(max_workers=1)) as executor:
+        asyncio.run(_extraer_lote_pdftotext_async(rutas_pdf, concurrencia, timeout, paginas, incluir_fuentes,
+                                                  terminar, executor, en_procesos))
+    return resultados
+
+def extraer_datos_lote(rutas_pdf, workers=None, dir_cache=None, paginas=None, incluir_fuentes=False,
+                       backend="pdftotext", al_completar=None, timeout=TIMEOUT_PDFTOTEXT):
+    """Extrae datos de varios PDFs en paralelo con un pool de procesos.
+
+    Devuelve una lista con un par (datos, error) por cada ruta, en el mismo
+    orden que rutas_pdf. Si un archivo falla, datos es None y error describe
+    el fallo; el resto del lote se procesa igualmente. Si se indica dir_cache,
+    los PDFs ya extraídos se leen de la caché y no se vuelven a analizar.
+    paginas limita la conversión a un rango (primera, última) de páginas e
+    incluir_fuentes añade la lista de fuentes de cada PDF. backend es la clave
+    de BACKENDS_EXTRACCION con la que se extraen los datos. Si se indica al_completar,
+    se llama con (ruta, datos, error) en cuanto termina cada archivo, en orden de
+    finalización.
+
+    Con el backend pdftotext, extraer_lote_pdftotext lanza hasta workers
+    conversiones a la vez desde asyncio, con timeout segundos como máximo por
+    archivo, y analiza su texto en un pool de workers procesos.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    rutas_pdf = list(rutas_pdf)
+    resultados = [None] * len(rutas_pdf)
+    hashes = [None] * len(rutas_pdf)
+
+    pendientes = []
+    for i, ruta in enumerate(rutas_pdf):
+        if dir_cache:
+            try:
+                hashes[i] = _clave_cache(ruta, paginas, incluir_fuentes, backend)
+            except OSError as e:
+                resultados[i] = (None, f"{type(e).__name__}: {e}")
+                continue
+            datos = _leer_cache_lote(dir_cache, hashes[i], ruta)
+            if datos is not None:
+                resultados[i] = (datos, None)
+                continue
+        pendientes.append(i)
+
+    def completar(i, resultado, metricas):
+        datos, error = resultados[i] = _registrar_extraccion(dir_cache, hashes[i], resultado, metricas)
+        if al_completar:
+            al_completar(rutas_pdf[i], datos, error)
+
+    if al_completar:
+        for i, resultado in enumerate(resultados):
+            if resultado is not None:
+                al_completar(rutas_pdf[i], *resultado)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(pendientes)))
+
+    extraer = _extractor_lote(paginas, incluir_fuentes, backend)
+    if backend == "pdftotext" and pendientes:
+        extraer_lote_pdftotext([rutas_pdf[i] for i in pendientes], concurrencia=workers, timeout=timeout,
+                               paginas=paginas, incluir_fuentes=incluir_fuentes,
+                               al_terminar=lambda k, resultado: completar(pendientes[k], resultado, None))
+    # Con un solo worker el pool solo añade coste de arranque
+    elif workers == 1:
+        for i in pendientes:
+            completar(i, *extraer(rutas_pdf[i]))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futuros = {executor.submit(extraer, rutas_pdf[i]): i for i in pendientes}
+            for futuro in as_completed(futuros):
+                completar(futuros[futuro], *futuro.result())
+
+    if dir_cache and pendientes:
+        podar_cache(dir_cache)
+    return resultados
+
+def iterar_datos_lote(rutas_pdf, workers=None, dir_cache=None, paginas=None, incluir_fuentes=False,
+                      backend="pdftotext", max_pendientes=None):
+    """Versión en flujo de extraer_datos_lote: produce (ruta, datos, error) por cada ruta, en orden.
+
+    rutas_pdf puede ser un generador y se consume al ritmo del consumidor: como
+    mucho max_pendientes archivos (por defecto, 4 por worker) están en extracción
+    o extraídos sin consumir. Así la memoria no depende del número de informes y
+    la extracción en los workers se solapa con el trabajo del consumidor.
+    """
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    max_pendientes = max(1, max_pendientes or 4 * workers)
+    extraer = _extractor_lote(paginas, incluir_fuentes, backend)
+    # Con un solo worker no hay pool: cada archivo se extrae cuando se consume
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    cola = deque()
+    extraidos = 0
+
+    def iniciar(ruta):
+        clave = None
+        if dir_cache:
+            try:
+                clave = _clave_cache(ruta, paginas, incluir_fuentes, backend)
+            except OSError as e:
+                return ruta, clave, (None, f"{type(e).__name__}: {e}"), None
+            datos = _leer_cache_lote(dir_cache, clave, ruta)
+            if datos is not None:
+                return ruta, clave, (datos, None), None
+        return ruta, clave, None, executor.submit(extraer, ruta) if executor else None
+
+    def terminar(ruta, clave, resultado, futuro):
+        nonlocal extraidos
+        if resultado is None:
+            resultado, metricas = futuro.result() if futuro else extraer(ruta)
+            resultado = _registrar_extraccion(dir_cache, clave, resultado, metricas)
+            extraidos += 1
+        return (ruta, *resultado)
+
+    try:
+        for ruta in rutas_pdf:
+            cola.append(iniciar(ruta))
+            if len(cola) >= max_pendientes:
+                yield terminar(*cola.popleft())
+        while cola:
+            yield terminar(*cola.popleft())
+    finally:
+        for *_, futuro in cola:
+            if futuro:
+                futuro.cancel()
+        if executor:
+            executor.shutdown()
+    if dir_cache and extraidos:
+        podar_cache(dir_cache)
+
+# Versión del código de dibujo de los iconos; cambiarla invalida los iconos en caché
+VERSION_ICONOS = "1"
+NOMBRES_ICONOS = ("shield", "gear", "inventory", "alert_severity")
+
+# Iconos ya cargados o generados en este proceso
+_iconos_en_memoria = None
+
+def obtener_iconos(dir_cache=DIR_CACHE_PREDETERMINADO):
+    """Devuelve los iconos PNG, generándolos con PIL solo si no están en la caché en disco."""
+    global _iconos_en_memoria
+    if _iconos_en_memoria is not None:
+        return _iconos_en_memoria
+
+    dir_iconos = os.path.join(dir_cache, "iconos", f"v{VERSION_ICONOS}") if dir_cache else None
+    if dir_iconos:
+        iconos = {}
+        for nombre in NOMBRES_ICONOS:
+            try:
+                with open(os.path.join(dir_iconos, f"{nombre}.png"), "rb") as f:
+                    iconos[nombre] = f.read()
+            except OSError:
+                break
+        else:
+            _iconos_en_memoria = iconos
+            return iconos
+
+    iconos = crear_iconos_embebidos()
+    if dir_iconos:
+        try:
+            os.makedirs(dir_iconos, exist_ok=True)
+            for nombre, contenido in iconos.items():
+                ruta_tmp = os.path.join(dir_iconos, f"{nombre}.png.{os.getpid()}.tmp")
+                with open(ruta_tmp, "wb") as f:
+                    f.write(contenido)
+                os.replace(ruta_tmp, os.path.join(dir_iconos, f"{nombre}.png"))
+        except OSError as e:
+            print(f"Advertencia: no se pudieron guardar los iconos en {dir_iconos}: {e}")
+    _iconos_en_memoria = iconos
+    return iconos
+
+def crear_iconos_vectoriales(tamano=100):
+    """Crea los iconos como Drawing vectoriales de ReportLab (sin PIL).
+
+    Reproducen las figuras de crear_iconos_embebidos sobre el mismo lienzo de
+    100x100, con el eje Y invertido, escaladas a tamano puntos.
+    """
+    from reportlab.graphics.shapes import Drawing, Group, Polygon, Circle, Rect
+    from reportlab.lib import colors
+
+    def rgb(r, g, b):
+        return colors.Color(r/255, g/255, b/255)
+
+    def puntos(coordenadas):
+        return [valor for x, y in coordenadas for valor in (x, 100 - y)]
+
+    def rect(x0, y0, x1, y1, **kwargs):
+        return Rect(x0, 100 - y1, x1 - x0, y1 - y0, **kwargs)
+
+    def dibujo(*figuras):
+        grupo = Group(*figuras)
+        grupo.scale(tamano / 100, tamano / 100)
+        d = Drawing(tamano, tamano)
+        d.add(grupo)
+        return d
+
+    negro = colors.black
+    oscuro = rgb(10, 46, 54)
+    iconos = {}
+
+    # Icono de escudo (Detecciones Maliciosas)
+    iconos["shield"] = dibujo(
+        Polygon(puntos([(50, 10), (20, 25), (20, 55), (50, 90), (80, 55), (80, 25)]),
+                fillColor=colors.white, strokeColor=negro, strokeWidth=3),
+        Polygon(puntos([(50, 20), (30, 30), (30, 55), (50, 80), (70, 55), (70, 30)]),
+                fillColor=rgb(255, 20, 147), strokeColor=None),
+    )
+
+    # Icono de engranaje (Automatización)
+    dientes = [(45, 10, 55, 25), (45, 75, 55, 90), (10, 45, 25, 55), (75, 45, 90, 55),
+               (68, 22, 78, 32), (22, 22, 32, 32), (22, 68, 32, 78), (68, 68, 78, 78)]
+    iconos["gear"] = dibujo(
+        Circle(50, 50, 25, fillColor=colors.white, strokeColor=oscuro, strokeWidth=3),
+        Circle(50, 50, 15, fillColor=rgb(0, 229, 176), strokeColor=None),
+        *[rect(*diente, fillColor=oscuro, strokeColor=None) for diente in dientes]
+    )
+
+    # Icono de inventario (tres cubos)
+    cube_size = 30
+    def cubo(x, y, relleno):
+        return Polygon(puntos([(x, y + cube_size//2), (x + cube_size//2, y),
+                               (x + cube_size, y + cube_size//2), (x + cube_size//2, y + cube_size)]),
+                       fillColor=relleno, strokeColor=negro, strokeWidth=2)
+    iconos["inventory"] = dibujo(
+        cubo(35, 20, rgb(255, 127, 80)),
+        cubo(20, 50, rgb(220, 220, 220)),
+        cubo(50, 50, rgb(220, 220, 220)),
+    )
+
+    # Icono de Severidad de Alertas (gráfico de barras)
+    bar_width, bar_spacing, max_bar_height = 15, 5, 70
+    barras = []
+    for i, (proporcion, relleno) in enumerate([(0.8, rgb(255, 0, 0)), (0.6, rgb(255, 165, 0)),
+                                                (0.4, rgb(255, 255, 0)), (0.2, rgb(0, 128, 0))]):
+        x0 = 15 + i * (bar_width + bar_spacing)
+        barras.append(rect(x0, 90 - max_bar_height * proporcion, x0 + bar_width, 90,
+                           fillColor=relleno, strokeColor=negro, strokeWidth=1))
+    iconos["alert_severity"] = dibujo(*barras)
+
+    return iconos
+
+def preparar_iconos(vectoriales=False, dir_cache=DIR_CACHE_PREDETERMINADO):
+    """Iconos para el informe: vectoriales o PNG en caché; None si no se pueden crear."""
+    try:
+        with medir_etapa("iconos"):
+            if vectoriales:
+                return crear_iconos_vectoriales()
+            return obtener_iconos(dir_cache)
+    except Exception as e:
+        print(f"Advertencia: No se pudieron crear los iconos: {e}")
+        return None
+
+def crear_iconos_embebidos():
+    """Crea iconos embebidos para usar en el informe."""
+    from PIL import Image, ImageDraw
+    import io
+
+    icons_data = {}
+    icon_size = (100,100)
+    transparent_bg = (255, 255, 255, 0)
+
+    # Icono de escudo (Detecciones Maliciosas)
+    shield_img = Image.new("RGBA", icon_size, transparent_bg)
+    draw = ImageDraw.Draw(shield_img)
+    draw.polygon([(50, 10), (20, 25), (20, 55), (50, 90), (80, 55), (80, 25)], fill=(255, 255, 255), outline=(0,0,0), width=3)
+    draw.polygon([(50, 20), (30, 30), (30, 55), (50, 80), (70, 55), (70, 30)], fill=(255, 20, 147))
+    shield_buffer = io.BytesIO()
+    shield_img.save(shield_buffer, format="PNG")
+    icons_data["shield"] = shield_buffer.getvalue()
+
+    # Icono de engranaje (Automatización)
+    gear_img = Image.new("RGBA", icon_size, transparent_bg)
+    draw = ImageDraw.Draw(gear_img)
+    draw.ellipse([(25, 25), (75, 75)], fill=(255, 255, 255), outline=(10,46,54), width=3)
+    draw.ellipse([(35, 35), (65, 65)], fill=(0, 229, 176))
+    for i in range(8):
+        angle = i * 45
+        if angle % 90 == 0: 
+             draw.rectangle([(45,10),(55,25)] if angle == 0 else [(45,75),(55,90)] if angle == 180 else 
+                            [(10,45),(25,55)] if angle == 270 else [(75,45),(90,55)], fill=(10,46,54))
+        elif angle % 45 == 0: 
+            if angle == 45: draw.rectangle([(68,22),(78,32)], fill=(10,46,54))
+            if angle == 135: draw.rectangle([(22,22),(32,32)], fill=(10,46,54))
+            if angle == 225: draw.rectangle([(22,68),(32,78)], fill=(10,46,54))
+            if angle == 315: draw.rectangle([(68,68),(78,78)], fill=(10,46,54))
+    gear_buffer = io.BytesIO()
+    gear_img.save(gear_buffer, format="PNG")
+    icons_data["gear"] = gear_buffer.getvalue()
+
+    # Icono de inventario (tres cubos)
+    inventory_img = Image.new("RGBA", icon_size, transparent_bg)
+    draw = ImageDraw.Draw(inventory_img)
+    cube_size = 30
+    top_cube_x, top_cube_y = 35, 20
+    bottom_left_x, bottom_left_y = 20, 50
+    bottom_right_x, bottom_right_y = 50, 50
+    draw.polygon([(top_cube_x, top_cube_y + cube_size//2), (top_cube_x + cube_size//2, top_cube_y), 
+                  (top_cube_x + cube_size, top_cube_y + cube_size//2), (top_cube_x + cube_size//2, top_cube_y + cube_size)], 
+                 fill=(255,127,80), outline=(0,0,0), width=2)
+    draw.polygon([(bottom_left_x, bottom_left_y + cube_size//2), (bottom_left_x + cube_size//2, bottom_left_y), 
+                  (bottom_left_x + cube_size, bottom_left_y + cube_size//2), (bottom_left_x + cube_size//2, bottom_left_y + cube_size)], 
+                 fill=(220,220,220), outline=(0,0,0), width=2)
+    draw.polygon([(bottom_right_x, bottom_right_y + cube_size//2), (bottom_right_x + cube_size//2, bottom_right_y), 
+                  (bottom_right_x + cube_size, bottom_right_y + cube_size//2), (bottom_right_x + cube_size//2, bottom_right_y + cube_size)], 
+                 fill=(220,220,220), outline=(0,0,0), width=2)
+    inventory_buffer = io.BytesIO()
+    inventory_img.save(inventory_buffer, format="PNG")
+    icons_data["inventory"] = inventory_buffer.getvalue()
+
+    # Icono de Severidad de Alertas (gráfico de barras)
+    alert_severity_img = Image.new("RGBA", icon_size, transparent_bg)
+    draw = ImageDraw.Draw(alert_severity_img)
+    bar_width = 15
+    bar_spacing = 5
+    max_bar_height = 70
+    draw.rectangle([(15, 90 - max_bar_height*0.8), (15+bar_width, 90)], fill=(255,0,0), outline=(0,0,0))
+    draw.rectangle([(15+bar_width+bar_spacing, 90 - max_bar_height*0.6), (15+2*bar_width+bar_spacing, 90)], fill=(255,165,0), outline=(0,0,0))
+    draw.rectangle([(15+2*bar_width+2*bar_spacing, 90 - max_bar_height*0.4), (15+3*bar_width+2*bar_spacing, 90)], fill=(255,255,0), outline=(0,0,0))
+    draw.rectangle([(15+3*bar_width+3*bar_spacing, 90 - max_bar_height*0.2), (15+4*bar_width+3*bar_spacing, 90)], fill=(0,128,0), outline=(0,0,0))
+    alert_severity_buffer = io.BytesIO()
+    alert_severity_img.save(alert_severity_buffer, format="PNG")
+    icons_data["alert_severity"] = alert_severity_buffer.getvalue()
+
+    return icons_data
+
+# Fuentes preferidas para el informe, por orden de preferencia
+FUENTES_CYNET = {
+    "Segoe UI": {
+        "normal": "segoeui.ttf", "bold": "segoeuib.ttf",
+        "italic": "segoeuii.ttf", "bolditalic": "segoeuiz.ttf"
+    },
+    "Arial": {
+        "normal": "arial.ttf", "bold": "arialbd.ttf",
+        "italic": "ariali.ttf", "bolditalic": "arialbi.ttf"
+    },
+    "Roboto": {
+        "normal": "Roboto-Regular.ttf", "bold": "Roboto-Bold.ttf",
+        "italic": "Roboto-Italic.ttf", "bolditalic": "Roboto-BoldItalic.ttf"
+    }
+}
+
+FUENTES_PREDETERMINADAS = {
+    "normal": "Helvetica", "bold": "Helvetica-Bold",
+    "italic": "Helvetica-Oblique", "bolditalic": "Helvetica-BoldOblique"
+}
+
+# Índice persistente con las rutas de fuentes resueltas y las fechas de modificación
+RUTA_INDICE_FUENTES = os.path.join(os.path.expanduser("~"), ".cynet_unifier_fuentes.json")
+
+# Fuentes ya registradas en ReportLab en este proceso
+_fuentes_registradas = None
+
+def _directorios_fuentes():
+    """Directorios del sistema donde se buscan las fuentes."""
+    if os.name == "nt":
+        return [os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts")]
+    return [
+        "/usr/share/fonts", "/usr/local/share/fonts",
+        os.path.expanduser("~/.fonts"), os.path.expanduser("~/Library/Fonts")
+    ]
+
+def _mtime_ns(ruta):
+    """Fecha de modificación en ns, o None si la ruta no existe."""
+    try:
+        return os.stat(ruta).st_mtime_ns
+    except OSError:
+        return None
+
+def _resolver_rutas_fuentes(font_paths):
+    """Busca en disco cada variante de FUENTES_CYNET; devuelve {familia: {variante: ruta}}.
+
+    Si un archivo está en varios directorios se usa el del último, igual que
+    cuando se registraban todas las coincidencias en orden.
+    """
+    candidatos = {}
+    for font_name_key, variants in FUENTES_CYNET.items():
+        for variant_name, file_name in variants.items():
+            for font_path_dir in font_paths:
+                full_path = os.path.join(font_path_dir, file_name)
+                if os.path.exists(full_path):
+                    candidatos.setdefault(font_name_key, {})[variant_name] = full_path
+    return candidatos
+
+def cargar_indice_fuentes(ruta_indice=RUTA_INDICE_FUENTES):
+    """Devuelve las rutas de fuentes del índice, o None si falta o está desactualizado.
+
+    El índice deja de ser válido si cambia la fecha de modificación de algún
+    directorio de fuentes (se añadió o quitó un archivo) o de alguna fuente.
+    """
+    try:
+        with open(ruta_indice, "r", encoding="utf-8") as f:
+            indice = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    font_paths = _directorios_fuentes()
+    directorios = indice.get("directorios", {})
+    if sorted(directorios) != sorted(font_paths):
+        return None
+    if any(_mtime_ns(d) != mtime for d, mtime in directorios.items()):
+        return None
+    if any(_mtime_ns(ruta) != mtime for ruta, mtime in indice.get("archivos", {}).items()):
+        return None
+    return indice.get("candidatos")
+
+def guardar_indice_fuentes(candidatos, ruta_indice=RUTA_INDICE_FUENTES):
+    """Guarda las rutas de fuentes resueltas junto con las fechas de modificación."""
+    indice = {
+        "directorios": {d: _mtime_ns(d) for d in _directorios_fuentes()},
+        "archivos": {ruta: _mtime_ns(ruta) for variantes in candidatos.values() for ruta in variantes.values()},
+        "candidatos": candidatos,
+    }
+    try:
+        with open(ruta_indice, "w", encoding="utf-8") as f:
+            json.dump(indice, f, ensure_ascii=False, indent=1)
+    except OSError as e:
+        print(f"Advertencia: no se pudo guardar el índice de fuentes en {ruta_indice}: {e}")
+
+def registrar_fuentes_cynet(ruta_indice=RUTA_INDICE_FUENTES):
+    """Registra fuentes personalizadas para el informe Cynet.
+
+    Las rutas se leen de un índice persistente y solo se buscan en disco si el
+    índice no es válido. Las fuentes se registran una sola vez por proceso.
+    """
+    global _fuentes_registradas
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    if _fuentes_registradas is not None:
+        return dict(_fuentes_registradas)
+
+    with medir_etapa("buscar_fuentes"):
+        candidatos = cargar_indice_fuentes(ruta_indice)
+        if candidatos is None:
+            candidatos = _resolver_rutas_fuentes(_directorios_fuentes())
+            guardar_indice_fuentes(candidatos, ruta_indice)
+
+    inicio_registro = time.perf_counter()
+    registered_fonts = {}
+    for font_name_key, variants in FUENTES_CYNET.items():
+        for variant_name in variants:
+            full_path = candidatos.get(font_name_key, {}).get(variant_name)
+            if not full_path:
+                continue
+            font_id = f"{font_name_key}-{variant_name}"
+            try:
+                pdfmetrics.registerFont(TTFont(font_id, full_path))
+                registered_fonts[variant_name] = font_id
+            except Exception as e:
+                print(f"Error registrando fuente {font_id}: {e}")
+        if "normal" in registered_fonts and "bold" in registered_fonts:
+            break
+            
+    if not ("normal" in registered_fonts and "bold" in registered_fonts):
+        print("Usando fuentes predeterminadas de ReportLab ya que no se encontraron todas las fuentes personalizadas.")
+        registered_fonts = dict(FUENTES_PREDETERMINADAS)
+
+    if _metricas is not None:
+        _sumar_etapa(_metricas, "registrar_fuentes", time.perf_counter() - inicio_registro)
+    _fuentes_registradas = registered_fonts
+    return dict(registered_fonts)
+
+def _dibujar_pie_pagina(canvas, numero_pagina, font_name, fecha_generacion):
+    """Dibuja el pie de página del informe unificado en el canvas de ReportLab.
+
+    Con numero_pagina=None se dibuja solo el texto, sin el número de página.
+    """
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+
+    canvas.saveState()
+    canvas.setFont(font_name, 8)
+    canvas.setFillColor(colors.Color(51/255, 51/255, 51/255))
+    footer_text = f"Unified Cynet Report - Generated: {fecha_generacion}"
+    canvas.drawString(0.5*inch, 0.5*inch, footer_text)
+    if numero_pagina is not None:
+        canvas.drawRightString(landscape(letter)[0] - 0.5*inch, 0.5*inch, f"Page {numero_pagina}")
+    canvas.restoreState()
+
+def _definir_numeros_pagina(canvas, paginas, desplazamiento, font_name):
+    """Define los formularios PDF CynetPagina1..N con el número de página del pie.
+
+    Los usa el pie con numeración diferida, que dibuja el formulario en cada
+    página antes de conocer cuántas páginas irán delante del documento.
+    """
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+
+    for pagina in range(1, paginas + 1):
+        canvas.beginForm(f"CynetPagina{pagina}")
+        canvas.setFont(font_name, 8)
+        canvas.setFillColor(colors.Color(51/255, 51/255, 51/255))
+        canvas.drawRightString(landscape(letter)[0] - 0.5*inch, 0.5*inch, f"Page {desplazamiento + pagina}")
+        canvas.endForm()
+
+# Flowables que crear_informe_unificado mantiene preparados por delante de la maquetación
+RESERVA_FLOWABLES = 64
+
+def _logo_flowable(ruta_logo, color_respaldo):
+    """Logo de 1,5 pulgadas de ancho para el encabezado, o un rectángulo de color si no se puede cargar."""
+    from reportlab.platypus import Image
+    from reportlab.lib.units import inch
+    from reportlab.graphics.shapes import Drawing, Rect
+    from reportlab.lib.utils import ImageReader
+
+    try:
+        ancho_logo, alto_logo = ImageReader(ruta_logo).getSize()
+        aspect_ratio = ancho_logo / alto_logo
+        logo_width = 1.5*inch
+        return Image(ruta_logo, width=logo_width, height=logo_width / aspect_ratio)
+    except Exception as e:
+        print(f"Advertencia: No se pudo cargar el logo desde {ruta_logo}: {e}")
+        d = Drawing(1.5*inch, 0.5*inch)
+        d.add(Rect(0, 0, 1.5*inch, 0.5*inch, fillColor=color_respaldo))
+        return d
+
+def fila_resumen(datos_pdf):
+    """Fila de un informe en la tabla del resumen comparativo, con los valores tal como se extrajeron."""
+    return [
+        datos_pdf["resumen"]["nombre"],
+        datos_pdf["malicioso"]["alertas_activadas"],
+        datos_pdf["malicioso"]["alertas_manejadas"],
+        datos_pdf["malicioso"]["archivos_afectados"],
+        datos_pdf["malicioso"]["archivos_remediados"],
+        datos_pdf["malicioso"]["endpoints_afectados"],
+        datos_pdf["automatizacion"]["investigaciones_auto"],
+        datos_pdf["automatizacion"]["acciones_respuesta"],
+        datos_pdf["inventario"]["active_endpoints"]
+    ]
+
+def crear_informe_unificado(datos_todos, ruta_salida, ruta_logo, iconos=None, incluir_resumen=True,
+                            incluir_detalle=True, con_pie=True, fecha_generacion=None, resumen=None,
+                            numeracion_diferida=None):
+    """Crea un informe PDF unificado con estilo Cynet a partir de los datos extraídos.
+
+    incluir_resumen e incluir_detalle permiten generar por separado el resumen
+    comparativo y las páginas de detalle, y con_pie=False omite el pie de página;
+    los usan crear_informe_unificado_fragmentado y crear_informe_unificado_en_flujo
+    para renderizar por partes. resumen es un par (filas de fila_resumen, totales
+    de COLUMNAS_METRICAS) ya calculado, para generar el resumen sin datos_todos.
+
+    Las páginas de detalle se maquetan a medida que se generan sus flowables: la
+    plantilla repone la lista de doc.build desde el generador tras cada flowable
+    maquetado, con RESERVA_FLOWABLES por delante. Sin resumen, datos_todos puede
+    ser un iterador que se consume durante la maquetación. numeracion_diferida
+    es una función sin argumentos que se llama al terminar el contenido y
+    devuelve cuántas páginas irán delante de este documento; los números del
+    pie se completan entonces.
+    """
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+    from reportlab.lib.units import inch
+    from reportlab.graphics.shapes import Drawing, Group
+
+    inicio = time.perf_counter()
+    cynet_blue = colors.Color(0/255, 102/255, 255/255)
+    cynet_dark = colors.Color(51/255, 51/255, 51/255)
+    cynet_light = colors.Color(240/255, 240/255, 240/255)
+
+    fonts = registrar_fuentes_cynet()
+    font_name = fonts.get("normal", "Helvetica")
+    font_name_bold = fonts.get("bold", "Helvetica-Bold")
+
+    from reportlab.pdfgen.canvas import Canvas
+    from reportlab.pdfbase.pdfdoc import PDFZCompress
+
+    # Flujos binarios en lugar de ASCII85: el codificador puro Python de ReportLab
+    # era una parte notable del tiempo de escritura y el PDF resulta más pequeño.
+    # Sin compresión por página, las páginas, formularios y fuentes no fijan sus
+    # filtros y usan los del documento; rl_config.useA85 no se toca.
+    class CanvasBinario(Canvas):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **dict(kwargs, pageCompression=0))
+            self._doc.defaultStreamFilters = [PDFZCompress]
+
+    class PlantillaEnFlujo(SimpleDocTemplate):
+        def handle_flowable(self, flowables):
+            super().handle_flowable(flowables)
+            # clean_hanging también llama aquí con otras listas: solo se repone la de build
+            if flowables is not por_maquetar:
+                return
+            if len(flowables) < RESERVA_FLOWABLES:
+                flowables.extend(itertools.islice(pendientes, RESERVA_FLOWABLES - len(flowables)))
+            if not flowables:
+                # Último flowable maquetado: la última página sigue abierta
+                completar_numeros_pagina()
+
+    doc = PlantillaEnFlujo(ruta_salida, pagesize=landscape(letter),
+                          leftMargin=0.5*inch, rightMargin=0.5*inch,
+                          topMargin=0.75*inch, bottomMargin=0.75*inch)
+    estilos = getSampleStyleSheet()
+    estilo_titulo = ParagraphStyle("CynetTitle", parent=estilos["Heading1"], fontSize=22, fontName=font_name_bold, textColor=cynet_dark, alignment=0, spaceAfter=12)
+    estilo_encabezado = ParagraphStyle("CynetHeading", parent=estilos["Heading2"], fontSize=16, fontName=font_name_bold, textColor=cynet_dark, alignment=0, spaceAfter=6)
+    estilo_subencabezado = ParagraphStyle("CynetSubheading", parent=estilos["Heading3"], fontSize=14, fontName=font_name_bold, textColor=cynet_dark, spaceAfter=6)
+    estilo_normal = ParagraphStyle("CynetNormal", parent=estilos["Normal"], fontSize=10, fontName=font_name, textColor=cynet_dark)
+
+    if fecha_generacion is None:
+        fecha_generacion = datetime.datetime.now().strftime("%d-%b-%Y")
+    contenido = []
+    page_width_actual = landscape(letter)[0] - 1*inch
+    if incluir_resumen:
+        logo_img = _logo_flowable(ruta_logo, cynet_blue)
+        datos_encabezado_tabla = [[logo_img, Paragraph("Executive Summary", estilo_titulo)], ["", Paragraph(f"Unified Report - Generated: {fecha_generacion}", estilo_normal)]]
+        tabla_encabezado = Table(datos_encabezado_tabla, colWidths=[2*inch, 8*inch])
+        tabla_encabezado.setStyle(TableStyle([("VALIGN", (0,0), (-1,-1), "MIDDLE"), ("ALIGN", (0,0), (0,-1), "LEFT"), ("ALIGN", (1,0), (1,-1), "LEFT"), ("BOTTOMPADDING", (0,0), (-1,-1), 12)]))
+        contenido.append(tabla_encabezado)
+        contenido.append(Spacer(1, 0.25*inch))
+
+        datos_resumen_header = ["Report", "Critical/High Alerts", "Handled Alerts", "Affected Files", "Remediated Files", "Affected Endpoints", "Auto. Investigations", "Response Actions", "Active Endpoints"]
+        if resumen is None:
+            filas_resumen = [fila_resumen(datos_pdf) for datos_pdf in datos_todos]
+            totales = totales_metricas(RegistroInforme(datos_pdf) for datos_pdf in datos_todos)
+        else:
+            filas_resumen, totales = resumen
+        datos_resumen = [datos_resumen_header] + filas_resumen
+
+        # Las columnas numéricas del resumen son las primeras de COLUMNAS_METRICAS
+        datos_resumen.append(["TOTAL"] + [str(total) for total in totales[:len(datos_resumen_header) - 1]])
+        num_cols_summary = len(datos_resumen_header)
+        col_width_summary = page_width_actual / num_cols_summary
+        col_widths_summary = [col_width_summary] * num_cols_summary
+        col_widths_summary[0] = 2 * col_width_summary 
+        remaining_width_summary = page_width_actual - col_widths_summary[0]
+        other_col_width_summary = remaining_width_summary / (num_cols_summary -1)
+        for i in range(1, num_cols_summary):
+            col_widths_summary[i] = other_col_width_summary
+
+        tabla_resumen = Table(datos_resumen, repeatRows=1, colWidths=col_widths_summary)
+        tabla_resumen.setStyle(TableStyle([
+            ("BACKGROUND", (0,0), (-1,0), cynet_blue), ("TEXTCOLOR", (0,0), (-1,0), colors.white),
+            ("BACKGROUND", (0,-1), (-1,-1), cynet_light), ("ALIGN", (0,0), (-1,-1), "CENTER"),
+            ("FONTNAME", (0,0), (-1,0), font_name_bold), ("FONTNAME", (0,-1), (-1,-1), font_name_bold),
+            ("BOTTOMPADDING", (0,0), (-1,0), 12), ("GRID", (0,0), (-1,-1), 1, colors.black),
+            ("VALIGN", (0,0), (-1,-1), "MIDDLE"), ("FONTSIZE", (0,0), (-1,-1), 7), ("WORDWRAP", (0,0), (-1,-1), True)
+        ]))
+        contenido.append(Paragraph("Comparative Summary", estilo_encabezado))
+        contenido.append(Spacer(1, 0.1*inch))
+        contenido.append(tabla_resumen)
+        contenido.append(Spacer(1, 0.25*inch))
+
+    icon_img_width = 0.4*inch
+    icon_img_height = 0.4*inch
+    shield_icon_img, gear_icon_img, inventory_icon_img, alert_severity_icon_img = "[ICON]", "[ICON]", "[ICON]", "[ICON]"
+    def icono_flowable(icono):
+        # Los iconos pueden ser PNG (bytes) o Drawing vectoriales de ReportLab
+        if not icono:
+            return "[ICON]"
+        if isinstance(icono, bytes):
+            return Image(BytesIO(icono), width=icon_img_width, height=icon_img_height)
+        escala = icon_img_width / icono.width
+        return Drawing(icon_img_width, icon_img_height, Group(*icono.contents, transform=(escala, 0, 0, escala, 0, 0)))
+
+    if iconos:
+        try:
+            shield_icon_img = icono_flowable(iconos.get("shield"))
+            gear_icon_img = icono_flowable(iconos.get("gear"))
+            inventory_icon_img = icono_flowable(iconos.get("inventory"))
+            alert_severity_icon_img = icono_flowable(iconos.get("alert_severity"))
+        except Exception as e:
+            print(f"Advertencia: No se pudieron cargar uno o más iconos desde los datos: {e}")
+
+    # Estilos compartidos por todas las secciones de detalle: con cientos de
+    # informes, reconstruir la misma lista de TableStyle por tabla dominaba el tiempo
+    # de maquetación de platypus.
+    estilo_tabla_titulo_informe = TableStyle([("BACKGROUND",(0,0),(-1,-1),cynet_light),("VALIGN",(0,0),(-1,-1),"MIDDLE"),("ALIGN",(0,0),(-1,-1),"LEFT"),("LEFTPADDING",(0,0),(-1,-1),10),("RIGHTPADDING",(0,0),(-1,-1),10),("TOPPADDING",(0,0),(-1,-1),5),("BOTTOMPADDING",(0,0),(-1,-1),5)])
+    estilo_tabla_titulo_seccion = TableStyle([("VALIGN",(0,0),(-1,-1),"MIDDLE"), ("ALIGN",(0,0),(0,-1),"CENTER"), ("ALIGN",(1,0),(1,-1),"LEFT"), ("LEFTPADDING",(0,0),(-1,-1),5), ("LINEABOVE",(0,0),(-1,0),2,cynet_blue)])
+    estilo_tabla_metricas = TableStyle([("BACKGROUND",(0,0),(-1,0),cynet_blue),("TEXTCOLOR",(0,0),(-1,0),colors.white),("ALIGN",(0,0),(-1,-1),"LEFT"),("ALIGN",(1,0),(1,-1),"CENTER"),("FONTNAME",(0,0),(-1,0),font_name_bold),("BOTTOMPADDING",(0,0),(-1,0),12),("GRID",(0,0),(-1,-1),1,colors.black),("VALIGN",(0,0),(-1,-1),"MIDDLE")])
+    anchos_titulo_seccion = [0.5*inch, page_width_actual-0.5*inch]
+    anchos_metricas = [4*inch, 1*inch]
+
+    def seccion_detalle(icono, titulo, filas, espacio_final):
+        tabla_titulo = Table([[icono, Paragraph(titulo, estilo_subencabezado)]], colWidths=anchos_titulo_seccion, style=estilo_tabla_titulo_seccion)
+        return [tabla_titulo, Spacer(1, 0.1*inch),
+                Table(filas, colWidths=anchos_metricas, style=estilo_tabla_metricas), Spacer(1, espacio_final)]
+
+    # Los flowables de cada informe se crean cuando platypus llega a él, no todos de antemano
+    def detalle():
+        for datos_pdf in (datos_todos if incluir_detalle else []):
+            contar("informes_renderizados")
+            nombre_informe_detalle = datos_pdf["resumen"]["nombre"]
+            rango_fechas_detalle = datos_pdf["resumen"]["rango_fechas"]
+            generado_detalle = datos_pdf["resumen"]["generado"]
+            malicioso = datos_pdf["malicioso"]
+            severidad = datos_pdf["alert_severity_counts"]
+            automatizacion = datos_pdf["automatizacion"]
+
+            tabla_titulo_informe_detalle = Table([[Paragraph(f"Report: {nombre_informe_detalle}", estilo_encabezado)]], colWidths=[page_width_actual], style=estilo_tabla_titulo_informe)
+            yield tabla_titulo_informe_detalle
+            yield Spacer(1, 0.1*inch)
+            yield Paragraph(f"Date Range: {rango_fechas_detalle}", estilo_normal)
+            yield Paragraph(f"Generated: {generado_detalle}", estilo_normal)
+            yield Spacer(1, 0.1*inch)
+
+            yield from seccion_detalle(shield_icon_img, "Malicious Detections and Preventions", [
+                ["Metric", "Value"],
+                ["Critical/high alerts triggered", malicioso["alertas_activadas"]],
+                ["Critical/high alerts handled", malicioso["alertas_manejadas"]],
+                ["Affected files", malicioso["archivos_afectados"]],
+                ["Remediated files", malicioso["archivos_remediados"]],
+                ["Affected endpoints", malicioso["endpoints_afectados"]]
+            ], 0.2*inch)
+            yield from seccion_detalle(alert_severity_icon_img, "Alert Count by Severity", [
+                ["Severity", "Count"],
+                ["Critical", severidad["critical"]],
+                ["High", severidad["high"]],
+                ["Medium", severidad["medium"]],
+                ["Low", severidad["low"]]
+            ], 0.2*inch)
+            yield from seccion_detalle(gear_icon_img, "Automation", [
+                ["Metric", "Value"],
+                ["Automatic investigations", automatizacion["investigaciones_auto"]],
+                ["Response actions", automatizacion["acciones_respuesta"]]
+            ], 0.2*inch)
+            yield from seccion_detalle(inventory_icon_img, "Inventory", [
+                ["Metric", "Value"],
+                ["Active Endpoints", datos_pdf["inventario"]["active_endpoints"]]
+            ], 0.35*inch)
+
+    def pie_pagina(canvas, doc_obj):
+        if not con_pie:
+            return
+        if numeracion_diferida is None:
+            _dibujar_pie_pagina(canvas, doc_obj.page, font_name, fecha_generacion)
+        else:
+            _dibujar_pie_pagina(canvas, None, font_name, fecha_generacion)
+            canvas.doForm(f"CynetPagina{doc_obj.page}")
+
+    def completar_numeros_pagina():
+        if con_pie and numeracion_diferida is not None:
+            _definir_numeros_pagina(doc.canv, doc.page, numeracion_diferida(), font_name)
+
+    pendientes = itertools.chain(contenido, detalle())
+    if _metricas is not None:
+        # Incluye registrar_fuentes la primera vez que se llama en el proceso
+        _sumar_etapa(_metricas, "render_contenido", time.perf_counter() - inicio)
+    with medir_etapa("render_build"):
+        por_maquetar = list(itertools.islice(pendientes, RESERVA_FLOWABLES))
+        doc.build(por_maquetar, onFirstPage=pie_pagina, onLaterPages=pie_pagina, canvasmaker=CanvasBinario)
+    contar("paginas_generadas", doc.page)
+    return ruta_salida
+
+def _renderizar_fragmento(tarea):
+    """Renderiza en memoria una parte del informe unificado, sin pie de página."""
+    datos_todos, ruta_logo, iconos, incluir_resumen, fecha_generacion = tarea
+    salida = BytesIO()
+    crear_informe_unificado(datos_todos, salida, ruta_logo, iconos, incluir_resumen=incluir_resumen,
+                            incluir_detalle=not incluir_resumen, con_pie=False,
+                            fecha_generacion=fecha_generacion)
+    return salida.getvalue()
+
+def _estampar_pies_pagina(documento, font_name, fecha_generacion, pagina_inicial=1):
+    """Dibuja con PyMuPDF el pie de _dibujar_pie_pagina en cada página del documento.
+
+    Usa la misma fuente (el TTF registrado o la Helvetica estándar), el mismo
+    tamaño, color y posiciones que el pie que dibuja ReportLab. El TTF se
+    incrusta completo: hay que llamar una sola vez por documento y reducirlo
+    después con documento.subset_fonts().
+    """
+    from reportlab.lib.units import inch
+    from reportlab.pdfbase import pdfmetrics
+
+    archivo_fuente = getattr(getattr(pdfmetrics.getFont(font_name), "face", None), "filename", None)
+    if archivo_fuente:
+        opciones_fuente = {"fontname": "CynetPie", "fontfile": archivo_fuente}
+    else:
+        opciones_fuente = {"fontname": "helv"}
+    gris = (51/255, 51/255, 51/255)
+    texto_pie = f"Unified Cynet Report - Generated: {fecha_generacion}"
+    for pagina in documento:
+        # PyMuPDF mide y desde arriba; ReportLab, desde abajo
+        y = pagina.rect.height - 0.5*inch
+        texto_numero = f"Page {pagina_inicial + pagina.number}"
+        x_numero = pagina.rect.width - 0.5*inch - pdfmetrics.stringWidth(texto_numero, font_name, 8)
+        pagina.insert_text((0.5*inch, y), texto_pie, fontsize=8, color=gris, **opciones_fuente)
+        pagina.insert_text((x_numero, y), texto_numero, fontsize=8, color=gris, **opciones_fuente)
+
+def crear_informe_unificado_fragmentado(datos_todos, ruta_salida, ruta_logo, iconos=None, fragmentos=None,
+                                        workers=None):
+    """Crea el informe unificado renderizando el detalle por fragmentos en paralelo.
+
+    El resumen comparativo y cada fragmento del detalle se generan en procesos
+    separados sin pie de página. Las partes se unen con PyMuPDF y los pies, con
+    la numeración continua, se añaden después sobre el documento unido: así la
+    fuente del pie se incrusta una sola vez y no una por fragmento. A diferencia
+    de crear_informe_unificado, el detalle empieza en una página nueva y cada
+    fragmento también.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+    import fitz
+
+    workers = workers or os.cpu_count() or 1
+    fragmentos = max(1, min(fragmentos or workers, len(datos_todos)))
+    tamano = -(-len(datos_todos) // fragmentos)
+    fecha_generacion = datetime.datetime.now().strftime("%d-%b-%Y")
+    tareas = [(datos_todos, ruta_logo, iconos, True, fecha_generacion)]
+    tareas += [(datos_todos[i:i + tamano], ruta_logo, iconos, False, fecha_generacion)
+               for i in range(0, len(datos_todos), tamano)]
+
+    perfilar = _metricas is not None
+    with ProcessPoolExecutor(max_workers=min(workers, len(tareas))) as executor:
+        partes = []
+        for parte, metricas in executor.map(partial(_con_metricas_propias, perfilar, _renderizar_fragmento), tareas):
+            partes.append(parte)
+            fusionar_metricas(metricas)
+
+    font_name = registrar_fuentes_cynet().get("normal", "Helvetica")
+    documento = fitz.open()
+    try:
+        with medir_etapa("unir_fragmentos"):
+            for parte in partes:
+                with fitz.open("pdf", parte) as doc_parte:
+                    documento.insert_pdf(doc_parte)
+        with medir_etapa("estampar_pies"):
+            _estampar_pies_pagina(documento, font_name, fecha_generacion)
+            documento.subset_fonts()
+        with medir_etapa("guardar_fragmentos"):
+            # garbage=3 también fusiona los objetos repetidos en varias partes (logo, iconos)
+            documento.save(ruta_salida, garbage=3, deflate=True)
+    finally:
+        documento.close()
+    return ruta_salida
+
+def crear_informe_unificado_en_flujo(datos_iter, ruta_salida, ruta_logo, iconos=None):
+    """Crea el informe unificado consumiendo los datos a medida que llegan, con memoria acotada.
+
+    El detalle se maqueta en un único documento temporal según llegan los datos
+    y de cada informe solo se conserva su fila del resumen; los totales se
+    acumulan. Al agotarse los datos se renderiza el resumen comparativo, que
+    necesita la fila TOTAL, y con su número de páginas se completan los números
+    del pie del detalle; después se coloca el resumen delante con PyMuPDF. Como
+    en el render por fragmentos, el detalle empieza en una página nueva.
+
+    Devuelve (ruta_salida, número de informes, huella de los datos como la de
+    _digest_datos). Si datos_iter no produce ningún informe no se escribe nada
+    y la ruta es None.
+    """
+    import tempfile
+    import fitz
+
+    datos_iter = iter(datos_iter)
+    primero = next(datos_iter, None)
+    if primero is None:
+        return None, 0, None
+
+    fecha_generacion = datetime.datetime.now().strftime("%d-%b-%Y")
+    filas = []
+    totales = [0] * len(COLUMNAS_METRICAS)
+    # Misma huella que _digest_datos sobre la lista completa, calculada por partes
+    huella = hashlib.sha256(b"[")
+    resumen = BytesIO()
+
+    def acumular():
+        for datos_pdf in itertools.chain([primero], datos_iter):
+            if filas:
+                huella.update(b", ")
+            huella.update(json.dumps(datos_pdf, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+            filas.append(fila_resumen(datos_pdf))
+            for i, valor in enumerate(RegistroInforme(datos_pdf).metricas):
+                totales[i] += valor
+            yield datos_pdf
+
+    def renderizar_resumen():
+        crear_informe_unificado([], resumen, ruta_logo, iconos, incluir_detalle=False,
+                                fecha_generacion=fecha_generacion, resumen=(filas, totales))
+        with fitz.open("pdf", resumen.getvalue()) as documento:
+            return documento.page_count
+
+    with tempfile.TemporaryDirectory(prefix="cynet_flujo_") as dir_tmp:
+        ruta_detalle = os.path.join(dir_tmp, "detalle.pdf")
+        crear_informe_unificado(acumular(), ruta_detalle, ruta_logo, iconos, incluir_resumen=False,
+                                fecha_generacion=fecha_generacion, numeracion_diferida=renderizar_resumen)
+        huella.update(b"]")
+        # Se inserta el resumen, que es corto, delante del detalle y no al revés
+        with medir_etapa("unir_fragmentos"), fitz.open(ruta_detalle) as documento:
+            with fitz.open("pdf", resumen.getvalue()) as doc_resumen:
+                documento.insert_pdf(doc_resumen, start_at=0)
+            documento.save(ruta_salida, garbage=1)
+    return ruta_salida, len(filas), huella.hexdigest()
+
+def crear_informe_tendencias(series, meses, ruta_salida, ruta_logo, fecha_generacion=None):
+    """Crea el reporte de tendencias mensuales a partir de las series del histórico.
+
+    series es el resultado de consultar_historico y meses la lista de meses
+    AAAA-MM del eje horizontal. Incluye un gráfico con el total de todos los
+    tenants y, para cada tenant, un gráfico de líneas y la tabla de valores.
+    """
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, KeepTogether
+    from reportlab.lib.units import inch
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.graphics.charts.linecharts import HorizontalLineChart
+    from reportlab.graphics.charts.legends import Legend
+
+    cynet_blue = colors.Color(0/255, 102/255, 255/255)
+    cynet_dark = colors.Color(51/255, 51/255, 51/255)
+    cynet_light = colors.Color(240/255, 240/255, 240/255)
+    colores_series = [cynet_blue, colors.Color(230/255, 80/255, 40/255), cynet_dark]
+
+    fonts = registrar_fuentes_cynet()
+    font_name = fonts.get("normal", "Helvetica")
+    font_name_bold = fonts.get("bold", "Helvetica-Bold")
+
+    doc = SimpleDocTemplate(ruta_salida, pagesize=landscape(letter),
+                            leftMargin=0.5*inch, rightMargin=0.5*inch,
+                            topMargin=0.75*inch, bottomMargin=0.75*inch)
+    estilos = getSampleStyleSheet()
+    estilo_titulo = ParagraphStyle("CynetTitle", parent=estilos["Heading1"], fontSize=22, fontName=font_name_bold, textColor=cynet_dark, alignment=0, spaceAfter=12)
+    estilo_encabezado = ParagraphStyle("CynetHeading", parent=estilos["Heading2"], fontSize=16, fontName=font_name_bold, textColor=cynet_dark, alignment=0, spaceAfter=6)
+    estilo_normal = ParagraphStyle("CynetNormal", parent=estilos["Normal"], fontSize=10, fontName=font_name, textColor=cynet_dark)
+
+    if fecha_generacion is None:
+        fecha_generacion = datetime.datetime.now().strftime("%d-%b-%Y")
+    page_width_actual = landscape(letter)[0] - 1*inch
+    etiquetas_meses = [datetime.date(int(mes[:4]), int(mes[5:]), 1).strftime("%b %Y") for mes in meses]
+
+    anchos_tabla = [1.6*inch] + [(page_width_actual - 1.6*inch) / len(meses)] * len(meses)
+    estilo_tabla = TableStyle([("BACKGROUND", (0,0), (-1,0), cynet_blue), ("TEXTCOLOR", (0,0), (-1,0), colors.white),
+                               ("FONTNAME", (0,0), (-1,0), font_name_bold), ("FONTNAME", (0,1), (0,-1), font_name_bold),
+                               ("FONTNAME", (1,1), (-1,-1), font_name), ("FONTSIZE", (0,0), (-1,-1), 7),
+                               ("ALIGN", (1,0), (-1,-1), "CENTER"), ("BACKGROUND", (0,1), (0,-1), cynet_light),
+                               ("GRID", (0,0), (-1,-1), 0.5, colors.black), ("VALIGN", (0,0), (-1,-1), "MIDDLE")])
+
+    def grafico(valores_por_mes, alto):
+        # Una línea por métrica; los meses sin informe quedan como huecos (None)
+        datos = [[valores_por_mes.get(mes, (None,) * len(METRICAS_TENDENCIA))[i] for mes in meses]
+                 for i in range(len(METRICAS_TENDENCIA))]
+        d = Drawing(page_width_actual, alto)
+        lc = HorizontalLineChart()
+        lc.x, lc.y = 40, 20
+        lc.width, lc.height = page_width_actual - 200, alto - 30
+        lc.data = datos
+        lc.joinedLines = 1
+        lc.categoryAxis.categoryNames = etiquetas_meses
+        lc.categoryAxis.labels.fontName = font_name
+        lc.categoryAxis.labels.fontSize = 7
+        lc.valueAxis.labels.fontName = font_name
+        lc.valueAxis.labels.fontSize = 7
+        lc.valueAxis.valueMin = 0
+        for i, color in enumerate(colores_series):
+            lc.lines[i].strokeColor = color
+            lc.lines[i].strokeWidth = 1.5
+        d.add(lc)
+        leyenda = Legend()
+        leyenda.x, leyenda.y = page_width_actual - 145, alto - 15
+        leyenda.fontName = font_name
+        leyenda.fontSize = 8
+        leyenda.alignment = "right"
+        leyenda.colorNamePairs = [(color, etiqueta) for color, (_, etiqueta) in zip(colores_series, METRICAS_TENDENCIA)]
+        d.add(leyenda)
+        return d
+
+    def tabla(valores_por_mes):
+        filas = [["Metric"] + etiquetas_meses]
+        for i, (_, etiqueta) in enumerate(METRICAS_TENDENCIA):
+            fila = [etiqueta]
+            for mes in meses:
+                valor = valores_por_mes.get(mes, (None,) * len(METRICAS_TENDENCIA))[i]
+                fila.append("-" if valor is None else str(valor))
+            filas.append(fila)
+        return Table(filas, colWidths=anchos_tabla, style=estilo_tabla)
+
+    # Total de todos los tenants por mes (los valores no válidos no suman)
+    totales = {}
+    for _, por_mes in series.values():
+        for mes, valores in por_mes.items():
+            acumulado = totales.setdefault(mes, [0] * len(METRICAS_TENDENCIA))
+            for i, valor in enumerate(valores):
+                acumulado[i] += valor or 0
+
+    logo_img = _logo_flowable(ruta_logo, cynet_blue)
+    tabla_encabezado = Table([[logo_img, Paragraph("Monthly Trends", estilo_titulo)],
+                              ["", Paragraph(f"{etiquetas_meses[0]} - {etiquetas_meses[-1]} - {len(series)} tenants - "
+                                             f"Generated: {fecha_generacion}", estilo_normal)]],
+                             colWidths=[2*inch, 8*inch])
+    tabla_encabezado.setStyle(TableStyle([("VALIGN", (0,0), (-1,-1), "MIDDLE"), ("ALIGN", (0,0), (-1,-1), "LEFT"), ("BOTTOMPADDING", (0,0), (-1,-1), 12)]))
+    contenido = [tabla_encabezado, Spacer(1, 0.25*inch),
+                 Paragraph("All Tenants", estilo_encabezado), grafico(totales, 3.2*inch), Spacer(1, 0.1*inch),
+                 tabla({mes: tuple(valores) for mes, valores in totales.items()}), Spacer(1, 0.3*inch)]
+    for tenant, (nombre, por_mes) in series.items():
+        contenido.append(KeepTogether([Paragraph(nombre or tenant, estilo_encabezado), grafico(por_mes, 1.7*inch),
+                                       Spacer(1, 0.1*inch), tabla(por_mes), Spacer(1, 0.2*inch)]))
+
+    def agregar_pie_pagina(canvas, doc):
+        _dibujar_pie_pagina(canvas, doc.page, font_name, fecha_generacion)
+
+    with medir_etapa("render_tendencias"):
+        doc.build(contenido, onFirstPage=agregar_pie_pagina, onLaterPages=agregar_pie_pagina)
+    return ruta_salida
+
+# Diccionario para traducir nombres de meses
+MESES_COMPLETOS = {
+    "Jan": "Enero", "Feb": "Febrero", "Mar": "Marzo", "Apr": "Abril",
+    "May": "Mayo", "Jun": "Junio", "Jul": "Julio", "Aug": "Agosto",
+    "Sep": "Septiembre", "Oct": "Octubre", "Nov": "Noviembre", "Dec": "Diciembre"
+}
+
+# Patrón para extraer fechas del nombre del archivo
+# Ejemplo: ExecutiveReport_Demo-Console---AIO---SignUp---SaaS_8-Mar-2025---8-Apr-2025.pdf
+PATRON_FECHA_ARCHIVO = re.compile(r"(\d+-[A-Za-z]+-\d+)---(\d+-[A-Za-z]+-\d+)")
+
+def directorio_reportes_predeterminado():
+    """Ruta predeterminada de los informes según el sistema operativo."""
+    if os.name == "nt":  # Windows
+        return r"C:\Cynet_Reports"
+    return os.path.join(os.path.expanduser("~"), "Cynet_Reports")  # Linux/Mac
+
+def analizar_nombre_informe(archivo):
+    """Obtiene el período de un informe a partir de su nombre de archivo.
+
+    Devuelve un dict con archivo, periodo, fecha_inicio, fecha_fin, tenant y
+    nombre_archivo, o None si el nombre no tiene el formato esperado.
+    """
+    nombre_archivo = os.path.basename(archivo)
+    match = PATRON_FECHA_ARCHIVO.search(nombre_archivo)
+    if not match:
+        return None
+
+    fecha_inicio = match.group(1)  # 8-Mar-2025
+    fecha_fin = match.group(2)     # 8-Apr-2025
+
+    # Extraer componentes de las fechas
+    try:
+        dia_inicio, mes_inicio_abr, año_inicio = fecha_inicio.split("-")
+        dia_fin, mes_fin_abr, año_fin = fecha_fin.split("-")
+    except ValueError:
+        # Si hay un error al procesar las fechas, omitir este archivo
+        return None
+
+    # Convertir a nombres completos de meses en español
+    mes_inicio = MESES_COMPLETOS.get(mes_inicio_abr, mes_inicio_abr)
+    mes_fin = MESES_COMPLETOS.get(mes_fin_abr, mes_fin_abr)
+
+    # Crear descripción del período
+    if mes_inicio == mes_fin and año_inicio == año_fin:
+        periodo = f"{mes_inicio} {año_inicio}"
+    elif año_inicio == año_fin:
+        periodo = f"{mes_inicio} a {mes_fin} {año_inicio}"
+    else:
+        periodo = f"{mes_inicio} {año_inicio} a {mes_fin} {año_fin}"
+
+    return {
+        "archivo": archivo,
+        "periodo": periodo,
+        "fecha_inicio": fecha_inicio,
+        "fecha_fin": fecha_fin,
+        "tenant": nombre_archivo[:match.start()].replace("ExecutiveReport_", "", 1).rstrip("_"),
+        "nombre_archivo": nombre_archivo
+    }
+
+def agrupar_informes_por_periodo(pdf_files):
+    """Agrupa los informes con nombre válido por período, conservando el orden."""
+    informes_por_periodo = {}
+    for archivo in pdf_files:
+        informe = analizar_nombre_informe(archivo)
+        if informe:
+            informes_por_periodo.setdefault(informe["periodo"], []).append(informe)
+    return informes_por_periodo
+
+_NUMERO_MES = {abreviatura: numero for numero, abreviatura in enumerate(MESES_COMPLETOS, 1)}
+
+def fecha_iso_informe(fecha):
+    """Convierte una fecha del nombre de archivo (8-Mar-2025) a ISO (2025-03-08), o None."""
+    try:
+        dia, mes, año = fecha.split("-")
+        return datetime.date(int(año), _NUMERO_MES[mes.title()], int(dia)).isoformat()
+    except (ValueError, KeyError):
+        return None
+
+def abrir_catalogo(ruta_catalogo):
+    """Abre el catálogo SQLite de informes, creándolo si no existe o si cambió su versión."""
+    directorio = os.path.dirname(ruta_catalogo)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    conexion = sqlite3.connect(ruta_catalogo)
+    if conexion.execute("PRAGMA user_version").fetchone()[0] != VERSION_CATALOGO:
+        conexion.executescript(f"""
+            DROP TABLE IF EXISTS informes;
+            CREATE TABLE informes (
+                ruta TEXT PRIMARY KEY,
+                directorio TEXT NOT NULL,
+                nombre_archivo TEXT NOT NULL,
+                tenant TEXT NOT NULL,
+                periodo TEXT NOT NULL,
+                fecha_inicio TEXT NOT NULL,
+                fecha_fin TEXT NOT NULL,
+                inicio TEXT,
+                fin TEXT,
+                tamano INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            );
+            CREATE INDEX informes_fechas ON informes (directorio, inicio, fin);
+            PRAGMA user_version = {VERSION_CATALOGO};
+        """)
+    # El histórico de métricas no depende de la versión del catálogo: no se borra al reconstruirlo
+    columnas = "".join(f"{columna} INTEGER, " for columna, _, _ in COLUMNAS_METRICAS)
+    conexion.executescript(f"""
+        CREATE TABLE IF NOT EXISTS metricas (
+            tenant TEXT NOT NULL,
+            inicio TEXT NOT NULL,
+            fin TEXT NOT NULL,
+            nombre TEXT NOT NULL,
+            estado TEXT NOT NULL,
+            ruta TEXT NOT NULL,
+            {columnas}
+            PRIMARY KEY (tenant, inicio, fin)
+        );
+        CREATE INDEX IF NOT EXISTS metricas_inicio ON metricas (inicio);
+    """)
+    return conexion
+
+def actualizar_catalogo(conexion, reports_dir, **opciones):
+    """Sincroniza el catálogo con el contenido actual de reports_dir.
+
+    Solo se analiza el nombre de los archivos nuevos o cuyo tamaño o fecha de
+    modificación cambiaron; las filas de archivos que ya no existen se borran.
+    opciones son las de _escanear_informes (recursivo, incluir, excluir).
+    Devuelve (filas insertadas o actualizadas, filas eliminadas).
+    """
+    directorio = os.path.realpath(reports_dir)
+    estado = _escanear_informes(directorio, **opciones)
+    conocidos = {ruta: (mtime_ns, tamano) for ruta, mtime_ns, tamano in conexion.execute(
+        "SELECT ruta, mtime_ns, tamano FROM informes WHERE directorio = ?", (directorio,))}
+
+    filas = []
+    for ruta, (mtime_ns, tamano) in estado.items():
+        if conocidos.get(ruta) == (mtime_ns, tamano):
+            continue
+        informe = analizar_nombre_informe(ruta)
+        if informe:
+            filas.append((ruta, directorio, informe["nombre_archivo"], informe["tenant"], informe["periodo"],
+                          informe["fecha_inicio"], informe["fecha_fin"],
+                          fecha_iso_informe(informe["fecha_inicio"]), fecha_iso_informe(informe["fecha_fin"]),
+                          tamano, mtime_ns))
+    eliminadas = [(ruta,) for ruta in conocidos if ruta not in estado]
+    with conexion:
+        conexion.executemany("INSERT OR REPLACE INTO informes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", filas)
+        conexion.executemany("DELETE FROM informes WHERE ruta = ?", eliminadas)
+    return len(filas), len(eliminadas)
+
+def consultar_catalogo(conexion, raices, desde=None, hasta=None):
+    """Informes de las raíces cuyo rango de fechas se solapa con [desde, hasta].
+
+    raices es un directorio o una lista de directorios de informes. desde y
+    hasta son datetime.date (o None para no limitar ese extremo). Los
+    informes se devuelven en orden cronológico, con las mismas claves que
+    analizar_nombre_informe; los de fecha no reconocible van al final y se
+    excluyen si se indica un rango.
+    """
+    if isinstance(raices, str):
+        raices = [raices]
+    parametros = [os.path.realpath(raiz) for raiz in raices]
+    condiciones = [f"directorio IN ({', '.join('?' * len(parametros))})"]
+    if desde is not None:
+        condiciones.append("fin >= ?")
+        parametros.append(desde.isoformat())
+    if hasta is not None:
+        condiciones.append("inicio <= ?")
+        parametros.append(hasta.isoformat())
+    consulta = ("SELECT ruta, periodo, fecha_inicio, fecha_fin, tenant, nombre_archivo FROM informes "
+                f"WHERE {' AND '.join(condiciones)} ORDER BY inicio IS NULL, inicio, fin, nombre_archivo")
+    return [{"archivo": ruta, "periodo": periodo, "fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin,
+             "tenant": tenant, "nombre_archivo": nombre_archivo}
+            for ruta, periodo, fecha_inicio, fecha_fin, tenant, nombre_archivo
+            in conexion.execute(consulta, parametros)]
+
+def _informes_sin_catalogo(raices, desde=None, hasta=None, **opciones):
+    """Equivalente a consultar_catalogo recorriendo los directorios, si el catálogo no se puede usar."""
+    con_rango = desde is not None or hasta is not None
+    informes = []
+    for ruta in _escanear_informes([os.path.realpath(raiz) for raiz in raices], **opciones):
+        informe = analizar_nombre_informe(ruta)
+        if not informe:
+            continue
+        inicio, fin = fecha_iso_informe(informe["fecha_inicio"]), fecha_iso_informe(informe["fecha_fin"])
+        if con_rango and (inicio is None or fin is None
+                          or (desde is not None and fin < desde.isoformat())
+                          or (hasta is not None and inicio > hasta.isoformat())):
+            continue
+        informes.append(((inicio is None, inicio or "", fin or "", informe["nombre_archivo"]), informe))
+    informes.sort(key=lambda par: par[0])
+    return [informe for _, informe in informes]
+
+def informes_por_periodo_catalogo(raices, ruta_catalogo, desde=None, hasta=None, **opciones):
+    """Actualiza el catálogo y agrupa por período los informes del rango, en orden cronológico.
+
+    raices es un directorio o una lista de directorios de informes y opciones
+    son las de _escanear_informes. Los períodos quedan ordenados por la fecha
+    de inicio de su informe más antiguo. Si el catálogo no se puede abrir, se
+    recorren los directorios.
+    """
+    if isinstance(raices, str):
+        raices = [raices]
+    with medir_etapa("descubrimiento"):
+        try:
+            conexion = abrir_catalogo(ruta_catalogo)
+            try:
+                for raiz in raices:
+                    actualizar_catalogo(conexion, raiz, **opciones)
+                informes = consultar_catalogo(conexion, raices, desde, hasta)
+            finally:
+                conexion.close()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Advertencia: no se pudo usar el catálogo {ruta_catalogo}: {e}")
+            informes = _informes_sin_catalogo(raices, desde, hasta, **opciones)
+
+    informes_por_periodo = {}
+    for informe in informes:
+        informes_por_periodo.setdefault(informe["periodo"], []).append(informe)
+    return informes_por_periodo
+
+def guardar_historico(ruta_catalogo, datos_por_ruta):
+    """Guarda en el histórico del catálogo las métricas de los informes extraídos.
+
+    datos_por_ruta es un iterable de pares (ruta, datos). Cada informe se guarda
+    con la clave (tenant, inicio, fin) tomada del nombre del archivo, de modo que
+    volver a extraerlo reemplaza la fila. Devuelve el número de filas escritas.
+    """
+    filas = []
+    for ruta, datos in datos_por_ruta:
+        informe = analizar_nombre_informe(ruta)
+        if not informe:
+            continue
+        inicio, fin = fecha_iso_informe(informe["fecha_inicio"]), fecha_iso_informe(informe["fecha_fin"])
+        if inicio is None or fin is None:
+            continue
+        registro = RegistroInforme(datos)
+        filas.append((informe["tenant"], inicio, fin, registro.nombre, registro.estado, os.path.realpath(ruta),
+                      *(registro.valor(i) for i in range(len(COLUMNAS_METRICAS)))))
+    if not filas:
+        return 0
+
+    marcadores = ", ".join("?" * (6 + len(COLUMNAS_METRICAS)))
+    try:
+        with medir_etapa("historico_escritura"):
+            conexion = abrir_catalogo(ruta_catalogo)
+            try:
+                with conexion:
+                    conexion.executemany(f"INSERT OR REPLACE INTO metricas VALUES ({marcadores})", filas)
+            finally:
+                conexion.close()
+    except (sqlite3.Error, OSError) as e:
+        print(f"Advertencia: no se pudo guardar el histórico en {ruta_catalogo}: {e}")
+        return 0
+    return len(filas)
+
+# Métricas de la tendencia mensual: (columna de COLUMNAS_METRICAS, etiqueta en el reporte)
+METRICAS_TENDENCIA = [
+    ("alertas_activadas", "Critical/High Alerts"),
+    ("archivos_remediados", "Remediated Files"),
+    ("active_endpoints", "Active Endpoints"),
+]
+
+def _sumar_meses(fecha, meses):
+    """Primer día del mes que está meses después (o antes, si es negativo) del de fecha."""
+    indice = fecha.year * 12 + fecha.month - 1 + meses
+    return datetime.date(indice // 12, indice % 12 + 1, 1)
+
+def rango_tendencias(conexion, desde=None, hasta=None, meses=12):
+    """Rango (desde, hasta) de la tendencia; sin fechas, los últimos meses con datos en el histórico.
+
+    Devuelve (None, None) si el histórico está vacío.
+    """
+    if hasta is None:
+        ultimo = conexion.execute("SELECT max(inicio) FROM metricas").fetchone()[0]
+        if ultimo is None:
+            return None, None
+        hasta = datetime.date.fromisoformat(ultimo)
+    if desde is None:
+        desde = _sumar_meses(hasta, 1 - meses)
+    return desde, hasta
+
+def meses_rango(desde, hasta):
+    """Meses AAAA-MM entre las fechas desde y hasta, ambos incluidos."""
+    meses = []
+    mes = _sumar_meses(desde, 0)
+    while mes <= hasta:
+        meses.append(mes.strftime("%Y-%m"))
+        mes = _sumar_meses(mes, 1)
+    return meses
+
+def consultar_historico(conexion, desde, hasta):
+    """Series mensuales de METRICAS_TENDENCIA por tenant, en una sola consulta.
+
+    Cada informe cuenta en el mes de su fecha de inicio; si un tenant tiene
+    varios en el mismo mes, prevalece el que termina más tarde (y, entre los que
+    terminan el mismo día, el que empieza más tarde). Devuelve
+    {tenant: (nombre, {"AAAA-MM": (valores...)})} ordenado por tenant.
+    """
+    columnas = ", ".join(columna for columna, _ in METRICAS_TENDENCIA)
+    consulta = (f"SELECT tenant, nombre, substr(inicio, 1, 7), {columnas} FROM metricas "
+                "WHERE inicio >= ? AND inicio <= ? ORDER BY tenant, fin, inicio")
+    series = {}
+    for tenant, nombre, mes, *valores in conexion.execute(consulta, (_sumar_meses(desde, 0).isoformat(),
+                                                                      hasta.isoformat())):
+        _, por_mes = series.setdefault(tenant, (nombre, {}))
+        por_mes[mes] = tuple(valores)
+    return series
+
+def raices_informes(args, reports_dir):
+    """Directorios de informes: reports_dir más los indicados con --raiz, sin repetir."""
+    raices = {}
+    for raiz in [reports_dir] + args.raiz:
+        raices.setdefault(os.path.realpath(raiz), raiz)
+    return list(raices.values())
+
+def opciones_escaneo(args):
+    """Opciones de _escanear_informes indicadas en la línea de comandos."""
+    return {"recursivo": args.recursivo, "incluir": args.incluir, "excluir": args.excluir}
+
+def ruta_catalogo(args):
+    """Ruta del catálogo indicada con --catalogo o, por defecto, dentro del directorio de la caché."""
+    return args.catalogo or os.path.join(args.cache_dir, NOMBRE_CATALOGO)
+
+def ejecutar_calibracion(args, reports_dir):
+    """Calibra los backends (--calibrar) con los informes de raices_informes; devuelve el código de salida.
+
+    La muestra se toma con _escanear_informes, así que respeta --raiz,
+    --recursivo, --incluir, --excluir y los informes de los paquetes.
+    """
+    raices = raices_informes(args, reports_dir)
+    rutas_pdf = sorted(_escanear_informes(raices, **opciones_escaneo(args)))
+    if not rutas_pdf:
+        print(f"No se puede calibrar: no se encontraron informes con el formato de nombre esperado "
+              f"en {', '.join(raices)}")
+        return 1
+    print(f"Calibrando backends de extracción de texto con {min(len(rutas_pdf), MUESTRA_CALIBRACION)} "
+          f"informe(s)...")
+    return 0 if calibrar_backends(rutas_pdf, args.config) else 1
+
+def nombre_archivo_salida(periodo):
+    """Nombre del PDF unificado de un período."""
+    # Reemplazar espacios y caracteres especiales para el nombre de archivo
+    nombre_periodo = periodo.replace(" ", "_").replace("/", "-")
+    return f"reporte_cynet_unificado_{nombre_periodo}.pdf"
+
+def localizar_logo():
+    """Busca el logo de Cynet; si no existe, crea uno temporal y devuelve su ruta."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    logo_path = os.path.join(script_dir, "cynet_logo.png")
+    if os.path.exists(logo_path):
+        return logo_path
+
+    print("\nLogo de Cynet no encontrado, buscando en ubicaciones alternativas...")
+    # Buscar en ubicaciones alternativas
+    alt_locations = [
+        os.path.join(os.path.dirname(script_dir), "cynet_logo.png"),
+        os.path.join(os.path.dirname(script_dir), "cynet_style", "cynet_logo.png"),
+        os.path.join(script_dir, "cynet_style", "cynet_logo.png"),
+        os.path.join(script_dir, "cynet_icons", "cynet_logo_blue.png")
+    ]
+    for loc in alt_locations:
+        if os.path.exists(loc):
+            print(f"Logo encontrado en: {loc}")
+            return loc
+
+    print("Advertencia: Logo de Cynet no encontrado. El reporte será generado sin logo.")
+    # Usar un placeholder para el logo
+    from PIL import Image, ImageDraw
+
+    # Crear logo placeholder
+    img = Image.new("RGB", (300, 100), color=(0, 102, 255))
+    d = ImageDraw.Draw(img)
+    d.text((20, 40), "CYNET", fill=(255, 255, 255))
+
+    # Guardar logo placeholder
+    os.makedirs(os.path.dirname(logo_path), exist_ok=True)
+    img.save(logo_path)
+    print(f"Logo temporal creado en: {logo_path}")
+    return logo_path
+
+def resolver_workers(workers=None):
+    """Número de procesos: el indicado, CYNET_WORKERS o None (núcleos disponibles)."""
+    if workers:
+        return workers
+    try:
+        return int(os.environ.get("CYNET_WORKERS", "")) or None
+    except ValueError:
+        return None
+
+# Métricas de cada informe, en el orden de la tabla del resumen comparativo:
+# (columna, sección y clave en datos)
+COLUMNAS_METRICAS = [
+    ("alertas_activadas", "malicioso", "alertas_activadas"),
+    ("alertas_manejadas", "malicioso", "alertas_manejadas"),
+    ("archivos_afectados", "malicioso", "archivos_afectados"),
+    ("archivos_remediados", "malicioso", "archivos_remediados"),
+    ("endpoints_afectados", "malicioso", "endpoints_afectados"),
+    ("investigaciones_auto", "automatizacion", "investigaciones_auto"),
+    ("acciones_respuesta", "automatizacion", "acciones_respuesta"),
+    ("active_endpoints", "inventario", "active_endpoints"),
+    ("severidad_critical", "alert_severity_counts", "critical"),
+    ("severidad_high", "alert_severity_counts", "high"),
+    ("severidad_medium", "alert_severity_counts", "medium"),
+    ("severidad_low", "alert_severity_counts", "low"),
+]
+_PATRON_ENTERO = re.compile(_NUMERO)
+
+def _valor_entero(valor):
+    """Convierte un valor extraído (1234 o 1,234) en entero; None si no es un número."""
+    valor = str(valor).strip()
+    return int(valor.replace(",", "")) if _PATRON_ENTERO.fullmatch(valor) else None
+
+class RegistroInforme:
+    """Métricas de un informe ya convertidas a enteros.
+
+    Se construye a partir de los datos de extraer_datos_pdf solo donde hacen
+    falta valores con tipo: la fila TOTAL del resumen y la exportación. La
+    extracción, la caché y el render siguen trabajando con el dict de datos.
+
+    metricas es un array de enteros en el orden de COLUMNAS_METRICAS. Un valor que
+    no se pudo interpretar cuenta como 0 y su posición queda marcada en el bit
+    correspondiente de no_validos. estado es "ok", "parcial" (algún valor no
+    válido) o "invalido" (ninguno válido).
+    """
+    __slots__ = ("nombre_informe", "nombre", "rango_fechas", "generado", "metricas", "no_validos", "estado")
+
+    def __init__(self, datos):
+        from array import array
+
+        resumen = datos["resumen"]
+        self.nombre_informe = datos.get("nombre_informe", "")
+        self.nombre = resumen["nombre"]
+        self.rango_fechas = resumen["rango_fechas"]
+        self.generado = resumen["generado"]
+        self.metricas = array("q", bytes(8 * len(COLUMNAS_METRICAS)))
+        self.no_validos = 0
+        for i, (_, seccion, clave) in enumerate(COLUMNAS_METRICAS):
+            valor = _valor_entero(datos[seccion][clave])
+            if valor is None:
+                self.no_validos |= 1 << i
+            else:
+                self.metricas[i] = valor
+        if not self.no_validos:
+            self.estado = "ok"
+        elif self.no_validos == (1 << len(COLUMNAS_METRICAS)) - 1:
+            self.estado = "invalido"
+        else:
+            self.estado = "parcial"
+
+    def valor(self, i):
+        """Valor de la métrica i, o None si no se pudo interpretar."""
+        return None if self.no_validos >> i & 1 else self.metricas[i]
+
+def totales_metricas(registros):
+    """Suma cada métrica sobre todos los registros (los valores no válidos cuentan 0).
+
+    Las métricas se copian a una sola tabla contigua y cada total es una suma en C
+    sobre una columna de esa tabla, sin convertir cadenas ni recorrer filas en Python.
+    """
+    from array import array
+
+    num_columnas = len(COLUMNAS_METRICAS)
+    tabla = array("q")
+    for registro in registros:
+        tabla.extend(registro.metricas)
+    return [sum(tabla[i::num_columnas]) for i in range(num_columnas)]
+
+# Columnas de texto de la exportación; las métricas son las de COLUMNAS_METRICAS
+COLUMNAS_TEXTO_EXPORTACION = ["periodo", "tipo_fila", "estado", "informe", "nombre", "rango_fechas", "generado"]
+FORMATOS_EXPORTACION = (".csv", ".jsonl", ".parquet")
+
+def fila_exportacion(registro, periodo=""):
+    """Fila plana con las métricas enteras de un informe (None si no eran válidas)."""
+    fila = {
+        "periodo": periodo,
+        "tipo_fila": "informe",
+        "estado": registro.estado,
+        "informe": registro.nombre_informe,
+        "nombre": registro.nombre,
+        "rango_fechas": registro.rango_fechas,
+        "generado": registro.generado,
+    }
+    for i, (columna, _, _) in enumerate(COLUMNAS_METRICAS):
+        fila[columna] = registro.valor(i)
+    return fila
+
+def fila_total_exportacion(registros, periodo=""):
+    """Fila TOTAL de un período, con la misma suma que la tabla del resumen comparativo."""
+    total = {"periodo": periodo, "tipo_fila": "total", "estado": "ok", "informe": "", "nombre": "TOTAL",
+             "rango_fechas": "", "generado": ""}
+    for (columna, _, _), valor in zip(COLUMNAS_METRICAS, totales_metricas(registros)):
+        total[columna] = valor
+    return total
+
+def abrir_exportacion(ruta):
+    """Abre un archivo de exportación según su extensión (.csv, .jsonl o .parquet).
+
+    Devuelve (escribir_fila, cerrar). CSV y JSONL escriben cada fila en cuanto
+    llega; Parquet (requiere pyarrow) las acumula y escribe el archivo al cerrar.
+    """
+    import csv
+
+    extension = os.path.splitext(ruta)[1].lower()
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(directorio, exist_ok=True)
+    columnas = COLUMNAS_TEXTO_EXPORTACION + [c for c, _, _ in COLUMNAS_METRICAS]
+
+    if extension == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        esquema = pa.schema([(c, pa.string()) for c in COLUMNAS_TEXTO_EXPORTACION]
+                            + [(c, pa.int64()) for c, _, _ in COLUMNAS_METRICAS])
+        filas = []
+
+        def cerrar():
+            pq.write_table(pa.Table.from_pylist(filas, schema=esquema), ruta)
+        return filas.append, cerrar
+
+    f = open(ruta, "w", encoding="utf-8", newline="")
+    if extension == ".csv":
+        escritor = csv.DictWriter(f, fieldnames=columnas)
+        escritor.writeheader()
+
+        def escribir_fila(fila):
+            escritor.writerow(fila)
+            f.flush()
+    else:
+        def escribir_fila(fila):
+            f.write(json.dumps(fila, ensure_ascii=False) + "\n")
+            f.flush()
+    return escribir_fila, f.close
+
+def preparar_exportacion(rutas_exportacion, informes_por_periodo, periodos):
+    """Prepara la exportación por filas de los informes de uno o varios períodos.
+
+    Devuelve (al_completar, finalizar): al_completar se pasa a extraer_datos_lote
+    y escribe una fila por informe en cuanto se extrae; finalizar añade la fila
+    TOTAL de cada período y cierra los archivos.
+    """
+    exportaciones = [abrir_exportacion(ruta) for ruta in rutas_exportacion]
+    periodos_por_ruta = {}
+    for periodo in periodos:
+        for informe in informes_por_periodo[periodo]:
+            periodos_por_ruta.setdefault(os.path.realpath(informe["archivo"]), []).append(periodo)
+    registros_por_periodo = {periodo: [] for periodo in periodos}
+
+    def al_completar(ruta, datos, error):
+        if datos is None:
+            return
+        registro = RegistroInforme(datos)
+        for periodo in periodos_por_ruta.get(os.path.realpath(ruta), []):
+            registros_por_periodo[periodo].append(registro)
+            fila = fila_exportacion(registro, periodo)
+            for escribir_fila, _ in exportaciones:
+                escribir_fila(fila)
+
+    def finalizar():
+        try:
+            for periodo, registros in registros_por_periodo.items():
+                if registros:
+                    total = fila_total_exportacion(registros, periodo)
+                    for escribir_fila, _ in exportaciones:
+                        escribir_fila(total)
+        finally:
+            for _, cerrar in exportaciones:
+                cerrar()
+        for ruta in rutas_exportacion:
+            print(f"✓ Datos exportados: {os.path.abspath(ruta)}")
+
+    return al_completar, finalizar
+
+def _renderizar_periodo(tarea):
+    """Genera el PDF unificado de un período; pensado para ejecutarse en otro proceso."""
+    periodo, datos_todos, ruta_salida, ruta_logo, iconos, fragmentos, workers = tarea
+    try:
+        with medir_etapa("render_periodo"):
+            if fragmentos:
+                return periodo, crear_informe_unificado_fragmentado(datos_todos, ruta_salida, ruta_logo, iconos,
+                                                                    fragmentos, workers), None
+            return periodo, crear_informe_unificado(datos_todos, ruta_salida, ruta_logo, iconos), None
+    except Exception as e:
+        return periodo, None, f"{type(e).__name__}: {e}"
+
+def ejecutar_lote(args):
+    """Modo no interactivo: genera los informes unificados de varios períodos.
+
+    Cada archivo se extrae una sola vez aunque pertenezca a varios grupos y los
+    períodos se renderizan en paralelo en procesos separados. Devuelve el
+    código de salida del proceso.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    reports_dir = args.reports_dir or directorio_reportes_predeterminado()
+    output_dir = args.output_dir or reports_dir
+    if not os.path.isdir(reports_dir):
+        print(f"Directorio de reportes no encontrado: {reports_dir}")
+        return 2
+
+    verificar_instalar_dependencias()
+    if args.clear_cache:
+        eliminadas = limpiar_cache(args.cache_dir)
+        print(f"Caché vaciada: {eliminadas} entrada(s) eliminada(s) de {args.cache_dir}")
+
+    if args.calibrar:
+        return ejecutar_calibracion(args, reports_dir)
+
+    raices = raices_informes(args, reports_dir)
+    informes_por_periodo = informes_por_periodo_catalogo(raices, ruta_catalogo(args), args.desde, args.hasta,
+                                                         **opciones_escaneo(args))
+    if not informes_por_periodo:
+        print(f"No se encontraron informes con el formato de nombre esperado{texto_rango_fechas(args)} "
+              f"en {', '.join(raices)}")
+        return 1
+
+    if args.all_periods:
+        periodos = list(informes_por_periodo)
+    else:
+        desconocidos = [p for p in args.periodos if p not in informes_por_periodo]
+        if desconocidos:
+            print(f"Períodos no encontrados{texto_rango_fechas(args)}: {', '.join(desconocidos)}")
+            print(f"Períodos disponibles: {', '.join(informes_por_periodo)}")
+            return 2
+        periodos = list(dict.fromkeys(args.periodos))
+
+    # La exportación cubre todos los períodos pedidos, aunque su PDF esté al día
+    periodos_exportar = list(periodos) if args.exportar else []
+
+    # Omitir los períodos cuyo reporte ya se generó con las mismas entradas
+    manifiesto = None
+    if args.solo_exportar:
+        periodos = []
+    else:
+        manifiesto = cargar_manifiesto(output_dir)
+        actualizar_firmas(manifiesto, [informe["archivo"] for periodo in periodos
+                                       for informe in informes_por_periodo[periodo]])
+    if manifiesto is not None and not args.force:
+        vigentes = [p for p in periodos
+                    if periodo_vigente(manifiesto, p, informes_por_periodo[p], output_dir, version_render_opciones(args),
+                                       version_extraccion_opciones(args))]
+        for periodo in vigentes:
+            print(f"= {periodo}: sin cambios desde la última ejecución")
+        periodos = [p for p in periodos if p not in vigentes]
+        if not periodos and not periodos_exportar:
+            guardar_manifiesto(output_dir, manifiesto)
+            print("Todos los reportes están actualizados (use --force para regenerarlos).")
+            return 0
+
+    workers = resolver_workers(args.workers)
+    if args.flujo:
+        logo_path = localizar_logo()
+        iconos = preparar_iconos(args.iconos_vectoriales, args.cache_dir)
+        fallos = _generar_periodos_en_flujo(periodos, informes_por_periodo, args, output_dir, logo_path, iconos,
+                                            workers, manifiesto=manifiesto)
+        return 1 if fallos else 0
+
+    # Extraer cada archivo distinto una sola vez
+    rutas_unicas = {}
+    for periodo in periodos_exportar or periodos:
+        for informe in informes_por_periodo[periodo]:
+            rutas_unicas.setdefault(os.path.realpath(informe["archivo"]), informe["archivo"])
+    rutas_pdf = list(rutas_unicas.values())
+
+    print(f"Extrayendo datos de {len(rutas_pdf)} archivo(s) para {len(periodos_exportar or periodos)} período(s)...")
+    if periodos_exportar:
+        al_completar, finalizar_exportacion = preparar_exportacion(args.exportar, informes_por_periodo,
+                                                                   periodos_exportar)
+        try:
+            datos_por_ruta = _extraer_datos_por_ruta(rutas_pdf, args, workers, al_completar)
+        finally:
+            finalizar_exportacion()
+    else:
+        datos_por_ruta = _extraer_datos_por_ruta(rutas_pdf, args, workers)
+    if not periodos:
+        if manifiesto is not None:
+            guardar_manifiesto(output_dir, manifiesto)
+        return 0 if datos_por_ruta else 1
+
+    logo_path = localizar_logo()
+    iconos = preparar_iconos(args.iconos_vectoriales, args.cache_dir)
+
+    fallidos = _generar_periodos(periodos, informes_por_periodo, datos_por_ruta,
+                                 output_dir, logo_path, iconos, workers,
+                                 manifiesto=manifiesto, forzar=args.force,
+                                 version_render=version_render_opciones(args),
+                                 version_extraccion=version_extraccion_opciones(args),
+                                 fragmentos=args.fragmentos)
+    return 1 if fallidos else 0
+
+def generar_tendencias(args):
+    """Modo tendencias: genera el reporte mensual por tenant leyendo solo el histórico.
+
+    No se abre ningún PDF; el histórico se llena con cada extracción de los
+    demás modos. Devuelve el código de salida del proceso.
+    """
+    ruta = ruta_catalogo(args)
+    verificar_instalar_dependencias()
+    try:
+        with medir_etapa("historico_consulta"):
+            conexion = abrir_catalogo(ruta)
+            try:
+                desde, hasta = rango_tendencias(conexion, args.desde, args.hasta, args.meses)
+                series = consultar_historico(conexion, desde, hasta) if desde else {}
+            finally:
+                conexion.close()
+    except (sqlite3.Error, OSError) as e:
+        print(f"No se pudo leer el histórico {ruta}: {e}")
+        return 1
+    if not series:
+        print(f"El histórico {ruta} no tiene informes{texto_rango_fechas(args)}.")
+        print("Se llena al extraer informes en los demás modos (por ejemplo, --all-periods).")
+        return 1
+
+    meses = meses_rango(desde, hasta)
+    ruta_salida = crear_informe_tendencias(series, meses, args.tendencias, localizar_logo())
+    print(f"✓ Tendencias de {len(series)} tenant(s) en {len(meses)} mes(es): {os.path.abspath(ruta_salida)}")
+    return 0
+
+# Informes por escritura del histórico en _datos_en_flujo
+TAMANO_LOTE_HISTORICO = 100
+
+def _datos_en_flujo(rutas_pdf, args, workers, usos=None, compartidos=None):
+    """Extrae en flujo los PDFs indicados y produce los datos de cada uno, en orden.
+
+    Informa de los archivos que fallan y guarda el histórico por bloques a
+    medida que avanza, sin retener los datos ya consumidos. usos cuenta, por
+    ruta real, los períodos que aún tienen que consumir cada informe; los datos
+    de los que quedan pendientes se guardan en compartidos (ruta real -> datos)
+    y no se vuelven a extraer en el período siguiente.
+    """
+    backend = seleccionar_backend_texto(args.backend, args.config)
+    dir_cache = None if args.no_cache else args.cache_dir
+    if compartidos is None:
+        compartidos = {}
+    rutas_pdf = [(ruta, os.path.realpath(ruta)) for ruta in rutas_pdf]
+    reutilizados = {real for _, real in rutas_pdf if real in compartidos}
+    extraidos = iterar_datos_lote((ruta for ruta, real in rutas_pdf if real not in reutilizados),
+                                  workers=workers, dir_cache=dir_cache, paginas=args.paginas,
+                                  incluir_fuentes=args.fuentes, backend=backend)
+    historico = []
+    for ruta, real in rutas_pdf:
+        if real in reutilizados:
+            datos = compartidos[real]
+        else:
+            _, datos, error = next(extraidos)
+            if error:
+                print(f"Error extrayendo datos de {os.path.basename(ruta)}: {error}")
+            else:
+                historico.append((ruta, datos))
+        if usos is not None:
+            usos[real] -= 1
+            if datos is not None and usos[real] > 0:
+                compartidos[real] = datos
+            else:
+                compartidos.pop(real, None)
+        if len(historico) >= TAMANO_LOTE_HISTORICO:
+            guardar_historico(ruta_catalogo(args), historico)
+            historico = []
+        if datos is not None:
+            yield datos
+    guardar_historico(ruta_catalogo(args), historico)
+
+def _generar_periodos_en_flujo(periodos, informes_por_periodo, args, output_dir, logo_path, iconos, workers,
+                               manifiesto=None):
+    """Genera los períodos de uno en uno con el pipeline en flujo; devuelve el número de fallos.
+
+    La extracción de cada período se solapa con su renderizado y la memoria
+    no crece con el número de informes (ver crear_informe_unificado_en_flujo).
+    Solo se retienen los datos de los informes que comparten varios períodos,
+    hasta que los consume el último de ellos.
+    """
+    from collections import Counter
+
+    os.makedirs(output_dir, exist_ok=True)
+    fallos = 0
+    usos = Counter(os.path.realpath(informe["archivo"])
+                   for periodo in periodos for informe in informes_por_periodo[periodo])
+    compartidos = {}
+    print(f"Generando {len(periodos)} reporte(s) unificado(s) en flujo...")
+    for periodo in periodos:
+        informes = informes_por_periodo[periodo]
+        ruta_salida = os.path.join(output_dir, nombre_archivo_salida(periodo))
+        try:
+            with medir_etapa("render_periodo"):
+                ruta_final, cantidad, huella = crear_informe_unificado_en_flujo(
+                    _datos_en_flujo((informe["archivo"] for informe in informes), args, workers,
+                                    usos, compartidos),
+                    ruta_salida, logo_path, iconos)
+        except Exception as e:
+            fallos += 1
+            print(f"Error generando el reporte de {periodo}: {type(e).__name__}: {e}")
+            continue
+        if not cantidad:
+            fallos += 1
+            print(f"Advertencia: ningún archivo del período {periodo} se pudo procesar; se omite.")
+            continue
+        print(f"✓ {periodo} ({cantidad} informes): {os.path.abspath(ruta_final)}")
+        if manifiesto is not None:
+            manifiesto["salidas"][nombre_archivo_salida(periodo)] = {
+                "periodo": periodo,
+                "entradas": _entradas_periodo(manifiesto, informes),
+                "digest_datos": huella,
+                "version_render": version_render_opciones(args),
+                "version_extraccion": version_extraccion_opciones(args),
+                "generado": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+    if manifiesto is not None:
+        guardar_manifiesto(output_dir, manifiesto)
+    return fallos
+
+def _extraer_datos_por_ruta(rutas_pdf, args, workers, al_completar=None):
+    """Extrae los PDFs indicados y devuelve un dict ruta real -> datos (omite los fallidos)."""
+    backend = seleccionar_backend_texto(args.backend, args.config)
+    dir_cache = None if args.no_cache else args.cache_dir
+    resultados = extraer_datos_lote(rutas_pdf, workers=workers, dir_cache=dir_cache,
+                                    paginas=args.paginas, incluir_fuentes=args.fuentes,
+                                    backend=backend, al_completar=al_completar,
+                                    timeout=args.timeout_pdftotext)
+    datos_por_ruta = {}
+    for ruta, (datos, error) in zip(rutas_pdf, resultados):
+        if error:
+            print(f"Error extrayendo datos de {os.path.basename(ruta)}: {error}")
+        else:
+            datos_por_ruta[os.path.realpath(ruta)] = datos
+    guardar_historico(ruta_catalogo(args), datos_por_ruta.items())
+    return datos_por_ruta
+
+def _generar_periodos(periodos, informes_por_periodo, datos_por_ruta, output_dir, logo_path, iconos, workers,
+                      manifiesto=None, forzar=False, version_render=VERSION_RENDER, fragmentos=None,
+                      version_extraccion=None):
+    """Renderiza en paralelo el PDF unificado de cada período; devuelve la lista de períodos fallidos.
+
+    Si se indica manifiesto, no se vuelve a renderizar un período cuyos datos
+    extraídos coinciden con los del último reporte generado (salvo con forzar),
+    y el manifiesto se actualiza con los reportes generados, incluidas sus
+    versiones de renderizado y de extracción. Con fragmentos, los períodos se
+    generan de uno en uno y cada uno reparte su detalle entre los procesos (ver
+    crear_informe_unificado_fragmentado).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+
+    os.makedirs(output_dir, exist_ok=True)
+    fallidos = []
+    tareas = []
+    registros = {}
+    for periodo in periodos:
+        datos_periodo = [datos_por_ruta[os.path.realpath(informe["archivo"])]
+                         for informe in informes_por_periodo[periodo]
+                         if os.path.realpath(informe["archivo"]) in datos_por_ruta]
+        if not datos_periodo:
+            print(f"Advertencia: ningún archivo del período {periodo} se pudo procesar; se omite.")
+            fallidos.append(periodo)
+            continue
+        nombre_salida = nombre_archivo_salida(periodo)
+        ruta_salida = os.path.join(output_dir, nombre_salida)
+        if manifiesto is not None:
+            registro = {
+                "periodo": periodo,
+                "entradas": _entradas_periodo(manifiesto, informes_por_periodo[periodo]),
+                "digest_datos": _digest_datos(datos_periodo),
+                "version_render": version_render,
+                "version_extraccion": version_extraccion,
+            }
+            anterior = manifiesto["salidas"].get(nombre_salida, {})
+            if (not forzar and os.path.exists(ruta_salida)
+                    and anterior.get("digest_datos") == registro["digest_datos"]
+                    and anterior.get("version_render") == version_render):
+                # Las entradas cambiaron pero los datos no: basta con actualizar el manifiesto
+                registro["generado"] = anterior.get("generado")
+                manifiesto["salidas"][nombre_salida] = registro
+                print(f"= {periodo}: datos sin cambios, se conserva {ruta_salida}")
+                continue
+            registros[periodo] = (nombre_salida, registro)
+        tareas.append((periodo, datos_periodo, ruta_salida, logo_path, iconos, fragmentos, workers))
+
+    print(f"Generando {len(tareas)} reporte(s) unificado(s)...")
+    workers_render = max(1, min(workers or os.cpu_count() or 1, len(tareas)))
+    if workers_render == 1 or fragmentos:
+        generados = [_renderizar_periodo(tarea) for tarea in tareas]
+    else:
+        renderizar = partial(_con_metricas_propias, _metricas is not None, _renderizar_periodo)
+        generados = []
+        with ProcessPoolExecutor(max_workers=workers_render) as executor:
+            for generado, metricas in executor.map(renderizar, tareas):
+                generados.append(generado)
+                fusionar_metricas(metricas)
+
+    for periodo, ruta_final, error in generados:
+        if error:
+            fallidos.append(periodo)
+            print(f"Error generando el reporte de {periodo}: {error}")
+        else:
+            print(f"✓ {periodo}: {os.path.abspath(ruta_final)}")
+            if periodo in registros:
+                nombre_salida, registro = registros[periodo]
+                registro["generado"] = datetime.datetime.now().isoformat(timespec="seconds")
+                manifiesto["salidas"][nombre_salida] = registro
+
+    if manifiesto is not None:
+        guardar_manifiesto(output_dir, manifiesto)
+    return fallidos
+
+def cargar_manifiesto(output_dir):
+    """Lee el manifiesto de reportes generados en output_dir."""
+    try:
+        with open(os.path.join(output_dir, NOMBRE_MANIFIESTO), "r", encoding="utf-8") as f:
+            manifiesto = json.load(f)
+    except (OSError, ValueError):
+        manifiesto = {}
+    manifiesto.setdefault("salidas", {})
+    manifiesto.setdefault("firmas", {})
+    return manifiesto
+
+def guardar_manifiesto(output_dir, manifiesto):
+    """Escribe el manifiesto de forma atómica."""
+    ruta = os.path.join(output_dir, NOMBRE_MANIFIESTO)
+    ruta_tmp = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        with open(ruta_tmp, "w", encoding="utf-8") as f:
+            json.dump(manifiesto, f, ensure_ascii=False, indent=1)
+        os.replace(ruta_tmp, ruta)
+    except OSError as e:
+        print(f"Advertencia: no se pudo guardar el manifiesto en {output_dir}: {e}")
+
+def actualizar_firmas(manifiesto, rutas_pdf):
+    """Actualiza el hash de contenido de cada ruta en el manifiesto.
+
+    Solo se vuelve a leer un archivo si su tamaño o fecha de modificación
+    cambiaron desde la última ejecución.
+    """
+    firmas = manifiesto["firmas"]
+    for ruta in rutas_pdf:
+        ruta_real = os.path.realpath(ruta)
+        try:
+            mtime_ns, tamano = firma_archivo(ruta_real)
+        except OSError:
+            firmas.pop(ruta_real, None)
+            continue
+        firma = firmas.get(ruta_real)
+        if firma and firma.get("tam") == tamano and firma.get("mtime_ns") == mtime_ns:
+            continue
+        try:
+            with medir_etapa("firmas_manifiesto"):
+                firmas[ruta_real] = {"tam": tamano, "mtime_ns": mtime_ns, "hash": calcular_hash_archivo(ruta_real)}
+        except OSError:
+            firmas.pop(ruta_real, None)
+    return firmas
+
+def _entradas_periodo(manifiesto, informes):
+    """Hash de cada archivo de entrada de un período, según las firmas del manifiesto."""
+    firmas = manifiesto["firmas"]
+    entradas = {}
+    for informe in informes:
+        ruta_real = os.path.realpath(informe["archivo"])
+        entradas[ruta_real] = firmas.get(ruta_real, {}).get("hash")
+    return entradas
+
+def version_render_opciones(args):
+    """Versión de renderizado según las opciones que cambian el aspecto del PDF."""
+    return (VERSION_RENDER + ("-vectorial" if args.iconos_vectoriales else "")
+            + (f"-fragmentos{args.fragmentos}" if args.fragmentos else "")
+            + ("-flujo" if args.flujo else ""))
+
+def version_extraccion_opciones(args):
+    """Versión de extracción: VERSION_EXTRACTOR más el backend y las opciones que cambian los datos."""
+    return (f"{VERSION_EXTRACTOR}-{seleccionar_backend_texto(args.backend, args.config)}"
+            + (f"-p{args.paginas[0]}-{args.paginas[1]}" if args.paginas else "")
+            + ("-fuentes" if args.fuentes else ""))
+
+def periodo_vigente(manifiesto, periodo, informes, output_dir, version_render=VERSION_RENDER,
+                    version_extraccion=None):
+    """Indica si el reporte del período existe y se generó con las mismas entradas y versiones.
+
+    Un reporte generado con otra versión del extractor o con otras opciones de
+    extracción (version_extraccion_opciones) no está vigente.
+    """
+    nombre_salida = nombre_archivo_salida(periodo)
+    registro = manifiesto["salidas"].get(nombre_salida)
+    return bool(
+        registro
+        and registro.get("version_render") == version_render
+        and registro.get("version_extraccion") == version_extraccion
+        and registro.get("entradas") == _entradas_periodo(manifiesto, informes)
+        and os.path.exists(os.path.join(output_dir, nombre_salida))
+    )
+
+def _digest_datos(datos_periodo):
+    """Huella de los datos extraídos de un período."""
+    contenido = json.dumps(datos_periodo, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+def _escanear_informes(raices, recursivo=False, incluir=(), excluir=()):
+    """Devuelve {ruta: (mtime_ns, tamaño)} de los informes con nombre válido de los directorios.
+
+    raices es un directorio o una lista de directorios; con recursivo también se
+    recorren sus subdirectorios (sin seguir enlaces simbólicos). Los PDFs de los
+    paquetes .zip y .tar.gz se incluyen con la ruta del paquete seguida del
+    nombre del miembro (ver dividir_ruta_paquete), la fecha de modificación del
+    paquete y el tamaño del miembro. incluir y excluir son patrones fnmatch
+    sobre la ruta relativa a la raíz, con "/" como separador: si hay patrones de
+    inclusión solo se consideran los informes que coinciden con alguno, y se
+    descartan los informes, paquetes y directorios que coinciden con uno de
+    exclusión.
+    """
+    if isinstance(raices, str):
+        raices = [raices]
+    estado = {}
+
+    def coincide(relativa, patrones):
+        return any(fnmatch.fnmatch(relativa, patron) for patron in patrones)
+
+    def es_informe(nombre, relativa):
+        return (nombre.lower().endswith(".pdf") and PATRON_FECHA_ARCHIVO.search(nombre)
+                and (not incluir or coincide(relativa, incluir)) and not coincide(relativa, excluir))
+
+    def recorrer(directorio, prefijo):
+        try:
+            with os.scandir(directorio) as iterador:
+                entradas = list(iterador)
+        except OSError as e:
+            print(f"Advertencia: no se pudo recorrer {directorio}: {e}")
+            return
+        for entrada in entradas:
+            relativa = prefijo + entrada.name
+            try:
+                if entrada.is_dir(follow_symlinks=False):
+                    if recursivo and not coincide(relativa, excluir):
+                        recorrer(entrada.path, relativa + "/")
+                elif es_paquete(entrada.name):
+                    if entrada.is_file() and not coincide(relativa, excluir):
+                        st = entrada.stat()
+                        for miembro, tamano in _miembros_paquete(entrada.path, st):
+                            if es_informe(posixpath.basename(miembro), f"{relativa}/{miembro}"):
+                                ruta = os.path.join(entrada.path, *miembro.split("/"))
+                                estado[ruta] = (st.st_mtime_ns, tamano)
+                elif es_informe(entrada.name, relativa) and entrada.is_file():
+                    st = entrada.stat()
+                    estado[entrada.path] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                continue  # el archivo desapareció durante el recorrido
+
+    for raiz in raices:
+        recorrer(raiz, "")
+    return estado
+
+# Ciclos seguidos en que el modo vigilancia reintenta un período que falla
+MAX_REINTENTOS_VIGILANCIA = 3
+
+def _retirar_reportes_sin_informes(output_dir, periodos):
+    """Borra el PDF unificado y la entrada del manifiesto de los períodos que se quedaron sin informes."""
+    manifiesto = cargar_manifiesto(output_dir)
+    for periodo in periodos:
+        nombre_salida = nombre_archivo_salida(periodo)
+        ruta_salida = os.path.join(output_dir, nombre_salida)
+        try:
+            os.remove(ruta_salida)
+            print(f"- {periodo}: ya no tiene informes; se elimina {ruta_salida}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Advertencia: no se pudo eliminar {ruta_salida}: {e}")
+        manifiesto["salidas"].pop(nombre_salida, None)
+    guardar_manifiesto(output_dir, manifiesto)
+
+def vigilar_directorio(args, max_ciclos=None):
+    """Modo vigilancia: regenera los períodos afectados cuando llegan o cambian informes.
+
+    Recorre los directorios con os.scandir cada args.intervalo segundos. Un cambio
+    solo se procesa cuando los directorios llevan args.debounce segundos sin
+    cambios, de modo que una ráfaga de archivos provoca una única regeneración.
+    Los informes presentes al arrancar se toman como punto de partida. Los
+    cambios de un período solo se dan por procesados cuando su reporte se
+    genera bien; si falla, se reintenta en los ciclos siguientes, hasta
+    MAX_REINTENTOS_VIGILANCIA veces, y después solo cuando vuelve a cambiar
+    alguno de sus informes. El reporte de un período que se queda sin informes
+    se elimina.
+    """
+    import time
+
+    reports_dir = args.reports_dir or directorio_reportes_predeterminado()
+    output_dir = args.output_dir or reports_dir
+    if not os.path.isdir(reports_dir):
+        print(f"Directorio de reportes no encontrado: {reports_dir}")
+        return 2
+
+    verificar_instalar_dependencias()
+    workers = resolver_workers(args.workers)
+    logo_path = localizar_logo()
+    iconos = preparar_iconos(args.iconos_vectoriales, args.cache_dir)
+
+    raices = raices_informes(args, reports_dir)
+    opciones = opciones_escaneo(args)
+    datos_por_ruta = {}
+    reintentos = {}
+    procesado = _escanear_informes(raices, **opciones)
+    observado = procesado
+    ultimo_cambio = time.monotonic()
+    print(f"Vigilando {', '.join(raices)} ({len(procesado)} informe(s) existentes). Ctrl+C para salir.")
+
+    ciclos = 0
+    try:
+        while max_ciclos is None or ciclos < max_ciclos:
+            ciclos += 1
+            time.sleep(args.intervalo)
+            estado = _escanear_informes(raices, **opciones)
+            if estado != observado:
+                observado = estado
+                ultimo_cambio = time.monotonic()
+                continue
+            if estado == procesado or time.monotonic() - ultimo_cambio < args.debounce:
+                continue
 
-    patron_automatizacion = r"Automation\s*(\d+)\s*Automatic investigations\s*(\d+)\s*Response actions"
-    match_automatizacion = re.search(patron_automatizacion, texto_completo_pagina, re.DOTALL | re.IGNORECASE)
-    if match_automatizacion:
-        datos["automatizacion"]["investigaciones_auto"] = match_automatizacion.group(1).strip()
-        datos["automatizacion"]["acciones_respuesta"] = match_automatizacion.group(2).strip()
-        
-    patron_inventario = r"Inventory\*\s*(\d+)\s*Active Endpoints"
-    match_inventario = re.search(patron_inventario, texto_completo_pagina, re.DOTALL | re.IGNORECASE)
-    if match_inventario:
-        datos["inventario"]["active_endpoints"] = match_inventario.group(1).strip()
+            cambiados = [ruta for ruta, firma in estado.items() if procesado.get(ruta) != firma]
+            eliminados = [ruta for ruta in procesado if ruta not in estado]
+            for ruta in cambiados + eliminados:
+                datos_por_ruta.pop(os.path.realpath(ruta), None)
 
-    # Extracción de Alert Count by Severity - Lógica V7.1 más robusta
-    alert_severity_block_match = re.search(r"Alert Count by Severity\s*Severity\s*#?\s*Alerts?\s*([\s\S]*?)(?:Top Affected Assets|Common Remediation Actions|IT Hygiene|Email Security|SaaS & Cloud|\Z)", texto_completo_pagina, re.IGNORECASE)
-    
-    if alert_severity_block_match:
-        block_text = alert_severity_block_match.group(1)
-        lines = block_text.split("\n")
-        for line in lines:
-            line_stripped = line.strip()
-            if not line_stripped: 
+            informes_por_periodo = agrupar_informes_por_periodo(sorted(estado))
+            periodos_afectados = []
+            for ruta in cambiados + eliminados:
+                informe = analizar_nombre_informe(ruta)
+                if informe and informe["periodo"] not in periodos_afectados:
+                    periodos_afectados.append(informe["periodo"])
+            vacios = [p for p in periodos_afectados if p not in informes_por_periodo]
+            if vacios:
+                _retirar_reportes_sin_informes(output_dir, vacios)
+            periodos_afectados = [p for p in periodos_afectados if p in informes_por_periodo]
+            if not periodos_afectados:
+                procesado = estado
                 continue
-            severity_match = re.match(r"^(Critical|High|Medium|Low)\s+(\d+)$", line_stripped, re.IGNORECASE)
-            if severity_match:
-                severity_name = severity_match.group(1).lower()
-                severity_count = severity_match.group(2).strip()
-                if severity_name in datos["alert_severity_counts"]:
-                    datos["alert_severity_counts"][severity_name] = severity_count
-    else:
-        print(f"Advertencia: bloque 'Alert Count by Severity' no encontrado en {nombre_informe}. Intentando búsqueda más amplia.")
-        # Fallback: Buscar palabras clave de severidad seguidas de números en cualquier parte del texto
-        severities_to_find = ["Critical", "High", "Medium", "Low"]
-        for severity_keyword in severities_to_find:
-            pattern_fallback = re.escape(severity_keyword) + r"\s+.*?(\d+)"
-            matches_fallback = re.findall(pattern_fallback, texto_completo_pagina, re.IGNORECASE)
-            if matches_fallback:
-                datos["alert_severity_counts"][severity_keyword.lower()] = matches_fallback[0].strip()
 
-    fonts = set()
-    for page_idx in range(len(doc)):
-        page = doc.load_page(page_idx)
-        for font_info in page.get_fonts():
-            if len(font_info) >= 4:
-                font_name_pdf = font_info[3]
-                if isinstance(font_name_pdf, str):
-                    fonts.add(font_name_pdf)
-    datos["fonts"] = list(fonts)
-    
-    doc.close()
-    return datos
+            print(f"\n{len(cambiados)} informe(s) nuevo(s) o modificado(s); "
+                  f"regenerando: {', '.join(periodos_afectados)}")
+            faltantes = [informe["archivo"] for periodo in periodos_afectados
+                         for informe in informes_por_periodo[periodo]
+                         if os.path.realpath(informe["archivo"]) not in datos_por_ruta]
+            if faltantes:
+                datos_por_ruta.update(_extraer_datos_por_ruta(faltantes, args, workers))
+            manifiesto = cargar_manifiesto(output_dir)
+            actualizar_firmas(manifiesto, [informe["archivo"] for periodo in periodos_afectados
+                                           for informe in informes_por_periodo[periodo]])
+            fallidos = _generar_periodos(periodos_afectados, informes_por_periodo, datos_por_ruta,
+                                         output_dir, logo_path, iconos, workers,
+                                         manifiesto=manifiesto, forzar=args.force,
+                                         version_render=version_render_opciones(args),
+                                         version_extraccion=version_extraccion_opciones(args),
+                                         fragmentos=args.fragmentos)
+            reintentar = []
+            for periodo in periodos_afectados:
+                if periodo not in fallidos:
+                    reintentos.pop(periodo, None)
+                elif reintentos.get(periodo, 0) < MAX_REINTENTOS_VIGILANCIA:
+                    reintentos[periodo] = reintentos.get(periodo, 0) + 1
+                    reintentar.append(periodo)
+                else:
+                    del reintentos[periodo]
+                    print(f"Advertencia: {periodo} sigue fallando; no se reintentará hasta que cambie "
+                          f"alguno de sus informes.")
+            # Los informes de los períodos por reintentar conservan su firma anterior
+            anterior, procesado = procesado, dict(estado)
+            for ruta in cambiados + eliminados:
+                informe = analizar_nombre_informe(ruta)
+                if informe and informe["periodo"] in reintentar:
+                    if ruta in anterior:
+                        procesado[ruta] = anterior[ruta]
+                    else:
+                        del procesado[ruta]
+    except KeyboardInterrupt:
+        print("\nVigilancia detenida.")
+    return 0
 
-def crear_iconos_embebidos():
-    """Crea iconos embebidos para usar en el informe."""
-    from PIL import Image, ImageDraw
-    import io
+# Límites (en ms) de los intervalos del histograma de latencia del modo servicio
+LIMITES_LATENCIA_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
 
-    icons_data = {}
-    icon_size = (100,100)
-    transparent_bg = (255, 255, 255, 0)
+# Tamaño máximo del cuerpo de una solicitud al servicio
+MAX_BYTES_SOLICITUD = 256 * 1024 * 1024
 
-    # Icono de escudo (Detecciones Maliciosas)
-    shield_img = Image.new("RGBA", icon_size, transparent_bg)
-    draw = ImageDraw.Draw(shield_img)
-    draw.polygon([(50, 10), (20, 25), (20, 55), (50, 90), (80, 55), (80, 25)], fill=(255, 255, 255), outline=(0,0,0), width=3)
-    draw.polygon([(50, 20), (30, 30), (30, 55), (50, 80), (70, 55), (70, 30)], fill=(255, 20, 147))
-    shield_buffer = io.BytesIO()
-    shield_img.save(shield_buffer, format="PNG")
-    icons_data["shield"] = shield_buffer.getvalue()
+# Estado de cada proceso del pool del servicio, preparado por _iniciar_worker_servicio
+_servicio = None
 
-    # Icono de engranaje (Automatización)
-    gear_img = Image.new("RGBA", icon_size, transparent_bg)
-    draw = ImageDraw.Draw(gear_img)
-    draw.ellipse([(25, 25), (75, 75)], fill=(255, 255, 255), outline=(10,46,54), width=3)
-    draw.ellipse([(35, 35), (65, 65)], fill=(0, 229, 176))
-    for i in range(8):
-        angle = i * 45
-        if angle % 90 == 0: 
-             draw.rectangle([(45,10),(55,25)] if angle == 0 else [(45,75),(55,90)] if angle == 180 else 
-                            [(10,45),(25,55)] if angle == 270 else [(75,45),(90,55)], fill=(10,46,54))
-        elif angle % 45 == 0: 
-            if angle == 45: draw.rectangle([(68,22),(78,32)], fill=(10,46,54))
-            if angle == 135: draw.rectangle([(22,22),(32,32)], fill=(10,46,54))
-            if angle == 225: draw.rectangle([(22,68),(32,78)], fill=(10,46,54))
-            if angle == 315: draw.rectangle([(68,68),(78,78)], fill=(10,46,54))
-    gear_buffer = io.BytesIO()
-    gear_img.save(gear_buffer, format="PNG")
-    icons_data["gear"] = gear_buffer.getvalue()
+def _iniciar_worker_servicio(opciones):
+    """Prepara un proceso del pool del servicio: importa los módulos, registra las fuentes y crea los iconos.
 
-    # Icono de inventario (tres cubos)
-    inventory_img = Image.new("RGBA", icon_size, transparent_bg)
-    draw = ImageDraw.Draw(inventory_img)
-    cube_size = 30
-    top_cube_x, top_cube_y = 35, 20
-    bottom_left_x, bottom_left_y = 20, 50
-    bottom_right_x, bottom_right_y = 50, 50
-    draw.polygon([(top_cube_x, top_cube_y + cube_size//2), (top_cube_x + cube_size//2, top_cube_y), 
-                  (top_cube_x + cube_size, top_cube_y + cube_size//2), (top_cube_x + cube_size//2, top_cube_y + cube_size)], 
-                 fill=(255,127,80), outline=(0,0,0), width=2)
-    draw.polygon([(bottom_left_x, bottom_left_y + cube_size//2), (bottom_left_x + cube_size//2, bottom_left_y), 
-                  (bottom_left_x + cube_size, bottom_left_y + cube_size//2), (bottom_left_x + cube_size//2, bottom_left_y + cube_size)], 
-                 fill=(220,220,220), outline=(0,0,0), width=2)
-    draw.polygon([(bottom_right_x, bottom_right_y + cube_size//2), (bottom_right_x + cube_size//2, bottom_right_y), 
-                  (bottom_right_x + cube_size, bottom_right_y + cube_size//2), (bottom_right_x + cube_size//2, bottom_right_y + cube_size)], 
-                 fill=(220,220,220), outline=(0,0,0), width=2)
-    inventory_buffer = io.BytesIO()
-    inventory_img.save(inventory_buffer, format="PNG")
-    icons_data["inventory"] = inventory_buffer.getvalue()
+    Así cada solicitud solo paga la extracción y el renderizado.
+    """
+    global _servicio
+    # Solo para dejar los módulos cargados en el proceso
+    import fitz
+    import reportlab.platypus
 
-    # Icono de Severidad de Alertas (gráfico de barras)
-    alert_severity_img = Image.new("RGBA", icon_size, transparent_bg)
-    draw = ImageDraw.Draw(alert_severity_img)
-    bar_width = 15
-    bar_spacing = 5
-    max_bar_height = 70
-    draw.rectangle([(15, 90 - max_bar_height*0.8), (15+bar_width, 90)], fill=(255,0,0), outline=(0,0,0))
-    draw.rectangle([(15+bar_width+bar_spacing, 90 - max_bar_height*0.6), (15+2*bar_width+bar_spacing, 90)], fill=(255,165,0), outline=(0,0,0))
-    draw.rectangle([(15+2*bar_width+2*bar_spacing, 90 - max_bar_height*0.4), (15+3*bar_width+2*bar_spacing, 90)], fill=(255,255,0), outline=(0,0,0))
-    draw.rectangle([(15+3*bar_width+3*bar_spacing, 90 - max_bar_height*0.2), (15+4*bar_width+3*bar_spacing, 90)], fill=(0,128,0), outline=(0,0,0))
-    alert_severity_buffer = io.BytesIO()
-    alert_severity_img.save(alert_severity_buffer, format="PNG")
-    icons_data["alert_severity"] = alert_severity_buffer.getvalue()
+    registrar_fuentes_cynet()
+    _servicio = dict(opciones, iconos=preparar_iconos(opciones["iconos_vectoriales"], opciones["cache_dir"]))
 
-    return icons_data
+def _unificar_en_servicio(rutas_pdf, archivos):
+    """Tarea del pool del servicio: extrae los informes y devuelve (PDF unificado en bytes, errores).
 
-def registrar_fuentes_cynet():
-    """Registra fuentes personalizadas para el informe Cynet."""
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    import os
-    
-    fonts_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cynet_fonts")
-    os.makedirs(fonts_dir, exist_ok=True)
-    
-    font_files = {
-        "Segoe UI": {
-            "normal": "segoeui.ttf", "bold": "segoeuib.ttf",
-            "italic": "segoeuii.ttf", "bolditalic": "segoeuiz.ttf"
-        },
-        "Arial": {
-            "normal": "arial.ttf", "bold": "arialbd.ttf",
-            "italic": "ariali.ttf", "bolditalic": "arialbi.ttf"
-        },
-        "Roboto": {
-            "normal": "Roboto-Regular.ttf", "bold": "Roboto-Bold.ttf",
-            "italic": "Roboto-Italic.ttf", "bolditalic": "Roboto-BoldItalic.ttf"
-        }
+    rutas_pdf son informes del directorio de reportes; archivos son pares
+    (nombre, contenido) subidos, que se escriben en un directorio temporal
+    para extraerlos. Solo los informes del directorio se guardan en el
+    histórico. Si no se pudo extraer ningún informe, el PDF es None.
+    """
+    import tempfile
+
+    with tempfile.TemporaryDirectory(prefix="cynet_servicio_") as dir_tmp:
+        rutas = list(rutas_pdf)
+        for i, (nombre, contenido) in enumerate(archivos):
+            # Un subdirectorio por archivo: el nombre se conserva aunque se repita
+            ruta = os.path.join(dir_tmp, str(i), nombre)
+            os.makedirs(os.path.dirname(ruta))
+            with open(ruta, "wb") as f:
+                f.write(contenido)
+            rutas.append(ruta)
+        resultados = extraer_datos_lote(rutas, workers=1, dir_cache=_servicio["dir_cache"],
+                                        paginas=_servicio["paginas"], incluir_fuentes=_servicio["fuentes"],
+                                        backend=_servicio["backend"], timeout=_servicio["timeout"])
+
+    errores = [f"{os.path.basename(ruta)}: {error}" for ruta, (_, error) in zip(rutas, resultados) if error]
+    guardar_historico(_servicio["catalogo"], [(ruta, datos) for ruta, (datos, error)
+                                              in zip(rutas_pdf, resultados) if not error])
+    datos_todos = [datos for datos, error in resultados if not error]
+    if not datos_todos:
+        return None, errores
+    salida = BytesIO()
+    crear_informe_unificado(datos_todos, salida, _servicio["logo"], _servicio["iconos"])
+    return salida.getvalue(), errores
+
+def _archivos_multipart(tipo_contenido, cuerpo):
+    """Pares (nombre, contenido) de los PDFs de un cuerpo multipart/form-data."""
+    from email import policy
+    from email.parser import BytesParser
+
+    mensaje = BytesParser(policy=policy.HTTP).parsebytes(
+        b"Content-Type: " + tipo_contenido.encode("latin-1") + b"\r\n\r\n" + cuerpo)
+    archivos = []
+    for parte in mensaje.iter_parts():
+        nombre = os.path.basename((parte.get_filename() or "").replace("\\", "/"))
+        if nombre.lower().endswith(".pdf"):
+            archivos.append((nombre, parte.get_payload(decode=True)))
+    return archivos
+
+def crear_servidor(args, puerto):
+    """Crea el servidor HTTP del modo servicio, escuchando solo en 127.0.0.1.
+
+    El pool de procesos se arranca e inicializa antes de devolverlo. Rutas:
+
+    - POST /unificar: PDFs subidos como multipart/form-data; devuelve el PDF unificado.
+    - GET /unificar?periodo=...: informes del período en el directorio de reportes.
+    - GET /metricas: JSON con las solicitudes en curso y rechazadas y el
+      histograma de latencia por ruta.
+
+    Como mucho args.max_solicitudes solicitudes (por defecto, una por proceso)
+    se atienden a la vez; el resto recibe 503. puerto 0 elige uno libre.
+    Devuelve (servidor, executor); servidor.estadisticas es el registro que
+    expone /metricas.
+    """
+    import copy
+    import threading
+    from concurrent.futures import ProcessPoolExecutor
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlsplit, parse_qs
+
+    reports_dir = args.reports_dir or directorio_reportes_predeterminado()
+    workers = resolver_workers(args.workers) or os.cpu_count() or 1
+    limite = args.max_solicitudes or workers
+    opciones = {
+        "dir_cache": None if args.no_cache else args.cache_dir,
+        "cache_dir": args.cache_dir,
+        "catalogo": ruta_catalogo(args),
+        "paginas": args.paginas,
+        "fuentes": args.fuentes,
+        "backend": seleccionar_backend_texto(args.backend, args.config),
+        "timeout": args.timeout_pdftotext,
+        "iconos_vectoriales": args.iconos_vectoriales,
+        "logo": localizar_logo(),
     }
-    font_paths = []
-    if os.name == "nt":
-        font_paths.append(os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"))
-    else:
-        font_paths.extend([
-            "/usr/share/fonts", "/usr/local/share/fonts",
-            os.path.expanduser("~/.fonts"), os.path.expanduser("~/Library/Fonts")
-        ])
-    
-    registered_fonts = {}
-    for font_name_key, variants in font_files.items():
-        found_any_variant = False
-        for variant_name, file_name in variants.items():
-            for font_path_dir in font_paths:
-                full_path = os.path.join(font_path_dir, file_name)
-                if os.path.exists(full_path):
-                    try:
-                        font_id = f"{font_name_key}-{variant_name}"
-                        pdfmetrics.registerFont(TTFont(font_id, full_path))
-                        registered_fonts[variant_name] = font_id
-                        found_any_variant = True
-                    except Exception as e:
-                        print(f"Error registrando fuente {font_id}: {e}")
-            if found_any_variant and variant_name == "normal": 
-                 if "bold" in variants and not "bold" in registered_fonts:
-                     continue 
-        if found_any_variant and "normal" in registered_fonts and "bold" in registered_fonts:
-            break 
-            
-    if not ("normal" in registered_fonts and "bold" in registered_fonts):
-        print("Usando fuentes predeterminadas de ReportLab ya que no se encontraron todas las fuentes personalizadas.")
-        registered_fonts = {
-            "normal": "Helvetica", "bold": "Helvetica-Bold",
-            "italic": "Helvetica-Oblique", "bolditalic": "Helvetica-BoldOblique"
-        }
-    return registered_fonts
-
-def crear_informe_unificado(datos_todos, ruta_salida, ruta_logo, iconos=None):
-    """Crea un informe PDF unificado con estilo Cynet a partir de los datos extraídos."""
-    from reportlab.lib.pagesizes import letter, landscape
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-    from reportlab.lib.units import inch
-    from reportlab.graphics.shapes import Drawing, Rect
-    from PIL import Image as PILImage
-    import io
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker_servicio, initargs=(opciones,))
+    # Arrancar ya todos los procesos para que la primera solicitud no pague la inicialización
+    for futuro in [executor.submit(os.getpid) for _ in range(workers)]:
+        futuro.result()
 
-    cynet_blue = colors.Color(0/255, 102/255, 255/255)
-    cynet_dark = colors.Color(51/255, 51/255, 51/255)
-    cynet_light = colors.Color(240/255, 240/255, 240/255)
+    plazas = threading.BoundedSemaphore(limite)
+    bloqueo = threading.Lock()
+    estadisticas = {"limite": limite, "procesos": workers, "en_curso": 0, "rechazadas": 0,
+                    "limites_ms": list(LIMITES_LATENCIA_MS), "rutas": {}}
 
-    fonts = registrar_fuentes_cynet()
-    font_name = fonts.get("normal", "Helvetica")
-    font_name_bold = fonts.get("bold", "Helvetica-Bold")
+    def registrar_latencia(ruta, estado, milisegundos):
+        with bloqueo:
+            registro = estadisticas["rutas"].setdefault(ruta, {
+                "solicitudes": 0, "errores": 0, "suma_ms": 0.0, "max_ms": 0.0,
+                "histograma": [0] * (len(LIMITES_LATENCIA_MS) + 1)})
+            registro["solicitudes"] += 1
+            if estado >= 400:
+                registro["errores"] += 1
+            registro["suma_ms"] += milisegundos
+            registro["max_ms"] = max(registro["max_ms"], milisegundos)
+            # El último intervalo recoge las solicitudes más lentas que el último límite
+            registro["histograma"][sum(milisegundos > limite_ms for limite_ms in LIMITES_LATENCIA_MS)] += 1
 
-    doc = SimpleDocTemplate(ruta_salida, pagesize=landscape(letter),
-                          leftMargin=0.5*inch, rightMargin=0.5*inch,
-                          topMargin=0.75*inch, bottomMargin=0.75*inch)
-    estilos = getSampleStyleSheet()
-    estilo_titulo = ParagraphStyle("CynetTitle", parent=estilos["Heading1"], fontSize=22, fontName=font_name_bold, textColor=cynet_dark, alignment=0, spaceAfter=12)
-    estilo_encabezado = ParagraphStyle("CynetHeading", parent=estilos["Heading2"], fontSize=16, fontName=font_name_bold, textColor=cynet_dark, alignment=0, spaceAfter=6)
-    estilo_subencabezado = ParagraphStyle("CynetSubheading", parent=estilos["Heading3"], fontSize=14, fontName=font_name_bold, textColor=cynet_dark, spaceAfter=6)
-    estilo_normal = ParagraphStyle("CynetNormal", parent=estilos["Normal"], fontSize=10, fontName=font_name, textColor=cynet_dark)
+    def unificar(rutas_pdf, archivos, nombre_salida):
+        pdf, errores = executor.submit(_unificar_en_servicio, rutas_pdf, archivos).result()
+        if pdf is None:
+            return 422, {"error": "no se pudo extraer ningún informe", "errores": errores}, None
+        return 200, pdf, (nombre_salida, len(errores))
 
-    contenido = []
+    class ManejadorServicio(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/metricas":
+                with bloqueo:
+                    instantanea = copy.deepcopy(estadisticas)
+                self._responder(200, instantanea)
+            elif url.path == "/unificar":
+                self._atender("GET /unificar", lambda: self._unificar_periodo(parse_qs(url.query)))
+            else:
+                self._responder(404, {"error": f"ruta no encontrada: {url.path}"})
+
+        def do_POST(self):
+            if urlsplit(self.path).path == "/unificar":
+                self._atender("POST /unificar", self._unificar_subidos)
+            else:
+                self._responder(404, {"error": f"ruta no encontrada: {self.path}"})
+
+        def _unificar_periodo(self, parametros):
+            periodo = parametros.get("periodo", [None])[0]
+            if not periodo:
+                return 400, {"error": "falta el parámetro periodo"}, None
+            informes_por_periodo = informes_por_periodo_catalogo(raices_informes(args, reports_dir),
+                                                                 ruta_catalogo(args), **opciones_escaneo(args))
+            if periodo not in informes_por_periodo:
+                return 404, {"error": f"período no encontrado: {periodo}",
+                             "periodos": list(informes_por_periodo)}, None
+            return unificar([informe["archivo"] for informe in informes_por_periodo[periodo]], [],
+                            nombre_archivo_salida(periodo))
+
+        def _unificar_subidos(self):
+            longitud = int(self.headers.get("Content-Length") or 0)
+            if longitud > MAX_BYTES_SOLICITUD:
+                self.close_connection = True
+                return 413, {"error": f"la solicitud supera {MAX_BYTES_SOLICITUD} bytes"}, None
+            cuerpo = self.rfile.read(longitud)
+            tipo = self.headers.get("Content-Type", "")
+            if not tipo.startswith("multipart/form-data"):
+                return 415, {"error": "se esperaba multipart/form-data con los PDFs"}, None
+            archivos = _archivos_multipart(tipo, cuerpo)
+            if not archivos:
+                return 400, {"error": "la solicitud no contiene archivos PDF"}, None
+            return unificar([], archivos, "reporte_cynet_unificado.pdf")
+
+        def _atender(self, ruta, funcion):
+            if not plazas.acquire(blocking=False):
+                with bloqueo:
+                    estadisticas["rechazadas"] += 1
+                self.close_connection = True
+                self._responder(503, {"error": "servicio ocupado, reintente más tarde"}, {"Retry-After": "1"})
+                return
+            inicio = time.perf_counter()
+            with bloqueo:
+                estadisticas["en_curso"] += 1
+            estado = 500
+            try:
+                try:
+                    estado, contenido, descarga = funcion()
+                except Exception as e:
+                    estado, contenido, descarga = 500, {"error": f"{type(e).__name__}: {e}"}, None
+                cabeceras = None
+                if descarga:
+                    nombre_salida, con_error = descarga
+                    cabeceras = {"Content-Disposition": f'attachment; filename="{nombre_salida}"',
+                                 "X-Informes-Con-Error": str(con_error)}
+                self._responder(estado, contenido, cabeceras)
+            finally:
+                with bloqueo:
+                    estadisticas["en_curso"] -= 1
+                plazas.release()
+                registrar_latencia(ruta, estado, (time.perf_counter() - inicio) * 1000)
+
+        def _responder(self, estado, contenido, cabeceras=None):
+            if isinstance(contenido, bytes):
+                cuerpo, tipo = contenido, "application/pdf"
+            else:
+                cuerpo, tipo = json.dumps(contenido, ensure_ascii=False).encode("utf-8"), "application/json"
+            self.send_response(estado)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(cuerpo)))
+            for nombre, valor in (cabeceras or {}).items():
+                self.send_header(nombre, valor)
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), ManejadorServicio)
+    servidor.estadisticas = estadisticas
+    return servidor, executor
+
+def servir(args):
+    """Modo servicio: atiende solicitudes HTTP en 127.0.0.1 hasta Ctrl+C (ver crear_servidor)."""
+    verificar_instalar_dependencias()
+    servidor, executor = crear_servidor(args, args.servir)
+    host, puerto = servidor.server_address[:2]
+    print(f"Servicio escuchando en http://{host}:{puerto} ({servidor.estadisticas['procesos']} proceso(s), "
+          f"hasta {servidor.estadisticas['limite']} solicitud(es) a la vez). Ctrl+C para salir.")
     try:
-        img = PILImage.open(ruta_logo)
-        aspect_ratio = img.width / img.height
-        logo_width = 1.5*inch
-        logo_img = Image(ruta_logo, width=logo_width, height=logo_width / aspect_ratio)
-    except Exception as e:
-        print(f"Advertencia: No se pudo cargar el logo desde {ruta_logo}: {e}")
-        d = Drawing(1.5*inch, 0.5*inch)
-        d.add(Rect(0, 0, 1.5*inch, 0.5*inch, fillColor=cynet_blue))
-        logo_img = d
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServicio detenido.")
+    finally:
+        servidor.server_close()
+        executor.shutdown()
+    return 0
 
-    fecha_generacion = datetime.datetime.now().strftime("%d-%b-%Y")
-    datos_encabezado_tabla = [[logo_img, Paragraph("Executive Summary", estilo_titulo)], ["", Paragraph(f"Unified Report - Generated: {fecha_generacion}", estilo_normal)]]
-    tabla_encabezado = Table(datos_encabezado_tabla, colWidths=[2*inch, 8*inch])
-    tabla_encabezado.setStyle(TableStyle([("VALIGN", (0,0), (-1,-1), "MIDDLE"), ("ALIGN", (0,0), (0,-1), "LEFT"), ("ALIGN", (1,0), (1,-1), "LEFT"), ("BOTTOMPADDING", (0,0), (-1,-1), 12)]))
-    contenido.append(tabla_encabezado)
-    contenido.append(Spacer(1, 0.25*inch))
-
-    datos_resumen_header = ["Report", "Critical/High Alerts", "Handled Alerts", "Affected Files", "Remediated Files", "Affected Endpoints", "Auto. Investigations", "Response Actions", "Active Endpoints"]
-    datos_resumen = [datos_resumen_header]
-    for datos_pdf in datos_todos:
-        datos_resumen.append([
-            datos_pdf["resumen"]["nombre"],
-            datos_pdf["malicioso"]["alertas_activadas"],
-            datos_pdf["malicioso"]["alertas_manejadas"],
-            datos_pdf["malicioso"]["archivos_afectados"],
-            datos_pdf["malicioso"]["archivos_remediados"],
-            datos_pdf["malicioso"]["endpoints_afectados"],
-            datos_pdf["automatizacion"]["investigaciones_auto"],
-            datos_pdf["automatizacion"]["acciones_respuesta"],
-            datos_pdf["inventario"]["active_endpoints"]
-        ])
-
-    totales = ["TOTAL"]
-    for i in range(1, len(datos_resumen_header)):
-        try:
-            total_col = sum(int(fila[i]) for fila in datos_resumen[1:] if fila[i].isdigit())
-            totales.append(str(total_col))
-        except (ValueError, TypeError):
-            totales.append("N/A") 
-            
-    datos_resumen.append(totales)
-    page_width_actual = landscape(letter)[0] - 1*inch 
-    num_cols_summary = len(datos_resumen_header)
-    col_width_summary = page_width_actual / num_cols_summary
-    col_widths_summary = [col_width_summary] * num_cols_summary
-    col_widths_summary[0] = 2 * col_width_summary 
-    remaining_width_summary = page_width_actual - col_widths_summary[0]
-    other_col_width_summary = remaining_width_summary / (num_cols_summary -1)
-    for i in range(1, num_cols_summary):
-        col_widths_summary[i] = other_col_width_summary
-
-    tabla_resumen = Table(datos_resumen, repeatRows=1, colWidths=col_widths_summary)
-    tabla_resumen.setStyle(TableStyle([
-        ("BACKGROUND", (0,0), (-1,0), cynet_blue), ("TEXTCOLOR", (0,0), (-1,0), colors.white),
-        ("BACKGROUND", (0,-1), (-1,-1), cynet_light), ("ALIGN", (0,0), (-1,-1), "CENTER"),
-        ("FONTNAME", (0,0), (-1,0), font_name_bold), ("FONTNAME", (0,-1), (-1,-1), font_name_bold),
-        ("BOTTOMPADDING", (0,0), (-1,0), 12), ("GRID", (0,0), (-1,-1), 1, colors.black),
-        ("VALIGN", (0,0), (-1,-1), "MIDDLE"), ("FONTSIZE", (0,0), (-1,-1), 7), ("WORDWRAP", (0,0), (-1,-1), True)
-    ]))
-    contenido.append(Paragraph("Comparative Summary", estilo_encabezado))
-    contenido.append(Spacer(1, 0.1*inch))
-    contenido.append(tabla_resumen)
-    contenido.append(Spacer(1, 0.25*inch))
+def _rango_paginas(valor):
+    """Convierte 'N' o 'N-M' en una tupla (primera, última) de páginas."""
+    import argparse
 
-    icon_img_width = 0.4*inch
-    icon_img_height = 0.4*inch
-    shield_icon_img, gear_icon_img, inventory_icon_img, alert_severity_icon_img = "[ICON]", "[ICON]", "[ICON]", "[ICON]"
-    if iconos:
-        try:
-            shield_icon_img = Image(BytesIO(iconos.get("shield")), width=icon_img_width, height=icon_img_height) if iconos.get("shield") else "[ICON]"
-            gear_icon_img = Image(BytesIO(iconos.get("gear")), width=icon_img_width, height=icon_img_height) if iconos.get("gear") else "[ICON]"
-            inventory_icon_img = Image(BytesIO(iconos.get("inventory")), width=icon_img_width, height=icon_img_height) if iconos.get("inventory") else "[ICON]"
-            alert_severity_icon_img = Image(BytesIO(iconos.get("alert_severity")), width=icon_img_width, height=icon_img_height) if iconos.get("alert_severity") else "[ICON]"
-        except Exception as e:
-            print(f"Advertencia: No se pudieron cargar uno o más iconos desde los datos: {e}")
+    partes = valor.split("-")
+    try:
+        if len(partes) == 1:
+            primera = ultima = int(partes[0])
+        elif len(partes) == 2:
+            primera, ultima = int(partes[0]), int(partes[1])
+        else:
+            raise ValueError
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"rango de páginas no válido: {valor}")
+    if primera < 1 or ultima < primera:
+        raise argparse.ArgumentTypeError(f"rango de páginas no válido: {valor}")
+    return (primera, ultima)
 
-    for datos_pdf in datos_todos:
-        nombre_informe_detalle = datos_pdf["resumen"]["nombre"]
-        rango_fechas_detalle = datos_pdf["resumen"]["rango_fechas"]
-        generado_detalle = datos_pdf["resumen"]["generado"]
-        
-        datos_titulo_informe_detalle = [[Paragraph(f"Report: {nombre_informe_detalle}", estilo_encabezado)]]
-        tabla_titulo_informe_detalle = Table(datos_titulo_informe_detalle, colWidths=[page_width_actual])
-        tabla_titulo_informe_detalle.setStyle(TableStyle([("BACKGROUND",(0,0),(-1,-1),cynet_light),("VALIGN",(0,0),(-1,-1),"MIDDLE"),("ALIGN",(0,0),(-1,-1),"LEFT"),("LEFTPADDING",(0,0),(-1,-1),10),("RIGHTPADDING",(0,0),(-1,-1),10),("TOPPADDING",(0,0),(-1,-1),5),("BOTTOMPADDING",(0,0),(-1,-1),5)]))
-        contenido.append(tabla_titulo_informe_detalle)
-        contenido.append(Spacer(1, 0.1*inch))
-        contenido.append(Paragraph(f"Date Range: {rango_fechas_detalle}", estilo_normal))
-        contenido.append(Paragraph(f"Generated: {generado_detalle}", estilo_normal))
-        contenido.append(Spacer(1, 0.1*inch))
+def _fecha_argumento(valor):
+    """Valida una fecha AAAA-MM-DD de --desde/--hasta."""
+    import argparse
 
-        # Malicious Detections Section
-        datos_titulo_malicioso_detalle = [[shield_icon_img, Paragraph("Malicious Detections and Preventions", estilo_subencabezado)]]
-        tabla_titulo_malicioso_detalle = Table(datos_titulo_malicioso_detalle, colWidths=[0.5*inch, page_width_actual-0.5*inch])
-        tabla_titulo_malicioso_detalle.setStyle(TableStyle([("VALIGN",(0,0),(-1,-1),"MIDDLE"), ("ALIGN",(0,0),(0,-1),"CENTER"), ("ALIGN",(1,0),(1,-1),"LEFT"), ("LEFTPADDING",(0,0),(-1,-1),5), ("LINEABOVE",(0,0),(-1,0),2,cynet_blue)]))
-        contenido.append(tabla_titulo_malicioso_detalle)
-        contenido.append(Spacer(1, 0.1*inch))
-        datos_maliciosos_detalle = [
-            ["Metric", "Value"],
-            ["Critical/high alerts triggered", datos_pdf["malicioso"]["alertas_activadas"]],
-            ["Critical/high alerts handled", datos_pdf["malicioso"]["alertas_manejadas"]],
-            ["Affected files", datos_pdf["malicioso"]["archivos_afectados"]],
-            ["Remediated files", datos_pdf["malicioso"]["archivos_remediados"]],
-            ["Affected endpoints", datos_pdf["malicioso"]["endpoints_afectados"]]
-        ]
-        tabla_maliciosos_detalle = Table(datos_maliciosos_detalle, colWidths=[4*inch, 1*inch])
-        tabla_maliciosos_detalle.setStyle(TableStyle([("BACKGROUND",(0,0),(-1,0),cynet_blue),("TEXTCOLOR",(0,0),(-1,0),colors.white),("ALIGN",(0,0),(-1,-1),"LEFT"),("ALIGN",(1,0),(1,-1),"CENTER"),("FONTNAME",(0,0),(-1,0),font_name_bold),("BOTTOMPADDING",(0,0),(-1,0),12),("GRID",(0,0),(-1,-1),1,colors.black),("VALIGN",(0,0),(-1,-1),"MIDDLE")]))
-        contenido.append(tabla_maliciosos_detalle)
-        contenido.append(Spacer(1, 0.2*inch))
-
-        # Alert Count by Severity Section
-        datos_titulo_alert_severity_detalle = [[alert_severity_icon_img, Paragraph("Alert Count by Severity", estilo_subencabezado)]]
-        tabla_titulo_alert_severity_detalle = Table(datos_titulo_alert_severity_detalle, colWidths=[0.5*inch, page_width_actual-0.5*inch])
-        tabla_titulo_alert_severity_detalle.setStyle(TableStyle([("VALIGN",(0,0),(-1,-1),"MIDDLE"), ("ALIGN",(0,0),(0,-1),"CENTER"), ("ALIGN",(1,0),(1,-1),"LEFT"), ("LEFTPADDING",(0,0),(-1,-1),5), ("LINEABOVE",(0,0),(-1,0),2,cynet_blue)]))
-        contenido.append(tabla_titulo_alert_severity_detalle)
-        contenido.append(Spacer(1, 0.1*inch))
-        datos_alert_severity_detalle = [
-            ["Severity", "Count"],
-            ["Critical", datos_pdf["alert_severity_counts"]["critical"]],
-            ["High", datos_pdf["alert_severity_counts"]["high"]],
-            ["Medium", datos_pdf["alert_severity_counts"]["medium"]],
-            ["Low", datos_pdf["alert_severity_counts"]["low"]]
-        ]
-        tabla_alert_severity_detalle = Table(datos_alert_severity_detalle, colWidths=[4*inch, 1*inch])
-        tabla_alert_severity_detalle.setStyle(TableStyle([("BACKGROUND",(0,0),(-1,0),cynet_blue),("TEXTCOLOR",(0,0),(-1,0),colors.white),("ALIGN",(0,0),(-1,-1),"LEFT"),("ALIGN",(1,0),(1,-1),"CENTER"),("FONTNAME",(0,0),(-1,0),font_name_bold),("BOTTOMPADDING",(0,0),(-1,0),12),("GRID",(0,0),(-1,-1),1,colors.black),("VALIGN",(0,0),(-1,-1),"MIDDLE")]))
-        contenido.append(tabla_alert_severity_detalle)
-        contenido.append(Spacer(1, 0.2*inch))
-
-        # Automation Section
-        datos_titulo_auto_detalle = [[gear_icon_img, Paragraph("Automation", estilo_subencabezado)]]
-        tabla_titulo_auto_detalle = Table(datos_titulo_auto_detalle, colWidths=[0.5*inch, page_width_actual-0.5*inch])
-        tabla_titulo_auto_detalle.setStyle(TableStyle([("VALIGN",(0,0),(-1,-1),"MIDDLE"), ("ALIGN",(0,0),(0,-1),"CENTER"), ("ALIGN",(1,0),(1,-1),"LEFT"), ("LEFTPADDING",(0,0),(-1,-1),5), ("LINEABOVE",(0,0),(-1,0),2,cynet_blue)]))
-        contenido.append(tabla_titulo_auto_detalle)
-        contenido.append(Spacer(1, 0.1*inch))
-        datos_automatizacion_detalle = [
-            ["Metric", "Value"],
-            ["Automatic investigations", datos_pdf["automatizacion"]["investigaciones_auto"]],
-            ["Response actions", datos_pdf["automatizacion"]["acciones_respuesta"]]
-        ]
-        tabla_automatizacion_detalle = Table(datos_automatizacion_detalle, colWidths=[4*inch, 1*inch])
-        tabla_automatizacion_detalle.setStyle(TableStyle([("BACKGROUND",(0,0),(-1,0),cynet_blue),("TEXTCOLOR",(0,0),(-1,0),colors.white),("ALIGN",(0,0),(-1,-1),"LEFT"),("ALIGN",(1,0),(1,-1),"CENTER"),("FONTNAME",(0,0),(-1,0),font_name_bold),("BOTTOMPADDING",(0,0),(-1,0),12),("GRID",(0,0),(-1,-1),1,colors.black),("VALIGN",(0,0),(-1,-1),"MIDDLE")]))
-        contenido.append(tabla_automatizacion_detalle)
-        contenido.append(Spacer(1, 0.2*inch))
-        
-        # Inventory Section
-        datos_titulo_inventario_detalle = [[inventory_icon_img, Paragraph("Inventory", estilo_subencabezado)]]
-        tabla_titulo_inventario_detalle = Table(datos_titulo_inventario_detalle, colWidths=[0.5*inch, page_width_actual-0.5*inch])
-        tabla_titulo_inventario_detalle.setStyle(TableStyle([("VALIGN",(0,0),(-1,-1),"MIDDLE"), ("ALIGN",(0,0),(0,-1),"CENTER"), ("ALIGN",(1,0),(1,-1),"LEFT"), ("LEFTPADDING",(0,0),(-1,-1),5), ("LINEABOVE",(0,0),(-1,0),2,cynet_blue)]))
-        contenido.append(tabla_titulo_inventario_detalle)
-        contenido.append(Spacer(1, 0.1*inch))
-        datos_inventario_detalle = [
-            ["Metric", "Value"],
-            ["Active Endpoints", datos_pdf["inventario"]["active_endpoints"]]
-        ]
-        tabla_inventario_detalle = Table(datos_inventario_detalle, colWidths=[4*inch, 1*inch])
-        tabla_inventario_detalle.setStyle(TableStyle([("BACKGROUND",(0,0),(-1,0),cynet_blue),("TEXTCOLOR",(0,0),(-1,0),colors.white),("ALIGN",(0,0),(-1,-1),"LEFT"),("ALIGN",(1,0),(1,-1),"CENTER"),("FONTNAME",(0,0),(-1,0),font_name_bold),("BOTTOMPADDING",(0,0),(-1,0),12),("GRID",(0,0),(-1,-1),1,colors.black),("VALIGN",(0,0),(-1,-1),"MIDDLE")]))
-        contenido.append(tabla_inventario_detalle)
-        contenido.append(Spacer(1, 0.35*inch))
+    try:
+        return datetime.date.fromisoformat(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha no válida: {valor!r} (use AAAA-MM-DD)")
 
-    def pie_pagina(canvas, doc_obj):
-        canvas.saveState()
-        canvas.setFont(font_name, 8)
-        canvas.setFillColor(cynet_dark)
-        footer_text = f"Unified Cynet Report - Generated: {fecha_generacion}"
-        canvas.drawString(0.5*inch, 0.5*inch, footer_text)
-        canvas.drawRightString(landscape(letter)[0] - 0.5*inch, 0.5*inch, f"Page {doc_obj.page}")
-        canvas.restoreState()
-    
-    doc.build(contenido, onFirstPage=pie_pagina, onLaterPages=pie_pagina)
-    return ruta_salida
+def texto_rango_fechas(args):
+    """Descripción del rango --desde/--hasta para los mensajes, o cadena vacía."""
+    if args.desde and args.hasta:
+        return f" entre {args.desde} y {args.hasta}"
+    if args.desde:
+        return f" desde {args.desde}"
+    if args.hasta:
+        return f" hasta {args.hasta}"
+    return ""
+
+def _ruta_exportacion(valor):
+    """Valida la extensión de un archivo de --exportar."""
+    import argparse
+    import importlib.util
+
+    extension = os.path.splitext(valor)[1].lower()
+    if extension not in FORMATOS_EXPORTACION:
+        raise argparse.ArgumentTypeError(
+            f"formato de exportación no soportado: {valor} (use {', '.join(FORMATOS_EXPORTACION)})")
+    if extension == ".parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise argparse.ArgumentTypeError("la exportación a Parquet requiere pyarrow (pip install pyarrow)")
+    return valor
+
+def parsear_argumentos(argv=None):
+    """Analiza las opciones de línea de comandos."""
+    import argparse
 
-def main():
+    parser = argparse.ArgumentParser(description="Unificador de reportes Cynet PDF.")
+    parser.add_argument("--reports-dir", default=None,
+                        help="Directorio con los informes (por defecto, Cynet_Reports)")
+    parser.add_argument("--raiz", action="append", default=[], metavar="DIRECTORIO",
+                        help="Directorio adicional con informes; se puede repetir")
+    parser.add_argument("--recursivo", action="store_true",
+                        help="Buscar informes también en los subdirectorios")
+    parser.add_argument("--incluir", action="append", default=[], metavar="PATRÓN",
+                        help="Considerar solo los informes cuya ruta relativa coincide con el patrón "
+                             "(por ejemplo, '2025/*'); se puede repetir")
+    parser.add_argument("--excluir", action="append", default=[], metavar="PATRÓN",
+                        help="Descartar los informes, paquetes y directorios cuya ruta relativa coincide "
+                             "con el patrón; se puede repetir")
+    parser.add_argument("--output-dir", default=None,
+                        help="Directorio de salida en modo lote (por defecto, el de los informes)")
+    grupo_periodos = parser.add_mutually_exclusive_group()
+    grupo_periodos.add_argument("--all-periods", action="store_true",
+                                help="Modo lote: generar el reporte de todos los períodos sin preguntar")
+    grupo_periodos.add_argument("--periodos", nargs="+", default=None, metavar="PERIODO",
+                                help='Modo lote: generar solo estos períodos (ej: "Marzo a Abril 2025")')
+    grupo_periodos.add_argument("--watch", action="store_true",
+                                help="Vigilar el directorio y regenerar los períodos con informes nuevos o modificados")
+    grupo_periodos.add_argument("--tendencias", default=None, metavar="ARCHIVO",
+                                help="Generar un PDF con la evolución mensual de cada tenant a partir del "
+                                     "histórico, sin leer los informes")
+    grupo_periodos.add_argument("--servir", type=int, default=None, metavar="PUERTO",
+                                help="Modo servicio: atender solicitudes HTTP en 127.0.0.1:PUERTO con un pool de "
+                                     "procesos ya inicializado")
+    parser.add_argument("--max-solicitudes", type=int, default=None, metavar="N",
+                        help="Solicitudes atendidas a la vez en modo --servir; el resto recibe 503 "
+                             "(por defecto, una por proceso)")
+    parser.add_argument("--meses", type=int, default=12,
+                        help="Meses de la tendencia si no se indica --desde (por defecto: 12)")
+    parser.add_argument("--intervalo", type=float, default=5.0,
+                        help="Segundos entre recorridos del directorio en modo --watch (por defecto: 5)")
+    parser.add_argument("--debounce", type=float, default=10.0,
+                        help="Segundos sin cambios antes de regenerar en modo --watch (por defecto: 10)")
+    parser.add_argument("--desde", type=_fecha_argumento, default=None, metavar="AAAA-MM-DD",
+                        help="Considerar solo los informes cuyo rango de fechas termina en esta fecha o después")
+    parser.add_argument("--hasta", type=_fecha_argumento, default=None, metavar="AAAA-MM-DD",
+                        help="Considerar solo los informes cuyo rango de fechas empieza en esta fecha o antes")
+    parser.add_argument("--catalogo", default=None, metavar="ARCHIVO",
+                        help=f"Catálogo SQLite de informes (por defecto, {NOMBRE_CATALOGO} en el directorio de la caché)")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerar los reportes aunque sus entradas no hayan cambiado")
+    parser.add_argument("--iconos-vectoriales", action="store_true",
+                        help="Dibujar los iconos como gráficos vectoriales de ReportLab en lugar de PNG")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Número de procesos (por defecto, núcleos disponibles o CYNET_WORKERS)")
+    parser.add_argument("--fragmentos", type=int, default=None, metavar="N",
+                        help="Renderizar el detalle de cada reporte en N fragmentos en paralelo y unirlos "
+                             "(para cientos de informes por período)")
+    parser.add_argument("--flujo", action="store_true",
+                        help="Extraer y renderizar en flujo, solapando ambas etapas con memoria acotada "
+                             "(para miles de informes por período)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="No leer ni escribir la caché de datos extraídos")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="Vaciar la caché de datos extraídos antes de procesar")
+    parser.add_argument("--cache-dir", default=DIR_CACHE_PREDETERMINADO,
+                        help=f"Directorio de la caché (por defecto: {DIR_CACHE_PREDETERMINADO})")
+    parser.add_argument("--paginas", type=_rango_paginas, default=None, metavar="PRIMERA-ULTIMA",
+                        help="Convertir solo este rango de páginas de cada informe (ej: 1-3)")
+    parser.add_argument("--fuentes", action="store_true",
+                        help="Listar las fuentes usadas en cada PDF (requiere abrirlo con PyMuPDF)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS_EXTRACCION), default=None,
+                        help="Backend de extracción de datos (por defecto, el calibrado o el disponible)")
+    parser.add_argument("--timeout-pdftotext", type=float, default=TIMEOUT_PDFTOTEXT, metavar="SEGUNDOS",
+                        help="Tiempo máximo de pdftotext por archivo antes de usar PyMuPDF "
+                             f"(por defecto, {TIMEOUT_PDFTOTEXT})")
+    parser.add_argument("--exportar", type=_ruta_exportacion, action="append", default=[], metavar="ARCHIVO",
+                        help="Exportar los datos de cada informe y la fila TOTAL a CSV, JSONL o Parquet "
+                             "según la extensión (puede repetirse)")
+    parser.add_argument("--solo-exportar", action="store_true",
+                        help="Con --exportar, no generar el PDF unificado")
+    parser.add_argument("--profile", default=None, metavar="ARCHIVO",
+                        help="Medir el tiempo de cada etapa y de cada archivo y guardar las métricas en "
+                             "JSON (o CSV si la extensión es .csv)")
+    parser.add_argument("--cprofile", default=None, metavar="ARCHIVO",
+                        help="Guardar además un perfil de cProfile (ver con python -m pstats ARCHIVO)")
+    parser.add_argument("--calibrar", action="store_true",
+                        help="Medir los backends de texto sobre una muestra de informes, guardar el más rápido y salir")
+    parser.add_argument("--config", default=RUTA_CONFIG_PREDETERMINADA,
+                        help=f"Archivo de configuración (por defecto: {RUTA_CONFIG_PREDETERMINADA})")
+    args = parser.parse_args(argv)
+    if args.solo_exportar and not args.exportar:
+        parser.error("--solo-exportar requiere --exportar")
+    if args.flujo and (args.fragmentos or args.exportar):
+        parser.error("--flujo no se puede combinar con --fragmentos ni con --exportar")
+    if args.servir is not None and not 0 <= args.servir <= 65535:
+        parser.error("--servir: el puerto debe estar entre 0 y 65535")
+    if args.max_solicitudes is not None and args.max_solicitudes < 1:
+        parser.error("--max-solicitudes debe ser al menos 1")
+    for raiz in args.raiz:
+        if not os.path.isdir(raiz):
+            parser.error(f"--raiz: el directorio no existe: {raiz}")
+    if args.timeout_pdftotext <= 0:
+        parser.error("--timeout-pdftotext debe ser mayor que 0")
+    if args.meses < 1:
+        parser.error("--meses debe ser al menos 1")
+    if args.watch and args.exportar:
+        parser.error("--exportar no está disponible en modo --watch")
+    if args.desde and args.hasta and args.desde > args.hasta:
+        parser.error("--desde debe ser anterior o igual a --hasta")
+    if args.watch and (args.desde or args.hasta):
+        parser.error("--desde y --hasta no están disponibles en modo --watch")
+    return args
+
+def main(args=None):
     """Función principal que ejecuta el proceso completo."""
+    if args is None:
+        args = parsear_argumentos()
+
     print("=" * 80)
     print("  UNIFICADOR DE REPORTES CYNET PDF - v8.0 (Selección por Período)")
     print("=" * 80)
@@ -528,9 +3700,10 @@ def main():
     print("Extrae información específica y la presenta en un formato consolidado.\n")
     
     verificar_instalar_dependencias()
-    
-    import fitz  # PyMuPDF
-    from datetime import datetime
+
+    if args.clear_cache:
+        eliminadas = limpiar_cache(args.cache_dir)
+        print(f"Caché vaciada: {eliminadas} entrada(s) eliminada(s) de {args.cache_dir}")
     
     # Configurar codificación para consolas Windows
     if os.name == "nt":
@@ -541,11 +3714,7 @@ def main():
             pass
     
     # Definir ruta predeterminada según el sistema operativo
-    if os.name == "nt":  # Windows
-        reports_dir = r"C:\Cynet_Reports"
-    else:  # Linux/Mac
-        home_dir = os.path.expanduser("~")
-        reports_dir = os.path.join(home_dir, "Cynet_Reports")
+    reports_dir = args.reports_dir or directorio_reportes_predeterminado()
     
     # Verificar si existe el directorio de reportes
     if not os.path.exists(reports_dir):
@@ -599,109 +3768,32 @@ def main():
             else:
                 print("Opción no válida. Por favor, elija C, E o X.")
     
-    # Buscar archivos PDF en el directorio
-    pdf_files = glob.glob(os.path.join(reports_dir, "*.pdf"))
-    
-    if not pdf_files:
-        print(f"No se encontraron archivos PDF en {reports_dir}")
-        print(f"Por favor, coloque los archivos PDF de Cynet en: {reports_dir}")
-        print("\nPresione Enter para salir...")
-        input()
-        return
-    
-    # Analizar los períodos disponibles en los archivos
+    if args.calibrar:
+        print()
+        sys.exit(ejecutar_calibracion(args, reports_dir))
+
+    # Analizar los períodos disponibles usando el catálogo de informes
     print("\nAnalizando archivos PDF encontrados...")
-    
-    # Patrón para extraer fechas del nombre del archivo
-    # Ejemplo: ExecutiveReport_Demo-Console---AIO---SignUp---SaaS_8-Mar-2025---8-Apr-2025.pdf
-    patron_fecha = r"(\d+-[A-Za-z]+-\d+)---(\d+-[A-Za-z]+-\d+)"
-    
-    # Lista para almacenar información de los períodos
-    informes_disponibles = []
-    
-    # Diccionario para traducir nombres de meses
-    meses_completos = {
-        "Jan": "Enero", "Feb": "Febrero", "Mar": "Marzo", "Apr": "Abril",
-        "May": "Mayo", "Jun": "Junio", "Jul": "Julio", "Aug": "Agosto",
-        "Sep": "Septiembre", "Oct": "Octubre", "Nov": "Noviembre", "Dec": "Diciembre"
-    }
-    
-    for archivo in pdf_files:
-        nombre_archivo = os.path.basename(archivo)
-        match = re.search(patron_fecha, nombre_archivo)
-        
-        if match:
-            fecha_inicio = match.group(1)  # 8-Mar-2025
-            fecha_fin = match.group(2)     # 8-Apr-2025
-            
-            # Extraer componentes de las fechas
-            try:
-                dia_inicio, mes_inicio_abr, año_inicio = fecha_inicio.split("-")
-                dia_fin, mes_fin_abr, año_fin = fecha_fin.split("-")
-                
-                # Convertir a nombres completos de meses en español
-                mes_inicio = meses_completos.get(mes_inicio_abr, mes_inicio_abr)
-                mes_fin = meses_completos.get(mes_fin_abr, mes_fin_abr)
-                
-                # Crear descripción del período
-                if mes_inicio == mes_fin and año_inicio == año_fin:
-                    periodo = f"{mes_inicio} {año_inicio}"
-                elif año_inicio == año_fin:
-                    periodo = f"{mes_inicio} a {mes_fin} {año_inicio}"
-                else:
-                    periodo = f"{mes_inicio} {año_inicio} a {mes_fin} {año_fin}"
-                
-                # Almacenar información del informe
-                informes_disponibles.append({
-                    "archivo": archivo,
-                    "periodo": periodo,
-                    "fecha_inicio": fecha_inicio,
-                    "fecha_fin": fecha_fin,
-                    "nombre_archivo": nombre_archivo
-                })
-            except ValueError:
-                # Si hay un error al procesar las fechas, omitir este archivo
-                continue
-    
-    if not informes_disponibles:
-        print("No se encontraron archivos con el formato de nombre esperado.")
-        print("Los archivos deben tener un formato como: ExecutiveReport_Nombre_8-Mar-2025---8-Apr-2025.pdf")
+    raices = raices_informes(args, reports_dir)
+    informes_por_periodo = informes_por_periodo_catalogo(raices, ruta_catalogo(args), args.desde, args.hasta,
+                                                         **opciones_escaneo(args))
+
+    # Sin informes en el rango: se distingue si los hay fuera de él, como en el modo por lotes
+    if not informes_por_periodo:
+        if _escanear_informes(raices, **opciones_escaneo(args)):
+            print(f"No se encontraron informes{texto_rango_fechas(args)} en {', '.join(raices)}.")
+        else:
+            print(f"No se encontraron informes con el formato de nombre esperado en {', '.join(raices)}")
+            print("Los archivos deben tener un formato como: ExecutiveReport_Nombre_8-Mar-2025---8-Apr-2025.pdf")
+            print(f"Por favor, coloque los archivos PDF de Cynet en: {reports_dir}")
         print("\nPresione Enter para salir...")
         input()
         return
     
-    # Agrupar informes por período
-    informes_por_periodo = {}
-    for informe in informes_disponibles:
-        periodo = informe["periodo"]
-        if periodo not in informes_por_periodo:
-            informes_por_periodo[periodo] = []
-        informes_por_periodo[periodo].append(informe)
-    
-    # Mostrar períodos disponibles
-    print("\nPeríodos disponibles en los reportes:")
+    # Mostrar períodos disponibles (el catálogo los devuelve en orden cronológico)
+    print(f"\nPeríodos disponibles en los reportes{texto_rango_fechas(args)}:")
     periodos = list(informes_por_periodo.keys())
     
-    # Tratar de ordenar los períodos cronológicamente
-    def get_sort_key(periodo):
-        # Intentar extraer año y mes para ordenar
-        if " a " in periodo:
-            # Para períodos como "Marzo a Abril 2025"
-            partes = periodo.split(" a ")
-            if len(partes) == 2:
-                inicio = partes[0]
-                if " " in inicio:
-                    mes, año = inicio.rsplit(" ", 1)
-                    try:
-                        año = int(año)
-                        mes_idx = list(meses_completos.values()).index(mes) if mes in meses_completos.values() else 0
-                        return año * 100 + mes_idx
-                    except (ValueError, IndexError):
-                        pass
-        return periodo  # Si no podemos analizar, usar el texto completo
-    
-    periodos.sort(key=get_sort_key)
-    
     for i, periodo in enumerate(periodos):
         cantidad = len(informes_por_periodo[periodo])
         print(f"  {i+1}. {periodo} ({cantidad} reportes)")
@@ -728,71 +3820,109 @@ def main():
     for i, informe in enumerate(informes_seleccionados):
         print(f"  {i+1}. {informe['nombre_archivo']}")
     
+    # Si el reporte ya se generó con estos mismos archivos, no hace falta repetirlo
+    manifiesto = cargar_manifiesto(reports_dir)
+    actualizar_firmas(manifiesto, rutas_pdf)
+    ruta_existente = os.path.join(reports_dir, nombre_archivo_salida(periodo_seleccionado))
+    vigente = not args.force and periodo_vigente(manifiesto, periodo_seleccionado, informes_seleccionados,
+                                                 reports_dir, version_render_opciones(args),
+                                                 version_extraccion_opciones(args))
+    if vigente and not args.exportar:
+        print(f"\n✓ El reporte de {periodo_seleccionado} ya está actualizado: {os.path.abspath(ruta_existente)}")
+        print("Use --force para regenerarlo.")
+        print("\nPresione Enter para salir...")
+        input()
+        return
+
     # Verificar si el logo de Cynet existe
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    logo_path = os.path.join(script_dir, "cynet_logo.png")
-    
-    if not os.path.exists(logo_path):
-        print("\nLogo de Cynet no encontrado, buscando en ubicaciones alternativas...")
-        # Buscar en ubicaciones alternativas
-        alt_locations = [
-            os.path.join(os.path.dirname(script_dir), "cynet_logo.png"),
-            os.path.join(os.path.dirname(script_dir), "cynet_style", "cynet_logo.png"),
-            os.path.join(script_dir, "cynet_style", "cynet_logo.png"),
-            os.path.join(script_dir, "cynet_icons", "cynet_logo_blue.png")
-        ]
-        
-        for loc in alt_locations:
-            if os.path.exists(loc):
-                logo_path = loc
-                print(f"Logo encontrado en: {logo_path}")
-                break
-        
-        if not os.path.exists(logo_path):
-            print("Advertencia: Logo de Cynet no encontrado. El reporte será generado sin logo.")
-            # Usar un placeholder para el logo
-            from PIL import Image, ImageDraw
-            
-            # Crear logo placeholder
-            img = Image.new("RGB", (300, 100), color=(0, 102, 255))
-            d = ImageDraw.Draw(img)
-            d.text((20, 40), "CYNET", fill=(255, 255, 255))
-            
-            # Guardar logo placeholder
-            os.makedirs(os.path.dirname(logo_path), exist_ok=True)
-            img.save(logo_path)
-            print(f"Logo temporal creado en: {logo_path}")
+    logo_path = localizar_logo()
     
     # Crear iconos embebidos
     print("\nCreando iconos...")
-    try:
-        iconos = crear_iconos_embebidos()
+    iconos = preparar_iconos(args.iconos_vectoriales, args.cache_dir)
+    if iconos:
         print("Iconos creados exitosamente.")
-    except Exception as e:
-        print(f"Advertencia: No se pudieron crear los iconos: {e}")
-        iconos = None
     
     # Definir ruta de salida automáticamente con el período en el nombre
-    # Reemplazar espacios y caracteres especiales para el nombre de archivo
-    nombre_periodo = periodo_seleccionado.replace(" ", "_").replace("/", "-")
-    ruta_salida = os.path.join(reports_dir, f"reporte_cynet_unificado_{nombre_periodo}.pdf")
+    ruta_salida = os.path.join(reports_dir, nombre_archivo_salida(periodo_seleccionado))
     
+    # Extraer datos de todos los PDFs en paralelo (--workers o CYNET_WORKERS limitan los procesos)
+    workers = resolver_workers(args.workers)
+    if args.flujo:
+        print("\nProcesando archivos PDF y creando el reporte unificado en flujo...")
+        fallos = _generar_periodos_en_flujo([periodo_seleccionado], informes_por_periodo, args, reports_dir,
+                                            logo_path, iconos, workers, manifiesto=manifiesto)
+        if not fallos:
+            print(f"\n✓ ¡Proceso completado exitosamente!")
+        print("\nPresione Enter para salir...")
+        input()
+        return
+
     print("\nProcesando archivos PDF...")
     
-    # Extraer datos de todos los PDFs
+    dir_cache = None if args.no_cache else args.cache_dir
+    backend = seleccionar_backend_texto(args.backend, args.config)
+    al_completar = finalizar_exportacion = None
+    if args.exportar:
+        al_completar, finalizar_exportacion = preparar_exportacion(args.exportar, informes_por_periodo,
+                                                                   [periodo_seleccionado])
+    try:
+        resultados = extraer_datos_lote(rutas_pdf, workers=workers, dir_cache=dir_cache,
+                                        paginas=args.paginas, incluir_fuentes=args.fuentes,
+                                        backend=backend, al_completar=al_completar,
+                                        timeout=args.timeout_pdftotext)
+    finally:
+        if finalizar_exportacion:
+            finalizar_exportacion()
+
     todos_datos = []
-    for ruta in rutas_pdf:
+    archivos_fallidos = []
+    for ruta, (datos, error) in zip(rutas_pdf, resultados):
         print(f"Extrayendo datos de: {os.path.basename(ruta)}")
-        datos = extraer_datos_pdf(ruta)
+        if error:
+            print(f"Error extrayendo datos de {os.path.basename(ruta)}: {error}")
+            archivos_fallidos.append(ruta)
+            continue
         todos_datos.append(datos)
-        
+
         # Mostrar las fuentes encontradas (si están disponibles)
-        if "fonts" in datos:
+        if datos.get("fonts"):
             print(f"Fuentes encontradas en {os.path.basename(ruta)}: {', '.join(datos['fonts'])}")
-    
+
+    if archivos_fallidos:
+        print(f"\nAdvertencia: {len(archivos_fallidos)} archivo(s) no se pudieron procesar y se omitirán del reporte.")
+    guardar_historico(ruta_catalogo(args), [(ruta, datos) for ruta, (datos, error) in zip(rutas_pdf, resultados)
+                                            if not error])
+
+    if not todos_datos:
+        print("No se pudo extraer datos de ningún archivo del período seleccionado.")
+        print("\nPresione Enter para salir...")
+        input()
+        return
+
+    if args.solo_exportar or vigente:
+        if vigente:
+            print(f"\n✓ El reporte de {periodo_seleccionado} ya está actualizado: {os.path.abspath(ruta_existente)}")
+        print("\nPresione Enter para salir...")
+        input()
+        return
+
     # Crear informe unificado con estilo Cynet
     print("\nCreando reporte unificado con la marca Cynet...")
-    ruta_final = crear_informe_unificado(todos_datos, ruta_salida, logo_path, iconos)
+    if args.fragmentos:
+        ruta_final = crear_informe_unificado_fragmentado(todos_datos, ruta_salida, logo_path, iconos,
+                                                         args.fragmentos, workers)
+    else:
+        ruta_final = crear_informe_unificado(todos_datos, ruta_salida, logo_path, iconos)
+    manifiesto["salidas"][nombre_archivo_salida(periodo_seleccionado)] = {
+        "periodo": periodo_seleccionado,
+        "entradas": _entradas_periodo(manifiesto, informes_seleccionados),
+        "digest_datos": _digest_datos(todos_datos),
+        "version_render": version_render_opciones(args),
+        "version_extraccion": version_extraccion_opciones(args),
+        "generado": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    guardar_manifiesto(reports_dir, manifiesto)
     
     print(f"\n✓ ¡Proceso completado exitosamente!")
     print(f"El reporte unificado de Cynet ha sido guardado en: {os.path.abspath(ruta_final)}")
@@ -800,12 +3930,52 @@ def main():
     print("\nPresione Enter para salir...")
     input()
 
+def iniciar_perfil(args):
+    """Activa las métricas (--profile) y cProfile (--cprofile); devuelve el perfilador o None."""
+    if args.profile or args.cprofile:
+        activar_metricas()
+    if not args.cprofile:
+        return None
+    import cProfile
+
+    perfilador = cProfile.Profile()
+    perfilador.enable()
+    return perfilador
+
+def finalizar_perfil(args, perfilador, inicio):
+    """Guarda las métricas y el perfil de cProfile pedidos en la línea de comandos."""
+    if _metricas is None:
+        return
+    _metricas["total_segundos"] = time.perf_counter() - inicio
+    if perfilador is not None:
+        perfilador.disable()
+        perfilador.dump_stats(args.cprofile)
+        print(f"Perfil de cProfile guardado en: {os.path.abspath(args.cprofile)}")
+    if args.profile:
+        guardar_metricas(args.profile)
+        print("\n" + resumen_metricas())
+        print(f"Métricas guardadas en: {os.path.abspath(args.profile)}")
+
 if __name__ == "__main__":
+    args = parsear_argumentos()
+    inicio_ejecucion = time.perf_counter()
+    perfilador = iniciar_perfil(args)
     try:
-        main()
-    except Exception as e:
-        print(f"\nError: {str(e)}")
-        print("\nSe produjo un error inesperado. Por favor, intente nuevamente.")
-        print("Si el problema persiste, contacte al equipo de Optimus.")
-        print("\nPresione Enter para salir...")
-        input()
\ No newline at end of file
+        if args.watch:
+            sys.exit(vigilar_directorio(args))
+        if args.servir is not None:
+            sys.exit(servir(args))
+        if args.tendencias:
+            sys.exit(generar_tendencias(args))
+        if args.all_periods or args.periodos:
+            sys.exit(ejecutar_lote(args))
+        try:
+            main(args)
+        except Exception as e:
+            print(f"\nError: {str(e)}")
+            print("\nSe produjo un error inesperado. Por favor, intente nuevamente.")
+            print("Si el problema persiste, contacte al equipo de Optimus.")
+            print("\nPresione Enter para salir...")
+            input()
+    finally:
+        finalizar_perfil(args, perfilador, inicio_ejecucion)
\ No newline at end of file
@@ -0,0 +1,191 @@
+import os
+import sys
+import random
+import argparse
+import datetime
+
+MESES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+SEVERIDADES = ["Critical", "High", "Medium", "Low"]
+
+
+def _fecha_informe(fecha):
+    """Fecha con el formato de los informes Cynet: 1-Mar-2025."""
+    return f"{fecha.day}-{MESES[fecha.month - 1]}-{fecha.year}"
+
+
+def periodo_sintetico(indice, anio=2025):
+    """Primer y último día del mes número indice contando desde enero de anio."""
+    anio += indice // 12
+    mes = indice % 12 + 1
+    inicio = datetime.date(anio, mes, 1)
+    siguiente = datetime.date(anio + mes // 12, mes % 12 + 1, 1)
+    return inicio, siguiente - datetime.timedelta(days=1)
+
+
+def datos_sinteticos(indice, periodo=0, semilla=0, separador_miles=False):
+    """Datos de un informe sintético con la estructura que devuelve extraer_datos_pdf.
+
+    Los valores son cadenas tal como se escriben en el PDF (con separador de
+    miles si se pide), de modo que sirven para comprobar la extracción.
+    """
+    r = random.Random(f"{semilla}-{periodo}-{indice}")
+    inicio, fin = periodo_sintetico(periodo)
+    numero = (lambda v: f"{v:,}") if separador_miles else str
+    v = [r.randint(0, 25000) for _ in range(12)]
+    return {
+        "resumen": {
+            "nombre": f"Tenant-{indice:04d}",
+            "rango_fechas": f"{_fecha_informe(inicio)} - {_fecha_informe(fin)}",
+            "generado": _fecha_informe(fin + datetime.timedelta(days=1)),
+        },
+        "malicioso": {
+            "alertas_activadas": numero(v[0]), "alertas_manejadas": numero(v[1]),
+            "archivos_afectados": numero(v[2]), "archivos_remediados": numero(v[3]),
+            "endpoints_afectados": numero(v[4]),
+        },
+        "automatizacion": {"investigaciones_auto": numero(v[5]), "acciones_respuesta": numero(v[6])},
+        "inventario": {"active_endpoints": numero(v[7])},
+        "alert_severity_counts": {s.lower(): numero(valor) for s, valor in zip(SEVERIDADES, v[8:])},
+    }
+
+
+def nombre_archivo_informe(datos):
+    """Nombre ExecutiveReport_<nombre>_<inicio>---<fin>.pdf de un informe sintético."""
+    inicio, fin = datos["resumen"]["rango_fechas"].split(" - ")
+    return f"ExecutiveReport_{datos['resumen']['nombre']}_{inicio}---{fin}.pdf"
+
+
+# Etiquetas partidas en líneas como en las tarjetas de los informes reales
+ETIQUETAS_TARJETAS = {
+    "alertas_activadas": "Critical and\nhigh alerts\nwere triggered",
+    "alertas_manejadas": "Critical and\nhigh alerts\nwere handled",
+    "archivos_afectados": "Affected files",
+    "archivos_remediados": "Remediated files",
+    "endpoints_afectados": "Affected\nendpoints",
+    "investigaciones_auto": "Automatic\ninvestigations",
+    "acciones_respuesta": "Response actions",
+    "active_endpoints": "Active Endpoints",
+}
+
+
+def generar_informe(ruta_pdf, datos, paginas_relleno=0, semilla=0, tarjetas=False):
+    """Escribe con ReportLab un informe ejecutivo con las secciones que analiza el unificador.
+
+    Con tarjetas=True las cifras de cada sección van en una fila de tarjetas
+    (cifra encima y etiqueta en varias líneas debajo) y el encabezado del
+    informe es una fila de etiquetas con sus valores debajo, en columnas.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen.canvas import Canvas
+
+    r = random.Random(f"{semilla}-{datos['resumen']['nombre']}")
+    ancho, alto = letter
+    c = Canvas(ruta_pdf, pagesize=letter)
+    y = [alto - 60]
+
+    def linea(texto, fuente="Helvetica", tamano=10, salto=16):
+        if y[0] < 60:
+            c.showPage()
+            y[0] = alto - 60
+        c.setFont(fuente, tamano)
+        c.drawString(50, y[0], texto)
+        y[0] -= salto
+
+    def seccion(titulo):
+        y[0] -= 8
+        linea(titulo, "Helvetica-Bold", 13, 20)
+
+    def cifras(valores):
+        if not tarjetas:
+            for campo, valor in valores.items():
+                linea(f"{valor}   {ETIQUETAS_TARJETAS[campo].replace(chr(10), ' ')}")
+            return
+        for k, (campo, valor) in enumerate(valores.items()):
+            c.setFont("Helvetica-Bold", 14)
+            c.drawString(50 + 105 * k, y[0], valor)
+            c.setFont("Helvetica", 9)
+            for j, parte in enumerate(ETIQUETAS_TARJETAS[campo].split("\n")):
+                c.drawString(50 + 105 * k, y[0] - 16 - 11 * j, parte)
+        y[0] -= 56
+
+    linea("Executive Report", "Helvetica-Bold", 20, 30)
+    resumen = [("Group Name", datos["resumen"]["nombre"]), ("Date Range", datos["resumen"]["rango_fechas"]),
+               ("Generated", datos["resumen"]["generado"])]
+    if tarjetas:
+        for k, (etiqueta, valor) in enumerate(resumen):
+            c.setFont("Helvetica", 10)
+            c.drawString(50 + 170 * k, y[0], etiqueta)
+            c.drawString(50 + 170 * k, y[0] - 16, valor)
+        y[0] -= 32
+    else:
+        for etiqueta, valor in resumen:
+            linea(f"{etiqueta:<15} {valor}")
+    linea("* Data shown for the selected date range", "Helvetica-Oblique", 8)
+
+    seccion("Malicious Detections and Preventions")
+    cifras(datos["malicioso"])
+    seccion("Automation")
+    cifras(datos["automatizacion"])
+    seccion("Inventory*")
+    cifras(datos["inventario"])
+
+    # Páginas de relleno como las tablas de activos de los informes reales
+    for pagina in range(paginas_relleno):
+        c.showPage()
+        y[0] = alto - 60
+        seccion("Top Affected Assets")
+        for _ in range(40):
+            linea(f"host-{r.randint(0, 9999):04d}      {r.choice(SEVERIDADES)} risk      "
+                  f"{r.randint(0, 500)}   critical files", tamano=8, salto=14)
+
+    c.showPage()
+    y[0] = alto - 60
+    seccion("Alert Count by Severity")
+    linea("Severity      # Alerts")
+    for severidad in SEVERIDADES:
+        linea(f"{severidad}      {datos['alert_severity_counts'][severidad.lower()]}")
+    seccion("IT Hygiene")
+    linea("No issues found")
+    c.showPage()
+    c.save()
+    return ruta_pdf
+
+
+def generar_informes(directorio, cantidad, periodos=1, semilla=0, paginas_relleno=0, separador_miles=False,
+                     tarjetas=False):
+    """Genera cantidad informes repartidos en períodos mensuales consecutivos.
+
+    Devuelve una lista de pares (ruta, datos esperados) en el orden de generación.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    generados = []
+    for indice in range(cantidad):
+        datos = datos_sinteticos(indice, indice % periodos, semilla, separador_miles)
+        ruta_pdf = os.path.join(directorio, nombre_archivo_informe(datos))
+        generar_informe(ruta_pdf, datos, paginas_relleno, semilla, tarjetas)
+        generados.append((ruta_pdf, datos))
+    return generados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera informes ejecutivos Cynet sintéticos.")
+    parser.add_argument("directorio", help="Carpeta de destino")
+    parser.add_argument("-n", "--cantidad", type=int, default=20, help="Número de informes (por defecto: 20)")
+    parser.add_argument("--periodos", type=int, default=1,
+                        help="Repartir los informes en N meses consecutivos desde enero de 2025")
+    parser.add_argument("--paginas-relleno", type=int, default=0,
+                        help="Páginas de tablas de activos añadidas a cada informe")
+    parser.add_argument("--separador-miles", action="store_true", help="Escribir los números como 1,234")
+    parser.add_argument("--tarjetas", action="store_true",
+                        help="Cifras en tarjetas con la etiqueta debajo y encabezado en columnas")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    generados = generar_informes(args.directorio, args.cantidad, max(1, args.periodos), args.semilla,
+                                 args.paginas_relleno, args.separador_miles, args.tarjetas)
+    print(f"{len(generados)} informe(s) generado(s) en {os.path.abspath(args.directorio)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())